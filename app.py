@@ -1,12 +1,58 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash
-from config import supabase
+from flask import (
+    Flask, render_template, request, redirect, url_for, session, flash, jsonify, Response, stream_with_context,
+    send_from_directory, g, make_response,
+)
+from config import (
+    BUCKET_NAME, SETTINGS_CACHE_TTL, VERIFIED_CACHE_SIZE, VERIFIED_CACHE_TTL,
+    HERO_STATS_TTL, HERO_STATS_MIN_AGE, VOTE_COUNTER_MODE, VOTE_COUNTER_FLUSH_INTERVAL,
+    VOTE_COUNTER_MAX_PENDING, VOTE_COUNTER_REBUILD_ON_START, CATALOG_TTL,
+    ELECTION_SCHEDULER_ENABLED, ELECTION_SCHEDULER_RESYNC, VOTE_PAGE_CLOSED_LIMIT, IMPORT_CHUNK_SIZE,
+    REGISTRY_INDEX_ENABLED, REGISTRY_INDEX_MODE, REGISTRY_INDEX_TTL, REGISTRY_BLOOM_ERROR_RATE,
+    REGISTRY_INDEX_STAMP_PATH, REGISTRY_INDEX_TRUST_MISSES,
+    RESULTS_REFRESH_INTERVAL, RESULTS_FREEZE_GRACE, LIVE_RESULTS_INTERVAL, LIVE_RESULTS_MAX_CLIENTS,
+    LIVE_RESULTS_MAX_STREAM_SECONDS, PAGE_CACHE_SIZE, PAGE_CACHE_TTL, QUERY_FANOUT_MAX_IN_FLIGHT,
+    PHOTO_MAX_BYTES, AVATAR_CACHE_SIZE, STATIC_PRECOMPRESS, METRICS_ENABLED, SLOW_REQUEST_MS, METRICS_TOKEN,
+    TRACE_RECORD_PATH, TRACE_SALT, TRACE_SAMPLE_RATE, EXPORT_BATCH_SIZE, TALLY_RECONCILE_INTERVAL,
+    TALLY_RECONCILE_REPAIR, TALLY_RECONCILE_BATCH_SIZE, TALLY_RECONCILE_SETTLE, TALLY_CHECKPOINT_PATH,
+    TALLY_RECONCILE_LOCK_PATH, BALLOT_VERSIONS_PATH, BALLOT_VERSION_SLOTS,
+)
+from repository import (
+    create_repository, VOTE_OK, VOTE_NOT_FOUND, VOTE_NOT_STARTED, VOTE_ENDED, VOTE_ALREADY_CAST,
+    REGISTER_OK, REGISTER_NOT_IN_REGISTRY, REGISTER_ALREADY_REGISTERED, REGISTER_ID_TAKEN,
+    REGISTER_EMAIL_TAKEN, PAGE_FILTER_COLUMNS,
+)
+from cache import CachedValue, LRUCache
+from vote_counter import VoteCounterAggregator
+from tally_reconciler import NotLeaderError, TallyReconciler
+from catalog import ElectionCatalog, parse_naive
+from scheduler import ElectionStatusScheduler, status_at
+from student_import import MissingColumnsError, StudentImporter, SUPPORTED_EXTENSIONS
+from registry_index import RegistryIndex
+from results_board import ResultsBoard
+from live_results import ResultsBroadcaster
+from conditional import DataVersion, SharedCounters, conditional_page, make_etag, release_id
+from fanout import QueryExecutor
+from metrics import InstrumentedRepository, Metrics
+from traces import TraceRecorder
+from photos import PhotoError, is_variant_file, photo_variant, store_photo
+from static_assets import AssetManifest
+from exports import MIMETYPES as EXPORT_MIMETYPES, stream_export
+from avatars import (
+    DEFAULT_SIZE as AVATAR_SIZE, candidate_image, colour_for, initials_for, is_placeholder, render_svg,
+    valid_avatar_args,
+)
+import atexit
+import base64
+import hmac
+import json
 import os
+import threading
 from datetime import datetime, timezone
-from werkzeug.utils import secure_filename
 import time
-import pandas as pd
 
 app = Flask(__name__)
+# {{ c.photo | photo_variant('thumb', 'webp') }}: small/WebP variants of pipeline photos
+app.add_template_filter(photo_variant, "photo_variant")
 # IMPORTANT: Replace the default secret key in a production environment
 app.secret_key = os.getenv("SECRET_KEY", "supersecretkey")
 
@@ -14,23 +60,190 @@ SUPABASE_URL = os.getenv("SUPABASE_URL", "")
 # For browser/frontend usage, ensure this is the public anon key.
 SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY", os.getenv("SUPABASE_KEY", ""))
 
-# Storage bucket for candidate photos (MUST be a public bucket in Supabase)
-BUCKET_NAME = os.getenv("CANDIDATE_BUCKET", "candidate-photos")
-
 # Local Upload Configuration
 UPLOAD_FOLDER = os.path.join(os.getcwd(), 'static', 'uploads')
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+# Data-access layer (Supabase or local SQLite, see config.DATA_BACKEND)
+db = create_repository(upload_folder=UPLOAD_FOLDER)
+
+# Backend calls per request (table, operation, latency, payload size), served at /metrics
+metrics = Metrics(slow_request_ms=SLOW_REQUEST_MS)
+if METRICS_ENABLED:
+    db = InstrumentedRepository(db, metrics)
+
+# Anonymised request traces for capacity planning (benchmarks/replay.py), opt-in
+trace_recorder = None
+if METRICS_ENABLED and TRACE_RECORD_PATH:
+    trace_recorder = TraceRecorder(TRACE_RECORD_PATH, TRACE_SALT, sample_rate=TRACE_SAMPLE_RATE)
+    atexit.register(trace_recorder.close)
+    print(f"[TRACE] Recording request traces to {TRACE_RECORD_PATH}")
+
+# Independent reads of one request run concurrently on this bounded pool
+query_executor = QueryExecutor(max_in_flight=QUERY_FANOUT_MAX_IN_FLIGHT)
+
+# Per-domain digests of the cached data behind the ETags of /, /results and /vote,
+# recorded by the cache loaders; equal in every worker that loaded the same data
+data_version = DataVersion(release_id(os.path.dirname(os.path.abspath(__file__))))
+
+# Per-voter ballot counters for the /vote ETag, shared by the workers of this host
+ballot_versions = SharedCounters(BALLOT_VERSIONS_PATH or None, slots=BALLOT_VERSION_SLOTS)
+
+# Rendered HTML of /, /results keyed by ETag (viewer role + data versions)
+page_cache = LRUCache(maxsize=PAGE_CACHE_SIZE, ttl=PAGE_CACHE_TTL)
+
+# Global settings row served from memory; toggle_registration invalidates it
+settings_cache = CachedValue(data_version.watch(db.get_settings, "settings"), ttl=SETTINGS_CACHE_TTL)
+
+# email -> verified; kept in step by register, bulk_verify_users and delete_user
+verified_cache = LRUCache(maxsize=VERIFIED_CACHE_SIZE, ttl=VERIFIED_CACHE_TTL)
+
+# Elections (pre-parsed, time-indexed) and candidates grouped by election
+election_catalog = ElectionCatalog(
+    data_version.watch(lambda: db.list_elections(newest_first=True), "elections"),
+    data_version.watch(db.list_candidates_with_election_title, "candidates"),
+    ttl=CATALOG_TTL,
+    executor=query_executor,
+)
+
+def load_vote_page_elections():
+    """Open elections by stored status, plus the most recently closed ones."""
+    with query_executor.batch() as batch:
+        open_query = batch.submit(db.list_elections, statuses=("Active", "Upcoming"), label="open elections")
+        closed_query = batch.submit(db.list_recent_closed_elections, VOTE_PAGE_CLOSED_LIMIT,
+                                    label="recent closed elections")
+    return open_query.result() + closed_query.result()
+
+
+# What /vote lists, filtered in the database: does not grow with the number of past elections.
+# Classified by time like the full catalog, so a status the scheduler has yet to write is harmless.
+vote_page_catalog = ElectionCatalog(
+    data_version.watch(load_vote_page_elections, "vote_page"),
+    data_version.watch(lambda election_ids: db.list_candidates(election_ids=election_ids), "vote_page"),
+    ttl=CATALOG_TTL,
+    candidates_by_election_ids=True,
+)
+
+# Keeps elections.status current and publishes status change events
+status_scheduler = None
+if ELECTION_SCHEDULER_ENABLED:
+    status_scheduler = ElectionStatusScheduler(
+        db.list_elections, db.set_election_status, resync_interval=ELECTION_SCHEDULER_RESYNC
+    )
+    # Catalog rows carry the stored status, so reload them on every transition
+    status_scheduler.subscribe(lambda event: (election_catalog.invalidate(), vote_page_catalog.invalidate()))
+    status_scheduler.start()
+    atexit.register(status_scheduler.stop)
+
+
+def elections_changed():
+    """Call after any admin write to elections or candidates."""
+    election_catalog.invalidate()
+    vote_page_catalog.invalidate()
+    results_board.invalidate()
+    if status_scheduler:
+        status_scheduler.request_resync()
+
+
+# Write-behind candidates.votes counters (only in VOTE_COUNTER_MODE=batched)
+vote_counter = None
+if VOTE_COUNTER_MODE == "batched":
+    vote_counter = VoteCounterAggregator(
+        db.apply_vote_increments,
+        db.rebuild_vote_counters,
+        flush_interval=VOTE_COUNTER_FLUSH_INTERVAL,
+        max_pending=VOTE_COUNTER_MAX_PENDING,
+    )
+    if VOTE_COUNTER_REBUILD_ON_START:
+        try:
+            # Recover counters that a previous process did not get to flush (single worker only)
+            vote_counter.rebuild()
+        except Exception as e:
+            print(f"[VOTE_COUNTER] Rebuild on start failed: {e}")
+    vote_counter.start()
+    atexit.register(vote_counter.stop)
+
+def load_vote_counts(election_ids):
+    """``{candidate_id: votes}`` for the candidates of the given elections (all of them for None)."""
+    rows = db.list_candidates(columns="id,votes", election_ids=election_ids)
+    return {r["id"]: r.get("votes", 0) or 0 for r in rows}
+
+
+# Frozen results for closed elections, incrementally updated tallies for live ones
+results_board = ResultsBoard(
+    election_catalog,
+    load_vote_counts,
+    pending_counts=vote_counter.pending_counts if vote_counter else None,
+    refresh_interval=RESULTS_REFRESH_INTERVAL,
+    freeze_grace=RESULTS_FREEZE_GRACE,
+)
+
+def tally_repaired():
+    """Counters were corrected: drop everything derived from them."""
+    results_board.invalidate()
+    hero_stats_snapshot.mark_stale()
+
+
+# Checkpointed audit of candidates.votes against the ballots; /admin/tally shows and runs it
+tally_reconciler = TallyReconciler(
+    db.votes_after,
+    db.count_votes,
+    lambda: load_vote_counts(None),
+    db.apply_vote_increments,
+    pending_counts=vote_counter.pending_counts if vote_counter else None,
+    batch_size=TALLY_RECONCILE_BATCH_SIZE,
+    settle_seconds=TALLY_RECONCILE_SETTLE,
+    interval=TALLY_RECONCILE_INTERVAL,
+    repair=TALLY_RECONCILE_REPAIR,
+    checkpoint_path=TALLY_CHECKPOINT_PATH or None,
+    lock_path=TALLY_RECONCILE_LOCK_PATH or None,
+    on_repair=tally_repaired,
+)
+if TALLY_RECONCILE_INTERVAL > 0:
+    tally_reconciler.start()
+    atexit.register(tally_reconciler.stop)
+
+# Chunked registry import; progress readable from /admin/upload-students/status
+student_importer = StudentImporter(db, chunk_size=IMPORT_CHUNK_SIZE)
+
+# (university_id, phone) eligibility checks for register(), answered from memory
+registry_index = None
+if REGISTRY_INDEX_ENABLED:
+    registry_index = RegistryIndex(
+        lambda: db.iter_rows("student_registry"),
+        ttl=REGISTRY_INDEX_TTL,
+        error_rate=REGISTRY_BLOOM_ERROR_RATE,
+        keep_entries=REGISTRY_INDEX_MODE != "bloom",
+        stamp_path=REGISTRY_INDEX_STAMP_PATH,
+        trust_misses=REGISTRY_INDEX_TRUST_MISSES,
+    )
+
+    def warm_registry_index():
+        try:
+            registry_index.rebuild()
+        except Exception as e:
+            print(f"[REGISTRY_INDEX] Initial load failed: {e}")
+
+    threading.Thread(target=warm_registry_index, name="registry-index-warmup", daemon=True).start()
+
+
+def registry_precheck(university_id, phone):
+    """``(found, entry)`` from the in-memory index; ``found`` is None when only the database can tell."""
+    if registry_index:
+        try:
+            return registry_index.lookup(university_id, phone)
+        except Exception as e:
+            print(f"[REGISTRY_INDEX] Lookup failed, leaving the check to the database: {e}")
+    return None, None
+
 # -------------------- HELPER FUNCTIONS --------------------
 
 def get_election_end():
     """Return election end timestamp string in ISO format (or None if not set)."""
     try:
-        # Fetch the single settings row (assuming ID 1 is used for global settings)
-        data = (
-            supabase.table("settings").select("election_end").eq("id", 1).limit(1).single().execute().data
-        )
+        # Single settings row (ID 1), cached in-process
+        data = settings_cache.get()
         return data.get("election_end") if data else None
     except Exception as e:
         print(f"Error fetching election end: {e}")
@@ -58,149 +271,286 @@ def is_user_verified(email: str) -> bool:
     if email == "admin@gsu.edu":
         # Admin is always considered verified for access
         return True
+    cached = verified_cache.get(email)
+    if cached is not None:
+        return cached
     try:
         # Fetch 'verified' status from the profiles table
-        row = supabase.table("profiles").select("verified").eq("email", email).single().execute().data
-        return bool(row and row.get("verified"))
+        row = db.get_profile(email)
+        verified = bool(row and row.get("verified"))
+        verified_cache.set(email, verified)
+        return verified
     except Exception as e:
         print(f"Error checking user verification for {email}: {e}")
         return False
 
 def handle_photo_upload(file, name, existing_photo=None):
-    """Uploads a file to Supabase Storage and returns the public URL."""
+    """Resizes an uploaded photo into its variants, stores them and returns the public URL."""
     if not file or not file.filename:
         return existing_photo
     
     try:
-        ext = os.path.splitext(file.filename)[1].lower()
-        # Create a unique filename
-        fname = f"candidate_{int(time.time())}_{secure_filename(name)}{ext}"
-        
-        file_bytes = file.read()
-        print(f"[STORAGE] Uploading photo to bucket {BUCKET_NAME} as {fname}")
-        
-        # Upload the file
-        upload_response = supabase.storage.from_(BUCKET_NAME).upload(
-            file=file_bytes, 
-            path=fname, 
-            file_options={"content-type": file.mimetype, "upsert": True}
-        )
-        
-        # Get the public URL
-        public_url_response = supabase.storage.from_(BUCKET_NAME).get_public_url(fname)
+        print(f"[STORAGE] Processing photo for {name} ({file.filename}) into bucket {BUCKET_NAME}")
 
-        photo_url = ""
-        try:
-            # Handle various possible response shapes from different Supabase SDK versions
-            if isinstance(public_url_response, str):
-                # SDK returns a string directly
-                photo_url = public_url_response
-            elif isinstance(public_url_response, dict):
-                # Fallback for dict responses
-                photo_url = public_url_response.get("publicUrl") or public_url_response.get("public_url") or public_url_response.get("publicURL") or ""
-            else:
-                # Some SDKs return an object with a 'data' attribute containing the URL
-                data = getattr(public_url_response, "data", None)
-                if isinstance(data, dict):
-                    photo_url = data.get("publicUrl") or data.get("public_url") or ""
-                else:
-                    # Last resort: try string conversion
-                    try:
-                        photo_url = str(public_url_response)
-                    except Exception:
-                        photo_url = ""
-        except Exception:
-            photo_url = ""
-        # Final fallback: Construct URL manually
-        if not photo_url and SUPABASE_URL:
-            photo_url = f"{SUPABASE_URL.rstrip('/')}/storage/v1/object/public/{BUCKET_NAME}/{fname}"
+        # Streamed, re-encoded and stored under its content hash (see photos.py)
+        photo_url = store_photo(db, file.stream, PHOTO_MAX_BYTES)
 
         if not photo_url:
              print(f"[STORAGE ERROR] Photo uploaded but public URL could not be determined.")
              return existing_photo # Use existing or return None
         
         return photo_url
-        
+
+    except PhotoError as e:
+        flash(f"Photo for {name} was not saved: {e}", "error")
+        return existing_photo
     except Exception as e:
         print(f"[STORAGE ERROR] Failed to upload candidate photo: {repr(e)}")
-        flash("Failed to upload candidate photo to Supabase. Check server logs.", "error")
+        flash("Failed to upload candidate photo. Check server logs.", "error")
         return existing_photo
 
 
+def avatar_url(name, size=AVATAR_SIZE):
+    """Local initials avatar for a candidate without a photo."""
+    return url_for("avatar", size=size, colour=colour_for(name), initials=initials_for(name))
+
+
+@app.template_global()
+def candidate_thumb(candidate, fmt="jpg"):
+    """Small image URL for a candidate card: photo thumbnail or initials avatar."""
+    return candidate_image(candidate.get("photo"), candidate.get("name"), avatar_url, "thumb", fmt)
+
+
 def get_election_status(election):
     """Helper function to get election status (Active, Upcoming, or Closed)."""
-    from datetime import datetime, timezone
-    
     try:
-        now = datetime.now(timezone.utc)
-        start = datetime.fromisoformat(election['start_time'].replace('Z', '+00:00'))
-        end = datetime.fromisoformat(election['end_time'].replace('Z', '+00:00'))
-        
-        if now < start:
-            return "Upcoming"
-        elif start <= now <= end:
-            return "Active"
-        else:
-            return "Closed"
+        # Naive server-local time, like the vote routes and the status scheduler
+        start = parse_naive(election['start_time']).timestamp()
+        end = parse_naive(election['end_time']).timestamp()
+        return status_at(start, end, time.time())
     except:
         return "Unknown"
 
-# -------------------- HOME --------------------
-@app.route("/")
-def home():
-    """Landing page showing election statistics and top candidates."""
-    candidates = []
-    votes = []
-    profiles = []
+# -------------------- AVATARS --------------------
+# (initials, colour, size) -> SVG; the URL determines the image, so it never goes stale
+avatar_cache = LRUCache(maxsize=AVATAR_CACHE_SIZE, ttl=24 * 3600)
+
+
+@app.route("/avatars/<int:size>/<colour>/<initials>.svg")
+def avatar(size, colour, initials):
+    """Initials avatar rendered locally (replaces third-party placeholder images)."""
+    if not valid_avatar_args(initials, colour, size):
+        return "Invalid avatar", 404
+    key = (initials, colour.lower(), size)
+    svg = avatar_cache.get(key)
+    if svg is None:
+        svg = render_svg(*key)
+        avatar_cache.set(key, svg)
+    response = Response(svg, mimetype="image/svg+xml")
+    response.cache_control.public = True
+    response.cache_control.max_age = 365 * 24 * 3600
+    response.cache_control.immutable = True
+    return response
+
+# -------------------- STATIC ASSETS --------------------
+ASSET_MAX_AGE = 365 * 24 * 3600
+
+# static/ file -> content-fingerprinted /assets/ URL (and precompressed bodies)
+asset_manifest = AssetManifest(app.static_folder, precompress=STATIC_PRECOMPRESS)
+
+
+def cache_forever(response):
+    response.cache_control.no_cache = None
+    response.cache_control.public = True
+    response.cache_control.max_age = ASSET_MAX_AGE
+    response.cache_control.immutable = True
+    return response
+
+
+@app.template_global()
+def asset_url(endpoint, **values):
+    """``url_for`` that fingerprints static files: ``asset_url('static', filename='logo.png')``."""
+    if endpoint == "static":
+        fingerprinted = asset_manifest.fingerprinted(values.get("filename", ""))
+        if fingerprinted:
+            values["filename"] = fingerprinted
+            return url_for("asset", **values)
+    return url_for(endpoint, **values)
+
+
+@app.route("/assets/<path:filename>")
+def asset(filename):
+    """Fingerprinted static file; immutable, since a changed file gets a new URL."""
+    real_name, current = asset_manifest.resolve(filename)
+    if real_name is None or asset_manifest.digest(real_name) is None:
+        return "Not found", 404
+    if not current:
+        # Page rendered before the file changed: current bytes, revalidated as usual
+        return send_from_directory(app.static_folder, real_name, max_age=0)
+
+    body, encoding = asset_manifest.compressed(real_name, request.headers.get("Accept-Encoding"))
+    if body is not None:
+        response = Response(body, mimetype=asset_manifest.mimetype(real_name))
+        response.headers["Content-Encoding"] = encoding
+        response.vary.add("Accept-Encoding")
+    else:
+        response = send_from_directory(app.static_folder, real_name)
+    return cache_forever(response)
+
+
+@app.after_request
+def cache_photo_variants(response):
+    """Photos stored by the upload pipeline are named by their content: let browsers keep them."""
+    if request.endpoint == "static" and response.status_code in (200, 304):
+        if is_variant_file((request.view_args or {}).get("filename")):
+            cache_forever(response)
+    return response
+
+# -------------------- METRICS --------------------
+@app.before_request
+def start_request_trace():
+    if METRICS_ENABLED:
+        route = request.url_rule.rule if request.url_rule else "<unmatched>"
+        g.request_trace, g.request_trace_token = metrics.start_request(route, request.method)
+
+
+@app.after_request
+def record_request_metrics(response):
+    trace = g.get("request_trace")
+    if trace is not None:
+        metrics.finish_request(trace, response.status_code)
+        if trace_recorder is not None:
+            trace_recorder.record(
+                trace, response.status_code, request.endpoint, request.view_args,
+                session.get("user"), viewer_role(),
+            )
+    return response
+
+
+@app.teardown_request
+def end_request_trace(error=None):
+    trace = g.pop("request_trace", None)
+    if trace is not None:
+        # Only records anything when after_request never ran (unhandled error)
+        metrics.finish_request(trace, 500)
+        metrics.end_request(g.pop("request_trace_token"))
+
+
+@app.route("/metrics")
+def metrics_endpoint():
+    """Prometheus metrics: an admin session, or the METRICS_TOKEN bearer token for scrapers."""
+    scraper = bool(METRICS_TOKEN) and hmac.compare_digest(
+        request.headers.get("Authorization", ""), f"Bearer {METRICS_TOKEN}"
+    )
+    if not scraper and session.get("user") != "admin@gsu.edu":
+        return "Admin access only.", 403
+    if not METRICS_ENABLED:
+        return "Metrics are disabled (METRICS_ENABLED=false).", 404
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
 
-    try:
-        # Select required candidate info and sort by votes in Python
-        candidates_raw = supabase.table("candidates").select("id,name,photo,votes").execute().data or []
-    except Exception:
-        candidates_raw = []
+# -------------------- HOME --------------------
+TOP_CANDIDATES_LIMIT = 3
 
-    try:
-        votes = supabase.table("votes").select("id").execute().data or []
-    except Exception:
-        votes = []
 
-    try:
+def load_hero_stats():
+    """Compute landing page statistics with count/limit queries (no full-table reads)."""
+    with query_executor.batch() as batch:
+        # Only the leaders are needed, already sorted by the backend
+        top_query = batch.submit(db.top_candidates, TOP_CANDIDATES_LIMIT, default=[])
+        voted_query = batch.submit(db.count_votes, default=0)
         # Profiles count is used for total registered
-        profiles = supabase.table("profiles").select("id").execute().data or []
-    except Exception:
-        profiles = []
+        registered_query = batch.submit(db.count_profiles, default=0)
 
-    # Calculate statistics
-    candidates_sorted = sorted(candidates_raw, key=lambda x: x.get("votes", 0) or 0, reverse=True)
-    top_candidates = candidates_sorted[:3]
+    top_candidates = top_query.result()
+    total_voted = voted_query.result()
+    total_registered = registered_query.result()
+
+    max_votes = (top_candidates[0].get("votes", 0) or 0) if top_candidates else 0
 
-    total_registered = len(profiles)
-    total_voted = len(votes)
-    max_votes = candidates_sorted[0].get("votes", 0) if candidates_sorted else 0
-    
     turnout = 0
     if total_registered > 0:
         turnout = int(round((total_voted * 100) / total_registered))
 
-    hero_stats = {
-        "total_registered": total_registered,
-        "total_voted": total_voted,
-        "turnout": turnout,
-        "max_votes": max_votes,
+    return {
+        "hero_stats": {
+            "total_registered": total_registered,
+            "total_voted": total_voted,
+            "turnout": turnout,
+            "max_votes": max_votes,
+        },
+        "top_candidates": top_candidates,
     }
 
-    return render_template(
-        "home.html",
-        election_end_iso=get_election_end(),
-        hero_stats=hero_stats,
-        top_candidates=top_candidates,
+
+# Shared snapshot; refreshed every HERO_STATS_TTL seconds and soon after new votes
+hero_stats_snapshot = CachedValue(
+    data_version.watch(load_hero_stats, "votes", "profiles"), ttl=HERO_STATS_TTL, min_age=HERO_STATS_MIN_AGE
+)
+
+# One poll per interval feeds every /results/stream client in this worker
+results_broadcaster = ResultsBroadcaster(
+    results_board.live_tallies,
+    load_summary=lambda: hero_stats_snapshot.get()["hero_stats"],
+    interval=LIVE_RESULTS_INTERVAL,
+    max_clients=LIVE_RESULTS_MAX_CLIENTS,
+    max_stream_seconds=LIVE_RESULTS_MAX_STREAM_SECONDS,
+)
+
+
+def viewer_role():
+    """What the navigation bar renders for: 'anonymous', 'voter' or 'admin'."""
+    user = session.get("user")
+    if not user:
+        return "anonymous"
+    return "admin" if user == "admin@gsu.edu" else "voter"
+
+
+def versioned_page(domains, render, *parts, shared=True):
+    """Serve ``render()`` conditionally: 304 while ``domains`` (and ``parts``) are unchanged.
+
+    Call after touching the caches the page reads, so a due reload has already
+    recorded its digest. ``shared`` pages depend only on the viewer role and
+    their HTML is cached per ETag.
+    """
+    if session.get("_flashes"):
+        # One-off messages are part of the page: render fresh, no validators
+        return render()
+    role = viewer_role()
+    etag = make_etag(data_version, request.endpoint, role, data_version.get(*domains), *parts)
+    return conditional_page(
+        etag,
+        render,
+        page_cache=page_cache if shared else None,
+        cache_key=etag,
+        private=role != "anonymous",
     )
 
+
+@app.route("/")
+def home():
+    """Landing page showing election statistics and top candidates."""
+    # Both are cached; on a miss their queries overlap instead of adding up
+    with query_executor.batch() as batch:
+        snapshot_query = batch.submit(hero_stats_snapshot.get)
+        end_query = batch.submit(get_election_end)
+    snapshot = snapshot_query.result()
+    election_end_iso = end_query.result()
+
+    def render():
+        return render_template(
+            "home.html",
+            election_end_iso=election_end_iso,
+            hero_stats=snapshot["hero_stats"],
+            top_candidates=snapshot["top_candidates"],
+        )
+
+    return versioned_page(("votes", "profiles", "settings"), render)
+
 # -------------------- REGISTRATION CONTROL --------------------
 def is_registration_open():
     """Check if registration is currently open."""
     try:
-        data = supabase.table("settings").select("registration_open").eq("id", 1).limit(1).single().execute().data
+        data = settings_cache.get()
         if data:
             return data.get("registration_open", True)
         return True # Default to open if no settings found
@@ -217,11 +567,8 @@ def toggle_registration():
     new_status = not current_status
     
     try:
-        exists = supabase.table("settings").select("id").eq("id", 1).execute().data
-        if exists:
-            supabase.table("settings").update({"registration_open": new_status}).eq("id", 1).execute()
-        else:
-            supabase.table("settings").insert({"id": 1, "registration_open": new_status}).execute()
+        db.set_registration_open(new_status)
+        settings_cache.invalidate()
         
         msg = "Registration is now OPEN." if new_status else "Registration is now CLOSED."
         flash(msg, "success" if new_status else "warning")
@@ -248,82 +595,50 @@ def upload_students():
         flash("No file selected.", "error")
         return redirect(url_for("admin_dashboard"))
     
-    if not file.filename.endswith(('.xlsx', '.xls')):
-        flash("Please upload an Excel file (.xlsx or .xls).", "error")
+    if not file.filename.lower().endswith(SUPPORTED_EXTENSIONS):
+        flash("Please upload an Excel or CSV file (.xlsx, .xls or .csv).", "error")
         return redirect(url_for("admin_dashboard"))
     
     try:
-        # Read Excel file
-        df = pd.read_excel(file)
-        
-        # Expected columns: ID, Name, Phone (simplified)
-        required_cols = ['ID', 'Name', 'Phone']
-        missing_cols = [col for col in required_cols if col not in df.columns]
-        
-        if missing_cols:
-            flash(f"Missing columns in Excel: {', '.join(missing_cols)}", "error")
-            return redirect(url_for("admin_dashboard"))
-        
-        # Clean data
-        df = df.dropna(subset=required_cols)  # Remove rows with missing required data
-        df['ID'] = df['ID'].astype(str).str.strip()
-        df['Name'] = df['Name'].astype(str).str.strip()
-        df['Phone'] = df['Phone'].astype(str).str.strip()
-        
-        # Check for duplicates within the file (only ID and Phone need to be unique)
-        if df['ID'].duplicated().any():
-            duplicates = df[df['ID'].duplicated()]['ID'].tolist()
-            flash(f"Warning: Duplicate IDs within file (will be skipped): {', '.join(duplicates[:5])}...", "warning")
-            # Remove duplicates within the file
-            df = df.drop_duplicates(subset=['ID'], keep='first')
-        
-        if df['Phone'].duplicated().any():
-            duplicates = df[df['Phone'].duplicated()]['Phone'].tolist()
-            flash(f"Warning: Duplicate Phones within file (will be skipped): {', '.join(duplicates[:5])}...", "warning")
-            # Remove duplicates within the file
-            df = df.drop_duplicates(subset=['Phone'], keep='first')
-        
-        # Get existing entries from database to skip them
-        existing_ids = set()
-        existing_phones = set()
-        try:
-            existing_data = supabase.table("student_registry").select("university_id, phone").execute().data
-            for item in existing_data:
-                existing_ids.add(item['university_id'])
-                existing_phones.add(item['phone'])
-        except:
-            pass  # If table is empty or error, continue
-        
-        # Insert into database (only new entries)
-        records = []
-        skipped_count = 0
-        for _, row in df.iterrows():
-            # Skip if ID or Phone already exists in database
-            if row['ID'] in existing_ids or row['Phone'] in existing_phones:
-                skipped_count += 1
-                continue
-                
-            records.append({
-                "university_id": row['ID'],
-                "full_name": row['Name'],
-                "phone": row['Phone'],
-                "is_registered": False
-            })
-        
-        if records:
-            # Batch insert only new records
-            supabase.table("student_registry").insert(records).execute()
-            flash(f"Successfully imported {len(records)} new students!", "success")
-        
-        if skipped_count > 0:
-            flash(f"Skipped {skipped_count} entries that already exist in database.", "info")
-        
+        progress = student_importer.run(file.stream, file.filename)
+    except MissingColumnsError as e:
+        flash(f"Missing columns in file: {', '.join(e.missing)}", "error")
+        return redirect(url_for("admin_dashboard"))
     except Exception as e:
         print(f"[UPLOAD_STUDENTS] Error: {e}")
         flash(f"Error importing students: {str(e)}", "error")
+        return redirect(url_for("admin_dashboard"))
+
+    if registry_index and progress.imported:
+        try:
+            registry_index.mark_changed()
+            registry_index.rebuild()
+        except Exception as e:
+            print(f"[REGISTRY_INDEX] Rebuild after import failed: {e}")
+            registry_index.invalidate()
+
+    duplicates = progress.duplicate_ids + progress.duplicate_phones
+    if duplicates:
+        flash(f"Warning: {duplicates} duplicate IDs/Phones within file were skipped "
+              f"(e.g. {', '.join(progress.duplicate_samples)}).", "warning")
+    if progress.imported:
+        flash(f"Successfully imported {progress.imported} new students "
+              f"in {len(progress.chunks)} chunk(s), {progress.total_seconds:.1f}s.", "success")
+    if progress.skipped_existing:
+        flash(f"Skipped {progress.skipped_existing} entries that already exist in database.", "info")
+    if progress.rows_invalid:
+        flash(f"Skipped {progress.rows_invalid} rows with a missing ID, Name or Phone.", "info")
     
     return redirect(url_for("admin_dashboard"))
 
+
+@app.route("/admin/upload-students/status")
+def upload_students_status():
+    """Progress and per-chunk timings of the running (or last) student import."""
+    if session.get("user") != "admin@gsu.edu":
+        return jsonify({"error": "Admin access only."}), 403
+    return jsonify(student_importer.status() or {})
+
 # -------------------- REGISTER --------------------
 @app.route("/register", methods=["GET", "POST"])
 def register():
@@ -349,68 +664,61 @@ def register():
              flash("Please fill out all required fields.", "error")
              return redirect(url_for("register"))
 
-        # 🛑 1. Check if student is in the allowed registry (only ID and Phone)
-        try:
-            registry_check = supabase.table("student_registry")\
-                .select("*")\
-                .eq("university_id", university_id)\
-                .eq("phone", phone)\
-                .execute()
-            
-            if not registry_check.data:
-                flash("Your University ID and Phone number are not in the student registry. Please contact administration.", "error")
-                return redirect(url_for("register"))
-            
-            registry_entry = registry_check.data[0]
-            
-            # Check if already registered
-            if registry_entry.get('is_registered', False):
-                flash("This student has already registered. Please login.", "warning")
-                return redirect(url_for("login"))
-                
-        except Exception as e:
-            print(f"Error checking student registry: {e}")
-            flash("Database error during validation.", "error")
+        # 🛑 1. Answer repeats the in-memory registry index knows about (no round trip);
+        # misses and anything it cannot vouch for go to the database below
+        found, registry_entry = registry_precheck(university_id, phone)
+        if found is False:
+            flash("Your University ID and Phone number are not in the student registry. Please contact administration.", "error")
             return redirect(url_for("register"))
+        if found and registry_entry.get('is_registered', False):
+            flash("This student has already registered. Please login.", "warning")
+            return redirect(url_for("login"))
 
-        # 🛑 2. Check if University ID is already used in profiles
+        # 🛑 2. Registry check, ID/email uniqueness, profile insert and registry
+        # update in one atomic call (register_student.sql)
         try:
-            existing_id = supabase.table("profiles").select("id").eq("university_id", university_id).execute()
-            if existing_id.data:
-                flash("This University ID is already registered. Please contact admin.", "error")
-                return redirect(url_for("register"))
+            outcome = db.register_student(email, full_name, faculty, university_id, phone)
         except Exception as e:
-            print(f"Error checking University ID: {e}")
-            flash("Database error during ID check.", "error")
+            print(f"[REGISTER] register_student failed: {e}")
+            flash("Database error during validation.", "error")
             return redirect(url_for("register"))
 
-        try:
-            # 3. Create user via Auth
-            response = supabase.auth.sign_up({"email": email, "password": password})
-
-            # 4. Save profile data
-            supabase.table("profiles").insert({
-                "email": email,
-                "name": full_name,
-                "faculty": faculty,
-                "university_id": university_id,
-                "phone": phone,  # Store phone for easy admin access
-                "verified": True  # Auto-verify since they're in the registry
-            }).execute()
-            
-            # 5. Mark as registered in registry
-            supabase.table("student_registry")\
-                .update({"is_registered": True})\
-                .eq("university_id", university_id)\
-                .execute()
-
-            flash("Registration successful! You can now login.", "success")
+        if outcome == REGISTER_NOT_IN_REGISTRY:
+            flash("Your University ID and Phone number are not in the student registry. Please contact administration.", "error")
+            return redirect(url_for("register"))
+        if outcome == REGISTER_ALREADY_REGISTERED:
+            flash("This student has already registered. Please login.", "warning")
             return redirect(url_for("login"))
+        if outcome == REGISTER_ID_TAKEN:
+            flash("This University ID is already registered. Please contact admin.", "error")
+            return redirect(url_for("register"))
+        if outcome == REGISTER_EMAIL_TAKEN:
+            flash("Registration failed: this email is already registered.", "error")
+            return redirect(url_for("register"))
+        if outcome != REGISTER_OK:
+            flash("Registration failed. Please try again.", "error")
+            return redirect(url_for("register"))
 
+        # 3. Create user via Auth; on failure undo step 2 so the student can retry
+        try:
+            db.sign_up(email, password)
         except Exception as e:
+            try:
+                db.release_registration(email, university_id)
+            except Exception as cleanup_error:
+                # Profile exists without an auth user: delete it from the admin dashboard
+                print(f"[REGISTER] Could not release registration of {email} ({university_id}): {cleanup_error}")
             flash(f"Registration failed: {str(e)}", "error")
             return redirect(url_for("register"))
 
+        if registry_index:
+            registry_index.set_registered(university_id, True)
+        verified_cache.set(email, True)
+        hero_stats_snapshot.mark_stale()
+
+        flash("Registration successful! You can now login.", "success")
+        return redirect(url_for("login"))
+
     return render_template("register.html")
 
 
@@ -422,10 +730,7 @@ def login():
         email = request.form["email"]
         password = request.form["password"]
         try:
-            response = supabase.auth.sign_in_with_password({"email": email, "password": password})
-            
-            # Supabase Python SDK often puts the user object inside the session key
-            user = response.user if hasattr(response, 'user') else (response.session.user if hasattr(response, 'session') and response.session else None)
+            user = db.sign_in(email, password)
             
             if user:
                 session["user"] = user.email
@@ -470,7 +775,7 @@ def forgot_password():
             return redirect(url_for("forgot_password"))
         try:
             redirect_url = url_for("update_password", _external=True)
-            supabase.auth.reset_password_for_email(email, options={"redirectTo": redirect_url}) # Use redirectTo for modern Supabase
+            db.send_password_reset(email, redirect_url)
             flash("If that email exists, a password reset link has been sent. Open it to set a new password.", "info")
         except Exception:
             flash("Could not send password reset email. Please try again later.", "error")
@@ -492,7 +797,7 @@ def update_password():
 def logout():
     """User logout route."""
     try:
-        supabase.auth.sign_out()
+        db.sign_out()
     except Exception:
         pass
     session.clear()
@@ -526,7 +831,6 @@ def terms():
     """Terms and conditions page."""
     return render_template("terms.html", no_nav=True)
 
-# -------------------- VOTING --------------------
 # -------------------- VOTING --------------------
 @app.route("/vote")
 def vote():
@@ -537,75 +841,66 @@ def vote():
 
     user_email = session['user']
 
+    # Verification and the election catalog are independent reads
+    with query_executor.batch() as batch:
+        verified_query = batch.submit(is_user_verified, user_email)
+        catalog_query = batch.submit(vote_page_catalog.snapshot)
+
     # Only verified users vote
-    if not is_user_verified(user_email):
+    if not verified_query.result():
         flash("Your account is still awaiting verification.", "warning")
         return redirect(url_for("pending_verification"))
 
-    # Fetch Active Elections (Strict Time Check)
-    now = datetime.now()
+    # Fetch Active Elections (Strict Time Check, naive server time)
     try:
-        # Get all elections
-        all_elections = supabase.table("elections").select("*").execute().data or []
-        
-        # Filter for ACTIVE elections strictly by time
-        active_elections = []
-        upcoming_elections = []
-        closed_elections = []
-
-        for e in all_elections:
-            # Naive time handling to match server time
-            start = datetime.fromisoformat(e["start_time"].replace("Z", "")).replace(tzinfo=None)
-            end = datetime.fromisoformat(e["end_time"].replace("Z", "")).replace(tzinfo=None)
-            
-            e["formatted_start"] = start.strftime("%d %b %Y, %I:%M %p")
-            e["formatted_end"] = end.strftime("%d %b %Y, %I:%M %p")
-
-            if now < start:
-                upcoming_elections.append(e)
-            elif start <= now <= end:
-                active_elections.append(e)
-            else:
-                closed_elections.append(e)
-
+        catalog_query.result()
+        active_elections, upcoming_elections, closed_elections = vote_page_catalog.classify(datetime.now())
+        closed_elections = closed_elections[:VOTE_PAGE_CLOSED_LIMIT]
     except Exception as e:
         print("ELECTION LOAD ERROR:", e)
         flash("Unable to load elections.", "error")
-        all_elections = []
-        active_elections = []
+        active_elections, upcoming_elections, closed_elections = [], [], []
+
+    ballots_failed = []
 
-    # Get Candidates for Active Elections
-    candidates_by_election = {}
-    if active_elections:
-        election_ids = [e["id"] for e in active_elections]
+    def render():
+        # Get Candidates for Active Elections
+        candidates_by_election = {e["id"]: vote_page_catalog.candidates_for(e["id"]) for e in active_elections}
+
+        # Check if user already voted in these elections (only read when the ETag did not match)
         try:
-            cands = supabase.table("candidates").select("*").in_("election_id", election_ids).execute().data
-            for c in cands:
-                eid = c["election_id"]
-                if eid not in candidates_by_election:
-                    candidates_by_election[eid] = []
-                candidates_by_election[eid].append(c)
+            votes_map = {election_id: True for election_id in db.voted_election_ids(user_email)}
         except Exception as e:
-            print("CANDIDATE LOAD ERROR:", e)
-
-    # Check if user already voted in these elections
-    votes_map = {} # election_id -> boolean
-    try:
-        my_votes = supabase.table("votes").select("election_id").eq("email", user_email).execute().data
-        for v in my_votes:
-            votes_map[v["election_id"]] = True
-    except Exception:
-        pass
+            print("VOTES LOAD ERROR:", e)
+            ballots_failed.append(e)
+            votes_map = {}
+
+        return render_template(
+            "vote.html",
+            active_elections=active_elections,
+            upcoming_elections=upcoming_elections,
+            closed_elections=closed_elections,
+            candidates_map=candidates_by_election,
+            votes_map=votes_map,
+            user=user_email
+        )
 
-    return render_template(
-        "vote.html",
-        active_elections=active_elections,
-        upcoming_elections=upcoming_elections,
-        closed_elections=closed_elections,
-        candidates_map=candidates_by_election,
-        votes_map=votes_map,
-        user=user_email
+    # Per voter: which elections are open right now and the voter's ballot counter, which
+    # every ballot cast through a worker of this host bumps - no query to check the ETag
+    response = versioned_page(
+        ("vote_page",),
+        render,
+        user_email,
+        ballot_versions.get(user_email),
+        tuple(e["id"] for e in active_elections),
+        tuple(e["id"] for e in upcoming_elections),
+        shared=False,
     )
+    if ballots_failed:
+        # Rendered without the voter's ballots: no validator, so it is never revalidated
+        response = make_response(response)
+        response.headers.pop("ETag", None)
+    return response
 
 
 @app.route("/vote/<int:candidate_id>", methods=["POST"])
@@ -620,40 +915,35 @@ def submit_vote(candidate_id):
         flash("You must be verified to vote.", "warning")
         return redirect(url_for("pending_verification"))
 
-    # 1. Get Candidate & Election
+    # Candidate lookup, STRICT time check, ballot insert and counter bump
+    # all happen in one atomic backend call (see cast_vote.sql)
     try:
-        cand = supabase.table("candidates").select("election_id").eq("id", candidate_id).single().execute().data
-        election_id = cand["election_id"]
-        
-        election = supabase.table("elections").select("*").eq("id", election_id).single().execute().data
-        
-        # 2. STRICT Time Check
-        start = datetime.fromisoformat(election["start_time"].replace("Z", "")).replace(tzinfo=None)
-        end = datetime.fromisoformat(election["end_time"].replace("Z", "")).replace(tzinfo=None)
-        now = datetime.now()
-
-        if now < start:
-            flash("This election has not started yet.", "error")
-            return redirect(url_for("vote"))
-        
-        if now > end:
-            flash("This election has ended.", "error")
-            return redirect(url_for("vote"))
-
+        # Naive server time, matching how the vote page classifies elections
+        outcome = db.cast_vote(email, candidate_id, now=datetime.now(), bump_counter=vote_counter is None)
     except Exception as e:
-        flash("Invalid election or candidate.", "error")
+        print("CAST_VOTE ERROR:", e)
+        flash("Your vote could not be recorded. Please try again or contact admin.", "error")
         return redirect(url_for("vote"))
 
-    # Record vote
-    try:
-        supabase.table("votes").insert({"email": email, "candidate_id": candidate_id, "election_id": election_id}).execute()
-        supabase.rpc("increment_vote", {"cid": candidate_id}).execute()
-
+    if outcome == VOTE_OK:
+        if vote_counter:
+            vote_counter.add(candidate_id)
+        results_board.record_vote(candidate_id)
+        hero_stats_snapshot.mark_stale()
+        ballot_versions.bump(email)
         flash("Your vote was successfully recorded!", "success")
-    except Exception as e:
-        print("VOTE INSERT/RPC ERROR:", e)
-
-        # Here we fix the repeated error you complained about
+    elif outcome == VOTE_NOT_STARTED:
+        flash("This election has not started yet.", "error")
+    elif outcome == VOTE_ENDED:
+        flash("This election has ended.", "error")
+    elif outcome == VOTE_ALREADY_CAST:
+        # The page offered a vote that exists (e.g. cast on another host): refresh its ETag
+        ballot_versions.bump(email)
+        flash("You have already voted in this election.", "warning")
+    elif outcome == VOTE_NOT_FOUND:
+        flash("Invalid election or candidate.", "error")
+    else:
+        print("CAST_VOTE UNEXPECTED OUTCOME:", outcome)
         flash("Your vote could not be recorded. Please try again or contact admin.", "error")
 
     return redirect(url_for("vote"))
@@ -663,44 +953,57 @@ def submit_vote(candidate_id):
 @app.route('/results')
 def results():
     """Displays the current election results."""
-    # Group results by election
+    # Closed elections come from frozen snapshots; only live tallies touch the database
     results_by_election = []
-    
+    board_digest = None
     try:
-        elections = supabase.table("elections").select("*").order("start_time", desc=True).execute().data
-        all_candidates = supabase.table("candidates").select("*").execute().data
-        
-        # Build map
-        cand_map = {}
-        for c in all_candidates:
-            eid = c["election_id"]
-            if eid not in cand_map:
-                cand_map[eid] = []
-            cand_map[eid].append(c)
-
-        for e in elections:
-            cands = cand_map.get(e["id"], [])
-            # Sort candidates by votes
-            cands = sorted(cands, key=lambda x: x.get('votes', 0) or 0, reverse=True)
-            
-            results_by_election.append({
-                "election": e,
-                "candidates": cands
-            })
-            
+        # Freezes/refreshes if due, so the digests below are current
+        board_digest = results_board.current_digest()
     except Exception as e:
         print(f"RESULTS LOAD ERROR: {e}")
         flash("Unable to load results.", "error")
 
+    # Registered total from the shared home page snapshot instead of a count query
+    total_registered = hero_stats_snapshot.get()["hero_stats"]["total_registered"]
 
-    total_registered = 0
+    def render():
+        try:
+            results_by_election = results_board.results()
+        except Exception as e:
+            print(f"RESULTS LOAD ERROR: {e}")
+            results_by_election = []
+        return render_template('results.html', results_by_election=results_by_election, total_registered=total_registered)
+
+    return versioned_page(("elections", "candidates", "profiles"), render, board_digest)
+
+
+@app.route("/results/stream")
+def results_stream():
+    """Server-Sent Events feed of live tally changes for results.html (home.html polls /results/live)."""
     try:
-        # Get total registered users for percentage calculation
-        total_registered = supabase.table("profiles").select("id", count="exact").execute().count
-    except Exception:
-        total_registered = 0
+        last_seq = int(request.headers.get("Last-Event-ID", 0))
+    except ValueError:
+        last_seq = 0
+    if not results_broadcaster.try_acquire():
+        return jsonify({"error": "Too many live viewers; poll /results/live instead."}), 503, {"Retry-After": "30"}
+    response = Response(
+        stream_with_context(results_broadcaster.stream(last_seq)),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    # Runs when the server closes the response: finished, disconnected, or never started
+    response.call_on_close(results_broadcaster.release)
+    return response
 
-    return render_template('results.html', results_by_election=results_by_election, total_registered=total_registered)
+
+@app.route("/results/live")
+def results_live():
+    """Current live tallies as JSON, for clients that cannot hold a stream open."""
+    try:
+        return jsonify(results_broadcaster.snapshot())
+    except Exception as e:
+        print(f"[LIVE_RESULTS] Snapshot failed: {e}")
+        return jsonify({"error": "Unable to load results."}), 500
 
 
 @app.route("/admin", methods=["GET", "POST"])
@@ -747,13 +1050,9 @@ def admin_dashboard():
                         return lst[idx].strip() if idx < len(lst) else ""
 
                     # Handle Photo Upload
-                    photo_url = f"https://placehold.co/150x150/003049/ffffff?text={name[:2].upper()}"
+                    photo_url = avatar_url(name)
                     if i < len(candidate_photos_files):
-                        file = candidate_photos_files[i]
-                        if file and file.filename:
-                            filename = secure_filename(f"{int(time.time())}_{file.filename}")
-                            file.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
-                            photo_url = url_for('static', filename=f'uploads/{filename}')
+                        photo_url = handle_photo_upload(candidate_photos_files[i], name, existing_photo=photo_url)
 
                     candidates_list.append({
                         "name": name,
@@ -770,13 +1069,8 @@ def admin_dashboard():
                 return redirect(url_for("admin_dashboard"))
 
             try:
-                supabase.rpc("create_election_with_candidates", {
-                    "title": title,
-                    "description": description,
-                    "start_time": start_input, 
-                    "end_time": end_input,
-                    "candidates_json": candidates_list
-                }).execute()
+                db.create_election_with_candidates(title, description, start_input, end_input, candidates_list)
+                elections_changed()
                 flash("Election and Candidates created successfully!", "success")
             except Exception as e:
                 flash(f"Error creating election: {str(e)}", "error")
@@ -792,12 +1086,12 @@ def admin_dashboard():
             
             try:
                 # 1. Update Election Details
-                supabase.table("elections").update({
+                db.update_election(eid, {
                     "title": title,
                     "description": request.form.get("description", ""),
                     "start_time": start_input,
                     "end_time": end_input
-                }).eq("id", eid).execute()
+                })
 
                 # 2. Update Candidates (Batch or Loop)
                 # We expect lists of data from the dynamic form
@@ -824,15 +1118,17 @@ def admin_dashboard():
                         key = f"edit_candidate_photo_{cid}"
                         photo = request.files.get(key)
                         if photo and photo.filename:
-                             new_url = handle_photo_upload(photo)
+                             new_url = handle_photo_upload(photo, update_data["name"])
                              if new_url:
                                  update_data['photo'] = new_url
 
-                        supabase.table("candidates").update(update_data).eq("id", cid).execute()
+                        db.update_candidate(cid, update_data)
 
                 flash("Election and candidates updated successfully!", "success")
             except Exception as e:
                 flash(f"Error updating election: {e}", "error")
+            # Invalidate even after a partial failure: some rows may have changed
+            elections_changed()
             return redirect(url_for("admin_dashboard"))
 
         # 3. DELETE ELECTION
@@ -840,7 +1136,10 @@ def admin_dashboard():
             eid = request.form.get("election_id")
             try:
                 # Due to CASCADE in DB, this deletes candidates and votes too
-                supabase.table("elections").delete().eq("id", eid).execute()
+                db.delete_election(eid)
+                tally_reconciler.request_recount()
+                elections_changed()
+                hero_stats_snapshot.mark_stale()
                 flash("Election deleted successfully.", "success")
             except Exception as e:
                 flash(f"Error deleting election: {e}", "error")
@@ -852,14 +1151,15 @@ def admin_dashboard():
              try:
                 name = request.form["name"]
                 eid = request.form["election_id"]
-                photo = f"https://placehold.co/150x150/003049/ffffff?text={name[:2].upper()}"
-                supabase.table("candidates").insert({
+                photo = avatar_url(name)
+                db.create_candidate({
                     "election_id": eid,
                     "name": name,
                     "motto": request.form.get("motto", ""),
                     "votes": 0,
                     "photo": photo
-                }).execute()
+                })
+                elections_changed()
                 flash("Candidate added!", "success")
              except Exception as e:
                 flash(f"Error: {str(e)}", "error")
@@ -870,75 +1170,38 @@ def admin_dashboard():
     # GET REQUEST — Dashboard Data
     # =====================================================
 
-    elections_data = (
-        supabase.table("elections")
-        .select("*")
-        .order("start_time", desc=True)
-        .execute()
-        .data or []
-    )
-
     now = datetime.now()
 
-    # Process statuses locally for display
-    for e in elections_data:
-        try:
-            start_dt = datetime.fromisoformat(e["start_time"].replace("Z", "")).replace(tzinfo=None)
-            end_dt = datetime.fromisoformat(e["end_time"].replace("Z", "")).replace(tzinfo=None)
-
-            if now < start_dt:
-                status = "Upcoming"
-            elif start_dt <= now <= end_dt:
-                status = "Active"
-            else:
-                status = "Closed"
-            
-            e["status"] = status
-            e["start_dt_obj"] = start_dt # Keep obj for editing if needed
-            e["end_dt_obj"] = end_dt
-            e["start_time_display"] = start_dt.strftime("%d %b %Y, %I:%M %p")
-            e["end_time_display"] = end_dt.strftime("%d %b %Y, %I:%M %p")
-        except:
-            e["status"] = "Error"
+    # Votes, profiles and the registry are loaded page by page from the
+    # /admin/api/* endpoints; the initial render only carries counts.
+    # All of these reads are independent, so they run concurrently.
+    with query_executor.batch() as batch:
+        catalog_query = batch.submit(election_catalog.snapshot)
+        count_queries = {
+            "votes": batch.submit(db.count_votes, label="count votes", default=0),
+            "profiles": batch.submit(db.count_profiles, label="count profiles", default=0),
+            "unverified": batch.submit(
+                db.count_rows, "profiles", {"verified": False}, label="count unverified", default=0
+            ),
+            "registry": batch.submit(db.count_rows, "student_registry", label="count registry", default=0),
+        }
+        registration_query = batch.submit(is_registration_open)
+    catalog_query.result()
+
+    # Statuses come from the pre-parsed catalog; copies so the shared entries stay untouched
+    elections_data = [
+        dict(e, status=election_catalog.status_of(e, now)) for e in election_catalog.elections()
+    ]
 
     # Active & Upcoming for Candidate Dropdown
     active_elections = [x for x in elections_data if x["status"] in ["Active", "Upcoming"]]
     
-    candidates = supabase.table("candidates").select("*, elections(title)").execute().data or []
+    candidates = election_catalog.candidates()
     
-    # Votes for display
-    votes = supabase.table("votes").select("*").execute().data or []
-    cand_map = {c["id"]: c["name"] for c in candidates}
-    elec_map = {e["id"]: e["title"] for e in elections_data}
-
-    voters_list = []
-    for v in votes:
-        vt = v.get("voted_at", "")
-        formatted = vt
-        try:
-             formatted = datetime.fromisoformat(vt.replace("Z", "")).strftime("%d %b, %I:%M %p")
-        except: pass
-        
-        voters_list.append({
-            "user_email": v.get("email"),
-            "candidate_name": cand_map.get(v.get("candidate_id"), "Unknown"),
-            "election_title": elec_map.get(v.get("election_id"), "Unknown"),
-            "voted_at": formatted
-        })
-
-    profiles = supabase.table("profiles").select("*").execute().data or []
-    unverified_count = sum(1 for p in profiles if not p.get("verified"))
-    
-    # Fetch student registry (whitelist)
-    student_registry = supabase.table("student_registry").select("*").order("created_at", desc=True).execute().data or []
+    summary = {key: query.result() for key, query in count_queries.items()}
 
     # Fetch global settings
-    registration_open = True
-    try:
-        sett = supabase.table("settings").select("registration_open").eq("id", 1).single().execute().data
-        if sett:
-            registration_open = sett.get("registration_open", True)
-    except: pass
+    registration_open = registration_query.result()
 
     return render_template(
         "admin_dashboard.html",
@@ -946,15 +1209,216 @@ def admin_dashboard():
         all_elections=elections_data,
         active_elections=active_elections,  # Pass active elections for counter
         candidates=candidates,
-        voters=voters_list,
-        profiles=profiles,
-        student_registry=student_registry,  # Pass registry data
-        unverified_count=unverified_count,
+        summary=summary,
+        unverified_count=summary["unverified"],
         registration_open=registration_open,
         election_status=get_election_status  # Pass the function to template
     )
 
 
+# -------------------- ADMIN DATA API (paginated) --------------------
+ADMIN_PAGE_DEFAULT_SORT = {"votes": "voted_at", "profiles": "created_at", "student_registry": "created_at"}
+ADMIN_PAGE_SIZE = 50
+ADMIN_PAGE_MAX_SIZE = 200
+
+
+def encode_cursor(row, sort):
+    """Opaque keyset cursor: the (sort value, id) of the last row on a page."""
+    raw = json.dumps([row.get(sort), row["id"]], default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(token):
+    try:
+        value, last_id = json.loads(base64.urlsafe_b64decode(token.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    return value, last_id
+
+
+def parse_filter_value(kind, raw):
+    if kind is bool:
+        return raw.lower() in ("1", "true", "yes")
+    return kind(raw)
+
+
+def admin_page(table, present=None):
+    """Serve one keyset page of ``table`` as JSON using the request's query args.
+
+    Args: ``limit``, ``cursor`` (from the previous ``next_cursor``), ``sort``,
+    ``order`` (asc/desc), ``q`` (search) and the table's equality filters.
+    """
+    if 'user' not in session or session['user'] != "admin@gsu.edu":
+        return jsonify({"error": "Admin access only."}), 403
+
+    args = request.args
+    sort = args.get("sort", ADMIN_PAGE_DEFAULT_SORT[table])
+    descending = args.get("order", "desc").lower() != "asc"
+    try:
+        limit = min(max(int(args.get("limit", ADMIN_PAGE_SIZE)), 1), ADMIN_PAGE_MAX_SIZE)
+        filters = {
+            column: parse_filter_value(kind, args[column])
+            for column, kind in PAGE_FILTER_COLUMNS[table].items()
+            if args.get(column, "") != ""
+        }
+        after = decode_cursor(args["cursor"]) if args.get("cursor") else None
+        rows = db.page_rows(
+            table, sort=sort, descending=descending, after=after, limit=limit,
+            filters=filters, search=args.get("q", "").strip() or None,
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print(f"ADMIN PAGE ERROR ({table}): {e}")
+        return jsonify({"error": "Could not load data."}), 500
+
+    next_cursor = encode_cursor(rows[-1], sort) if len(rows) == limit else None
+    return jsonify({
+        "rows": [present(r) for r in rows] if present else rows,
+        "next_cursor": next_cursor,
+    })
+
+
+def present_vote(v):
+    """Vote row with candidate/election names (from the catalog) and a display time."""
+    vt = v.get("voted_at") or ""
+    formatted = vt
+    try:
+        formatted = datetime.fromisoformat(vt.replace("Z", "")).strftime("%d %b, %I:%M %p")
+    except Exception:
+        pass
+    candidate = election_catalog.candidate(v.get("candidate_id"))
+    election = election_catalog.election(v.get("election_id"))
+    return {
+        "id": v.get("id"),
+        "user_email": v.get("email"),
+        "candidate_name": candidate["name"] if candidate else "Unknown",
+        "election_title": election["title"] if election else "Unknown",
+        "voted_at": formatted,
+    }
+
+
+@app.route("/admin/api/votes")
+def admin_api_votes():
+    """Paginated votes for the admin dashboard."""
+    return admin_page("votes", present_vote)
+
+
+@app.route("/admin/api/profiles")
+def admin_api_profiles():
+    """Paginated student profiles for the admin dashboard."""
+    return admin_page("profiles")
+
+
+@app.route("/admin/api/registry")
+def admin_api_registry():
+    """Paginated student registry (whitelist) for the admin dashboard."""
+    return admin_page("student_registry")
+
+
+# -------------------- ADMIN EXPORTS (streamed CSV/XLSX) --------------------
+def export_vote(v):
+    """Vote row with candidate/election names from the catalog, like the votes log."""
+    candidate = election_catalog.candidate(v.get("candidate_id"))
+    election = election_catalog.election(v.get("election_id"))
+    return dict(
+        v,
+        candidate_name=candidate["name"] if candidate else "Unknown",
+        election_title=election["title"] if election else "Unknown",
+    )
+
+
+def export_flag(column):
+    return lambda row: dict(row, **{column: bool(row.get(column))})
+
+
+# dataset -> (table, columns as (key, header), row presenter)
+EXPORT_TABLES = {
+    "votes": ("votes", [
+        ("id", "Vote ID"), ("email", "Voter"), ("candidate_name", "Candidate"),
+        ("election_title", "Election"), ("voted_at", "Voted at"),
+    ], export_vote),
+    "profiles": ("profiles", [
+        ("email", "Email"), ("name", "Name"), ("faculty", "Faculty"), ("university_id", "University ID"),
+        ("phone", "Phone"), ("verified", "Verified"), ("created_at", "Registered at"),
+    ], export_flag("verified")),
+    "registry": ("student_registry", [
+        ("university_id", "University ID"), ("full_name", "Full name"), ("phone", "Phone"),
+        ("is_registered", "Registered"), ("created_at", "Imported at"),
+    ], export_flag("is_registered")),
+}
+EXPORT_RESULTS_COLUMNS = [
+    ("election_id", "Election ID"), ("election_title", "Election"), ("status", "Status"), ("rank", "Rank"),
+    ("candidate_name", "Candidate"), ("votes", "Votes"), ("share", "Share (%)"),
+]
+
+
+def export_result_rows(election_id=None):
+    """One row per candidate of every (or one) election, ranked as on the results page."""
+    for view in results_board.results():
+        election = view["election"]
+        if election_id is not None and election["id"] != election_id:
+            continue
+        total = view["total_votes"]
+        for rank, c in enumerate(view["candidates"], start=1):
+            yield {
+                "election_id": election["id"],
+                "election_title": election.get("title"),
+                "status": "Final" if view["frozen"] else get_election_status(election),
+                "rank": rank,
+                "candidate_name": c.get("name"),
+                "votes": c["votes"],
+                "share": round(c["votes"] * 100 / total, 2) if total else 0.0,
+            }
+
+
+def logged_rows(dataset, rows):
+    """Pass rows through; a backend failure mid-stream is logged and cuts the download short."""
+    count = 0
+    try:
+        for row in rows:
+            count += 1
+            yield row
+    except Exception as e:
+        print(f"[EXPORT] {dataset} export failed after {count} rows: {e}")
+        raise
+    print(f"[EXPORT] {dataset}: {count} rows")
+
+
+@app.route("/admin/export/<dataset>.<any(csv, xlsx):fmt>")
+def admin_export(dataset, fmt):
+    """Stream a whole table (or the results) as CSV/XLSX, page by page; honours the table's filters."""
+    if 'user' not in session or session['user'] != "admin@gsu.edu":
+        flash("Admin access only.", "error")
+        return redirect(url_for("login"))
+
+    try:
+        if dataset == "results":
+            election_id = request.args.get("election_id", "")
+            columns = EXPORT_RESULTS_COLUMNS
+            rows = export_result_rows(int(election_id) if election_id else None)
+        elif dataset in EXPORT_TABLES:
+            table, columns, present = EXPORT_TABLES[dataset]
+            filters = {
+                column: parse_filter_value(kind, request.args[column])
+                for column, kind in PAGE_FILTER_COLUMNS[table].items()
+                if request.args.get(column, "") != ""
+            }
+            rows = map(present, db.iter_rows(table, batch_size=EXPORT_BATCH_SIZE, filters=filters))
+        else:
+            return "Unknown export.", 404
+    except ValueError as e:
+        return f"Invalid filter: {e}", 400
+
+    filename = f"{dataset}-{datetime.now().strftime('%Y%m%d-%H%M')}.{fmt}"
+    body = stream_export(fmt, columns, logged_rows(dataset, rows), sheet_name=dataset.capitalize())
+    return Response(stream_with_context(body), content_type=EXPORT_MIMETYPES[fmt], headers={
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "Cache-Control": "no-store",
+        # Let proxies pass chunks through as they are produced
+        "X-Accel-Buffering": "no",
+    })
+
 
 # ======================================================================
 # 2. NEW ROUTES FOR USER MANAGEMENT (Ku dar qeybtan hoose faylkaaga)
@@ -977,11 +1441,10 @@ def bulk_verify_users():
         return redirect(url_for('admin_dashboard'))
 
     try:
-        # Supabase update: Update 'verified' to True for all emails in the list
-        response = supabase.table("profiles") \
-            .update({"verified": True}) \
-            .in_("email", selected_emails) \
-            .execute()
+        # Update 'verified' to True for all emails in the list
+        db.verify_profiles(selected_emails)
+        for selected in selected_emails:
+            verified_cache.set(selected, True)
             
         flash(f'{len(selected_emails)} users have been verified successfully.', 'success')
         
@@ -1008,15 +1471,16 @@ def delete_user():
         return redirect(url_for('admin_dashboard'))
 
     try:
-        # Delete from all related tables
-        # 1. Delete votes
-        supabase.table("votes").delete().eq("email", email).execute()
-        
-        # 2. Delete from profiles
-        supabase.table("profiles").delete().eq("email", email).execute()
-        
-        # 3. Mark as unregistered in student_registry (don't delete the whitelist entry)
-        supabase.table("student_registry").update({"is_registered": False}).eq("email", email).execute()
+        # Delete votes and profile, and mark the student_registry entry as
+        # unregistered (the whitelist entry itself is kept)
+        released_id = db.delete_user(email)
+        tally_reconciler.request_recount()
+        if registry_index and released_id:
+            registry_index.set_registered(released_id, False)
+            registry_index.mark_changed()
+        verified_cache.invalidate(email)
+        hero_stats_snapshot.mark_stale()
+        ballot_versions.bump(email)
         
         flash(f'User {email} deleted successfully from all records.', 'success')
     except Exception as e:
@@ -1025,6 +1489,52 @@ def delete_user():
 
     return redirect(url_for('admin_dashboard'))
 
+@app.route('/admin/cache-stats')
+def cache_stats():
+    """Hit/miss counters for the in-process caches (admin only)."""
+    if 'user' not in session or session['user'] != "admin@gsu.edu":
+        return jsonify({"error": "Admin access only."}), 403
+    stats = {"verified_users": verified_cache.stats()}
+    if vote_counter:
+        stats["vote_counter"] = vote_counter.stats()
+    if registry_index:
+        stats["registry_index"] = registry_index.stats()
+    stats["results"] = results_board.stats()
+    stats["live_results"] = results_broadcaster.stats()
+    stats["pages"] = page_cache.stats()
+    stats["query_fanout"] = query_executor.stats()
+    stats["avatars"] = avatar_cache.stats()
+    stats["static_assets"] = asset_manifest.stats()
+    stats["data_versions"] = data_version.stats()
+    if status_scheduler:
+        stats["election_scheduler"] = status_scheduler.stats()
+    if trace_recorder:
+        stats["trace_recorder"] = trace_recorder.stats()
+    stats["tally"] = tally_reconciler.stats()
+    return jsonify(stats)
+
+
+@app.route('/admin/tally', methods=['GET', 'POST'])
+def tally_reconciliation():
+    """Counter/ballot audit status; POST runs it now (``repair=1`` also fixes confirmed mismatches)."""
+    if 'user' not in session or session['user'] != "admin@gsu.edu":
+        return jsonify({"error": "Admin access only."}), 403
+    report = None
+    if request.method == "POST":
+        repair = request.values.get("repair", "").lower() in ("1", "true", "yes")
+        try:
+            report = tally_reconciler.run_once(repair=repair)
+        except NotLeaderError as e:
+            return jsonify({"error": f"Not run here: {e}. Retry, or wait for its next interval."}), 409
+        except Exception as e:
+            return jsonify({"error": f"Reconciliation failed: {e}"}), 500
+    stats, mismatches, last_report = tally_reconciler.status()
+    return jsonify({
+        "stats": stats,
+        "mismatches": mismatches,
+        "last_run": report or last_report,
+    })
+
 # -------------------- REGISTRY MANAGEMENT --------------------
 @app.route("/admin/registry/delete/<registry_id>", methods=["POST"])
 def delete_registry_entry(registry_id):
@@ -1033,7 +1543,10 @@ def delete_registry_entry(registry_id):
         return redirect(url_for("login"))
     
     try:
-        supabase.table("student_registry").delete().eq("id", registry_id).execute()
+        db.delete_registry_entry(registry_id)
+        if registry_index:
+            registry_index.remove(registry_id)
+            registry_index.mark_changed()
         flash("Registry entry deleted successfully.", "success")
     except Exception as e:
         flash(f"Error deleting registry entry: {e}", "error")
@@ -1051,11 +1564,14 @@ def edit_registry_entry(registry_id):
         full_name = request.form.get("full_name", "").strip()
         phone = request.form.get("phone", "").strip()
         
-        supabase.table("student_registry").update({
+        db.update_registry_entry(registry_id, {
             "university_id": university_id,
             "full_name": full_name,
             "phone": phone
-        }).eq("id", registry_id).execute()
+        })
+        if registry_index:
+            registry_index.update(registry_id, university_id, phone)
+            registry_index.mark_changed()
         
         flash("Registry entry updated successfully.", "success")
     except Exception as e:
@@ -1071,9 +1587,11 @@ def delete_candidate(candidate_id):
         flash("Admin access only.", "error")
         return redirect(url_for("login"))
     try:
-        # Also delete associated votes (optional, depending on DB cascading rules)
-        supabase.table("votes").delete().eq("candidate_id", candidate_id).execute()
-        supabase.table("candidates").delete().eq("id", candidate_id).execute()
+        # Also deletes associated votes
+        db.delete_candidate(candidate_id)
+        tally_reconciler.request_recount()
+        elections_changed()
+        hero_stats_snapshot.mark_stale()
         flash("Candidate and associated votes deleted successfully!", "success")
     except Exception as e:
         flash(f"Could not delete candidate: {str(e)}", "error")
@@ -1101,8 +1619,9 @@ def edit_candidate(candidate_id):
     # Handle photo upload or keep the existing one
     new_photo_url = handle_photo_upload(file, name, existing_photo=current_photo_url)
     
-    if not new_photo_url:
-        new_photo_url = f"https://placehold.co/150x150/003049/ffffff?text={name[0:2].upper()}"
+    if is_placeholder(new_photo_url):
+        # Initials follow the (possibly edited) name
+        new_photo_url = avatar_url(name)
 
     update_data = {
         "name": name,
@@ -1116,7 +1635,8 @@ def edit_candidate(candidate_id):
 
     try:
         print(f"[EDIT_CANDIDATE] Updating candidate {candidate_id} with:", update_data)
-        supabase.table("candidates").update(update_data).eq("id", candidate_id).execute()
+        db.update_candidate(candidate_id, update_data)
+        elections_changed()
         flash("Candidate updated successfully!", "success")
     except Exception as e:
         flash(f"Could not update candidate: {str(e)}", "error")
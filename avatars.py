@@ -0,0 +1,78 @@
+"""Initials avatars for candidates without a photo, rendered locally as SVG.
+
+Replaces the per-candidate ``placehold.co`` URLs: the image is generated by
+our own ``/avatars/...`` route, so it works when the venue network blocks
+third-party hosts, and its URL fully determines its content (initials,
+colour, size), so browsers may cache it for good.
+"""
+import re
+import zlib
+from xml.sax.saxutils import escape
+
+from photos import photo_variant
+
+# First entry is the colour the old placehold.co placeholders used
+PALETTE = ("003049", "1d4ed8", "0f766e", "7c3aed", "b45309", "be123c", "15803d", "0369a1")
+DEFAULT_SIZE = 192
+MIN_SIZE, MAX_SIZE = 16, 512
+LEGACY_PLACEHOLDER_HOST = "placehold.co"
+AVATAR_PATH = "/avatars/"
+
+UNKNOWN_INITIALS = "?"  # percent-encoded by url_for, unlike "/" it cannot split the path
+
+_COLOUR = re.compile(r"^[0-9a-fA-F]{6}$")
+
+
+def initials_for(name):
+    """Up to two upper-case initials: first letters of the first two words, or of a single word.
+
+    Only letters and digits count ("A/B" gives "AB"), so the initials are a
+    single, unambiguous URL path segment.
+    """
+    words = ["".join(ch for ch in w if ch.isalnum()) for w in re.split(r"\s+", name or "")]
+    words = [w for w in words if w]
+    if not words:
+        return UNKNOWN_INITIALS
+    if len(words) == 1:
+        return words[0][:2].upper()[:3]
+    return (words[0][0] + words[1][0]).upper()[:3]
+
+
+def colour_for(name):
+    """A palette colour that stays the same for the same name."""
+    return PALETTE[zlib.crc32((name or "").encode("utf-8")) % len(PALETTE)]
+
+
+def valid_avatar_args(initials, colour, size):
+    return (
+        (initials == UNKNOWN_INITIALS or (0 < len(initials) <= 3 and initials.isalnum()))
+        and bool(_COLOUR.match(colour))
+        and MIN_SIZE <= size <= MAX_SIZE
+    )
+
+
+def render_svg(initials, colour, size):
+    """A ``size`` px square SVG: white initials centred on a ``colour`` background."""
+    font_size = round(size * (0.42 if len(initials) < 3 else 0.34))
+    text = escape(initials, {'"': "&quot;"})
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{size}" height="{size}" '
+        f'viewBox="0 0 {size} {size}" role="img" aria-label="{text}">'
+        f'<rect width="100%" height="100%" fill="#{colour.lower()}"/>'
+        f'<text x="50%" y="50%" dy=".35em" text-anchor="middle" fill="#ffffff" '
+        f'font-family="Helvetica, Arial, sans-serif" font-weight="600" font-size="{font_size}">'
+        f"{text}</text></svg>"
+    )
+
+
+def is_placeholder(photo):
+    """True when a stored photo URL is not a real photo (empty, an avatar or an old placehold.co URL)."""
+    return not photo or AVATAR_PATH in photo or LEGACY_PLACEHOLDER_HOST in photo
+
+
+def candidate_image(photo, name, avatar_url, variant="thumb", fmt="jpg"):
+    """URL to show for a candidate: a photo variant, or ``avatar_url(name)`` if there is no real photo."""
+    if is_placeholder(photo):
+        # Always from the current name, so renamed candidates get new initials
+        return avatar_url(name)
+    return photo_variant(photo, variant, fmt)
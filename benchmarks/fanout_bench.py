@@ -0,0 +1,111 @@
+"""Latency of /, /admin and /vote with their backend reads run one by one vs. concurrently.
+
+    python -m benchmarks.fanout_bench --requests 30 --latency-ms 20
+
+The app runs on an in-memory SQLite database wrapped in a ``LatencyRepository``
+(one simulated round trip per backend call). Every in-process cache is
+cleared before each request, so each one pays for all of its reads: the
+worst case, seen after a TTL expiry or an admin edit. "sequential" disables the
+query executor (``QUERY_FANOUT_MAX_IN_FLIGHT=0``), "concurrent" uses the
+configured pool.
+"""
+import argparse
+import os
+import statistics
+import time
+from datetime import datetime, timedelta
+
+os.environ.update(
+    DATA_BACKEND="sqlite",
+    SQLITE_PATH=":memory:",
+    LOCAL_ADMIN_PASSWORD=os.getenv("LOCAL_ADMIN_PASSWORD", "benchmark"),
+    ELECTION_SCHEDULER_ENABLED="false",
+    REGISTRY_INDEX_ENABLED="false",
+)
+
+import repository  # noqa: E402
+from benchmarks.latency import LatencyRepository  # noqa: E402
+from fanout import QueryExecutor  # noqa: E402
+
+ROUTES = (("home", "/", None), ("admin_dashboard", "/admin", "admin@gsu.edu"), ("vote", "/vote", "voter@x.edu"))
+
+
+def load_app(latency):
+    """Import app.py with its repository wrapped in a LatencyRepository."""
+    create = repository.create_repository
+    repository.create_repository = lambda *a, **kw: LatencyRepository(create(*a, **kw), latency)
+    try:
+        import app as appmod
+    finally:
+        repository.create_repository = create
+    return appmod
+
+
+def seed(appmod):
+    db = appmod.db
+    now = datetime.now()
+    for i in range(3):
+        db.create_election_with_candidates(
+            f"Election {i}", "",
+            (now - timedelta(hours=1)).isoformat(timespec="seconds"),
+            (now + timedelta(hours=1 + i)).isoformat(timespec="seconds"),
+            [{"name": f"Candidate {i}.{j}"} for j in range(4)],
+        )
+    db.create_profile({
+        "email": "voter@x.edu", "name": "Voter", "faculty": "IT",
+        "university_id": "U1", "phone": "P1", "verified": True,
+    })
+
+
+def clear_caches(appmod):
+    appmod.settings_cache.invalidate()
+    appmod.hero_stats_snapshot.invalidate()
+    appmod.election_catalog.invalidate()
+    appmod.verified_cache.clear()
+    appmod.page_cache.clear()
+    appmod.results_board.invalidate()
+
+
+def use_executor(appmod, executor):
+    appmod.query_executor = executor
+    appmod.election_catalog.executor = executor
+
+
+def measure(appmod, path, user, requests):
+    client = appmod.app.test_client()
+    if user:
+        with client.session_transaction() as s:
+            s["user"] = user
+    timings, calls = [], []
+    for _ in range(requests):
+        clear_caches(appmod)
+        before = appmod.db.calls
+        started = time.perf_counter()
+        response = client.get(path)
+        timings.append((time.perf_counter() - started) * 1000)
+        calls.append(appmod.db.calls - before)
+        assert response.status_code == 200, (path, response.status_code)
+    return statistics.median(timings), max(timings), statistics.mean(calls)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=30)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--in-flight", type=int, default=8, help="pool size for the concurrent run")
+    args = parser.parse_args()
+
+    appmod = load_app(args.latency_ms / 1000)
+    seed(appmod)
+    print(f"{args.requests} requests per route, {args.latency_ms:.0f} ms per backend call, caches cleared\n")
+    print(f"{'route':16s} {'mode':11s} {'p50 ms':>8s} {'max ms':>8s} {'calls':>6s}")
+    for name, path, user in ROUTES:
+        for mode, executor in (("sequential", QueryExecutor(0)), ("concurrent", QueryExecutor(args.in_flight))):
+            use_executor(appmod, executor)
+            p50, worst, calls = measure(appmod, path, user, args.requests)
+            print(f"{name:16s} {mode:11s} {p50:8.1f} {worst:8.1f} {calls:6.1f}")
+            executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
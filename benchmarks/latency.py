@@ -0,0 +1,32 @@
+"""Repository proxy that adds a fixed delay to every backend call.
+
+Wrapping the local SQLite backend in ``LatencyRepository`` approximates a
+remote database: each method call costs one simulated network round trip, so
+route-level changes that save calls show up in wall-clock numbers.
+"""
+import threading
+import time
+
+
+class LatencyRepository:
+    """Delegates to ``repository`` and sleeps ``latency`` seconds before each method call."""
+
+    def __init__(self, repository, latency=0.02):
+        self._repository = repository
+        self._latency = latency
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def __getattr__(self, name):
+        attr = getattr(self._repository, name)
+        if not callable(attr) or name.startswith("_"):
+            return attr
+
+        def call(*args, **kwargs):
+            with self._lock:
+                self.calls += 1
+            if self._latency:
+                time.sleep(self._latency)
+            return attr(*args, **kwargs)
+
+        return call
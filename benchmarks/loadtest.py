@@ -0,0 +1,229 @@
+"""Election-day load test: a burst of voters registering, logging in, voting and checking results.
+
+    python -m benchmarks.loadtest --voters 200 --concurrency 16 --latency-ms 20
+    python -m benchmarks.loadtest --compare benchmarks/results/loadtest-<previous>.json
+
+The app runs on an in-memory SQLite database wrapped in a ``LatencyRepository``
+(one simulated round trip per backend call), seeded with one open election
+and a student registry. Every simulated voter has its own client and session
+and goes through the phases below; all voters finish a phase before the next
+one starts, so each phase is a burst against one route:
+
+    home      GET  /
+    register  POST /register
+    login     POST /login
+    ballot    GET  /vote
+    cast      POST /vote/<candidate_id>
+    results   GET  /results
+
+For each phase it reports throughput, p50/p95/p99 latency and backend calls
+per request (calls made during the phase / requests in it, so queries the
+route fans out to other threads are counted too). The numbers are written to
+``<output>/loadtest-<timestamp>.json`` and ``.csv``; ``--compare`` prints the
+change against an earlier JSON file.
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from benchmarks.fanout_bench import load_app
+from repository import sqlite_backend
+
+PASSWORD = "loadtest-password"
+PHASE_COLUMNS = (
+    "phase", "route", "requests", "errors", "seconds", "throughput_rps",
+    "p50_ms", "p95_ms", "p99_ms", "max_ms", "backend_calls_per_request",
+)
+
+
+class Voter:
+    """One student: registry entry, own test client (cookie jar) and the candidate they vote for."""
+
+    def __init__(self, appmod, index, candidate_id):
+        self.index = index
+        self.email = f"voter{index}@loadtest.edu"
+        self.university_id = f"LT{index:06d}"
+        self.phone = f"555{index:07d}"
+        self.candidate_id = candidate_id
+        self.client = appmod.app.test_client()
+
+    def home(self):
+        return self.client.get("/"), 200
+
+    def register(self):
+        return self.client.post("/register", data={
+            "full_name": f"Voter {self.index}", "username": f"voter{self.index}",
+            "university_id": self.university_id, "phone": self.phone, "faculty": "IT",
+            "semester": "1", "email": self.email, "password": PASSWORD,
+        }), 302
+
+    def login(self):
+        return self.client.post("/login", data={"email": self.email, "password": PASSWORD}), 302
+
+    def ballot(self):
+        return self.client.get("/vote"), 200
+
+    def cast(self):
+        return self.client.post(f"/vote/{self.candidate_id}"), 302
+
+    def results(self):
+        return self.client.get("/results"), 200
+
+
+PHASES = (
+    ("home", "GET /", Voter.home),
+    ("register", "POST /register", Voter.register),
+    ("login", "POST /login", Voter.login),
+    ("ballot", "GET /vote", Voter.ballot),
+    ("cast", "POST /vote/<candidate_id>", Voter.cast),
+    ("results", "GET /results", Voter.results),
+)
+
+
+def seed(appmod, voters, candidates):
+    """One election open for the next hour and a registry entry per voter; returns the candidate ids."""
+    db = appmod.db
+    now = datetime.now()
+    db.create_election_with_candidates(
+        "Load test election", "",
+        (now - timedelta(minutes=5)).isoformat(timespec="seconds"),
+        (now + timedelta(hours=1)).isoformat(timespec="seconds"),
+        [{"name": f"Candidate {i}"} for i in range(candidates)],
+    )
+    db.insert_registry_entries([
+        {"university_id": f"LT{i:06d}", "full_name": f"Voter {i}", "phone": f"555{i:07d}"} for i in range(voters)
+    ])
+    appmod.election_catalog.invalidate()
+    return [c["id"] for c in db.list_candidates(columns="id")]
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def run_phase(appmod, voters, name, route, action, concurrency):
+    def timed(voter):
+        started = time.perf_counter()
+        response, expected = action(voter)
+        elapsed = (time.perf_counter() - started) * 1000
+        ok = response.status_code == expected
+        response.close()
+        return elapsed, ok
+
+    calls_before = appmod.db.calls
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(timed, voters))
+    seconds = time.perf_counter() - started
+    calls = appmod.db.calls - calls_before
+
+    timings = sorted(t for t, _ in outcomes)
+    return {
+        "phase": name,
+        "route": route,
+        "requests": len(outcomes),
+        "errors": sum(1 for _, ok in outcomes if not ok),
+        "seconds": round(seconds, 3),
+        "throughput_rps": round(len(outcomes) / seconds, 1) if seconds else 0.0,
+        "p50_ms": round(percentile(timings, 50), 1),
+        "p95_ms": round(percentile(timings, 95), 1),
+        "p99_ms": round(percentile(timings, 99), 1),
+        "max_ms": round(timings[-1], 1) if timings else 0.0,
+        "backend_calls_per_request": round(calls / len(outcomes), 2) if outcomes else 0.0,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save(report, output_dir):
+    os.makedirs(output_dir, exist_ok=True)
+    base = os.path.join(output_dir, f"loadtest-{report['started_at'].replace(':', '').replace('-', '')}")
+    with open(base + ".json", "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+    with open(base + ".csv", "w", encoding="utf-8", newline="") as fh:
+        writer = csv.DictWriter(fh, fieldnames=PHASE_COLUMNS)
+        writer.writeheader()
+        writer.writerows(report["phases"])
+    return base
+
+
+def print_table(phases, baseline=None):
+    before = {p["phase"]: p for p in (baseline or {}).get("phases", [])}
+    print(f"{'phase':9s} {'req/s':>8s} {'p50 ms':>8s} {'p95 ms':>8s} {'p99 ms':>8s} {'calls':>6s} {'errors':>6s}")
+    for p in phases:
+        print(
+            f"{p['phase']:9s} {p['throughput_rps']:8.1f} {p['p50_ms']:8.1f} {p['p95_ms']:8.1f} "
+            f"{p['p99_ms']:8.1f} {p['backend_calls_per_request']:6.2f} {p['errors']:6d}"
+        )
+        old = before.get(p["phase"])
+        if old:
+            deltas = [
+                f"{key} {(p[key] - old[key]) / old[key] * 100:+.0f}%" if old[key] else f"{key} n/a"
+                for key in ("throughput_rps", "p95_ms", "backend_calls_per_request")
+            ]
+            print(f"{'':9s} vs baseline: {', '.join(deltas)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--voters", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16, help="requests in flight at once")
+    parser.add_argument("--candidates", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="simulated round trip per backend call")
+    parser.add_argument("--password-iterations", type=int, default=1000,
+                        help="local PBKDF2 rounds; Supabase does this work on its auth server")
+    parser.add_argument("--output", default=os.path.join("benchmarks", "results"),
+                        help="directory for the JSON/CSV results ('' to skip saving)")
+    parser.add_argument("--compare", help="earlier loadtest JSON to print changes against")
+    args = parser.parse_args()
+    sqlite_backend.PASSWORD_ITERATIONS = args.password_iterations
+
+    appmod = load_app(args.latency_ms / 1000)
+    candidate_ids = seed(appmod, args.voters, args.candidates)
+    voters = [Voter(appmod, i, candidate_ids[i % len(candidate_ids)]) for i in range(args.voters)]
+
+    report = {
+        "benchmark": "loadtest",
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "config": {
+            "voters": args.voters, "concurrency": args.concurrency, "candidates": args.candidates,
+            "latency_ms": args.latency_ms, "password_iterations": args.password_iterations,
+        },
+        "phases": [],
+    }
+    print(f"{args.voters} voters, {args.concurrency} in flight, {args.latency_ms:.0f} ms per backend call\n")
+    for name, route, action in PHASES:
+        report["phases"].append(run_phase(appmod, voters, name, route, action, args.concurrency))
+
+    recorded = appmod.db.count_votes()
+    report["votes_recorded"] = recorded
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+    print_table(report["phases"], baseline)
+    print(f"\n{recorded} of {args.voters} votes recorded")
+    if args.output:
+        print(f"Saved {save(report, args.output)}.json / .csv")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Registration throughput: the old five-call sequence vs. register_student + sign_up.
+
+    python -m benchmarks.register_bench --students 300 --workers 8 --latency-ms 20
+
+Runs both pipelines against fresh local SQLite databases wrapped in a
+``LatencyRepository`` (one simulated round trip per backend call). Local
+password hashing is turned down so the numbers reflect the round trips.
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.latency import LatencyRepository
+from repository import REGISTER_OK, SqliteRepository, sqlite_backend
+
+
+def make_db(students, latency):
+    repo = SqliteRepository(":memory:")
+    repo.insert_registry_entries([
+        {"university_id": f"U{i}", "full_name": f"Student {i}", "phone": f"P{i}"} for i in range(students)
+    ])
+    return LatencyRepository(repo, latency)
+
+
+def register_five_calls(db, i):
+    """The sequence register() used to run: check, check, sign up, insert, update."""
+    entry = db.find_registry_entry(f"U{i}", f"P{i}")
+    if not entry or entry.get("is_registered"):
+        return False
+    if db.profile_exists_for_university_id(f"U{i}"):
+        return False
+    db.sign_up(f"s{i}@x.edu", "password")
+    db.create_profile({
+        "email": f"s{i}@x.edu", "name": f"Student {i}", "faculty": "IT",
+        "university_id": f"U{i}", "phone": f"P{i}", "verified": True,
+    })
+    db.mark_registered(f"U{i}")
+    return True
+
+
+def register_two_calls(db, i):
+    """register_student + sign_up, with the compensating release on failure."""
+    if db.register_student(f"s{i}@x.edu", f"Student {i}", "IT", f"U{i}", f"P{i}") != REGISTER_OK:
+        return False
+    try:
+        db.sign_up(f"s{i}@x.edu", "password")
+    except Exception:
+        db.release_registration(f"s{i}@x.edu", f"U{i}")
+        return False
+    return True
+
+
+def run(name, pipeline, args):
+    db = make_db(args.students, args.latency_ms / 1000)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(lambda i: pipeline(db, i), range(args.students)))
+    elapsed = time.perf_counter() - started
+    print(
+        f"{name:12s} {sum(results):5d} registered  {args.students / elapsed:8.1f} registrations/s  "
+        f"{db.calls / args.students:.1f} backend calls each  {elapsed:.2f}s total"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--students", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--password-iterations", type=int, default=1000,
+                        help="local PBKDF2 rounds; Supabase does this work on its auth server")
+    args = parser.parse_args()
+    sqlite_backend.PASSWORD_ITERATIONS = args.password_iterations
+
+    print(f"{args.students} students, {args.workers} workers, {args.latency_ms} ms per backend call")
+    run("five calls", register_five_calls, args)
+    run("two calls", register_two_calls, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Lookups per second of the registry eligibility index vs. the database query.
+
+    python -m benchmarks.registry_index_bench --entries 100000 --lookups 200000
+
+Builds a synthetic registry in a local SQLite database, then times
+``RegistryIndex.lookup`` (exact and bloom modes) and
+``SqliteRepository.find_registry_entry`` on a mix of known pairs and typos.
+"""
+import argparse
+import random
+import time
+
+from registry_index import RegistryIndex
+from repository import SqliteRepository
+
+
+def make_queries(entries, count, miss_ratio, rng):
+    queries = []
+    for _ in range(count):
+        e = rng.choice(entries)
+        if rng.random() < miss_ratio:
+            # A typo in the phone number, the most common failed attempt
+            queries.append((e["university_id"], e["phone"][:-1] + str((int(e["phone"][-1]) + 1) % 10)))
+        else:
+            queries.append((e["university_id"], e["phone"]))
+    return queries
+
+
+def time_lookups(lookup, queries):
+    started = time.perf_counter()
+    for uid, phone in queries:
+        lookup(uid, phone)
+    elapsed = time.perf_counter() - started
+    return len(queries) / elapsed if elapsed else float("inf")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=200000)
+    parser.add_argument("--db-lookups", type=int, default=20000)
+    parser.add_argument("--miss-ratio", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    db = SqliteRepository(":memory:")
+    entries = [
+        {"university_id": f"U{100000 + i}", "full_name": f"Student {i}", "phone": f"09{i:08d}"}
+        for i in range(args.entries)
+    ]
+    db.insert_registry_entries(entries)
+    queries = make_queries(entries, args.lookups, args.miss_ratio, rng)
+
+    print(f"registry entries: {args.entries}, miss ratio: {args.miss_ratio}")
+    for mode, keep in (("exact", True), ("bloom", False)):
+        index = RegistryIndex(lambda: db.iter_rows("student_registry"), ttl=3600,
+                              error_rate=args.error_rate, keep_entries=keep)
+        index.rebuild()
+        rate = time_lookups(index.lookup, queries)
+        stats = index.stats()
+        print(
+            f"{mode:12s} {rate:12,.0f} lookups/s  build {stats['last_build_ms']:.0f} ms  "
+            f"filter {stats['bloom_bytes'] / 1024:.0f} KiB  rejects {stats['bloom_rejects']}  "
+            f"exact misses {stats['misses']}  db confirmations {stats['passthrough']}"
+        )
+
+    rate = time_lookups(db.find_registry_entry, queries[:args.db_lookups])
+    print(f"{'sqlite query':12s} {rate:12,.0f} lookups/s  (local database, no network round trip)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+"""Replay a recorded request trace against the app on a local backend, at 1x/5x/10x speed.
+
+    TRACE_RECORD_PATH=traces.jsonl flask run ...        # record (see traces.py)
+    python -m benchmarks.replay traces.jsonl --speed 1 5 10 --workers 16 --latency-ms 20
+
+Each speed runs in a fresh process: the app is imported on an in-memory SQLite
+database wrapped in a ``LatencyRepository`` (one simulated round trip per
+backend call) and seeded from the trace. Every anonymised user gets a verified
+profile and a signed-in client of its own, every candidate id in the trace a
+candidate of one open election, every recorded registration an unused registry
+entry. Requests are sent at their recorded offsets divided by the speed;
+``--workers`` bounds how many are served at once, like the threads of the
+deployment being sized. A request that finds no free worker waits, and that
+wait is reported as lag.
+
+URLs are rebuilt from the endpoints and URL arguments in the trace with the
+app's own URL map. GET requests and the voter writes (``login``, ``register``,
+``submit_vote``) are replayed. Other admin writes, GET routes that mutate data
+and the long-lived ``/results/stream`` are counted as skipped.
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from benchmarks.loadtest import git_revision, percentile
+from traces import read_trace
+
+# Never record while replaying
+os.environ["TRACE_RECORD_PATH"] = ""
+
+PASSWORD = "replay-password"
+ADMIN_EMAIL = "admin@gsu.edu"
+REPLAYED_POSTS = {"login", "register", "submit_vote"}
+SKIPPED_ENDPOINTS = {"delete_candidate", "results_stream"}
+ENDPOINT_COLUMNS = (
+    "speed", "endpoint", "requests", "errors", "status_mismatches", "p50_ms", "p95_ms", "p99_ms",
+    "recorded_p95_ms", "backend_calls_per_request", "recorded_calls_per_request",
+)
+
+
+def replayable(entry):
+    if entry["e"] in SKIPPED_ENDPOINTS or not entry["e"]:
+        return False
+    return entry["m"] in ("GET", "HEAD") or entry["e"] in REPLAYED_POSTS
+
+
+class ReplayWorld:
+    """Local stand-ins for the users, candidates and registry entries a trace refers to."""
+
+    def __init__(self, appmod, entries):
+        self.appmod = appmod
+        self.db = appmod.db
+        self.users = {}  # anonymised id -> (email, role)
+        for entry in entries:
+            if entry.get("u") and entry["u"] not in self.users:
+                role = entry.get("role", "voter")
+                email = ADMIN_EMAIL if role == "admin" else f"{entry['u']}@replay.local"
+                self.users[entry["u"]] = (email, role)
+        candidate_ids = sorted({e["a"]["candidate_id"] for e in entries if "candidate_id" in e.get("a", {})})
+        self.registrations = sum(1 for e in entries if e["e"] == "register" and e["m"] == "POST")
+        self._next_registration = 0
+        self._lock = threading.Lock()
+        self.candidates = self._seed(candidate_ids or [1, 2, 3, 4])
+        self._clients = {}
+        self._client_locks = defaultdict(threading.Lock)
+        self._urls = appmod.app.url_map.bind("localhost")
+
+    def _seed(self, candidate_ids):
+        now = datetime.now()
+        self.db.create_election_with_candidates(
+            "Replay election", "",
+            (now - timedelta(minutes=5)).isoformat(timespec="seconds"),
+            (now + timedelta(days=1)).isoformat(timespec="seconds"),
+            [{"name": f"Candidate {cid}"} for cid in candidate_ids],
+        )
+        seeded = [c["id"] for c in self.db.list_candidates(columns="id")]
+        for i, (email, role) in enumerate(self.users.values()):
+            if role == "admin":
+                continue
+            self.db.create_profile({
+                "email": email, "name": f"Voter {i}", "faculty": "IT",
+                "university_id": f"RP{i:06d}", "phone": f"444{i:07d}", "verified": True,
+            })
+            self.db.sign_up(email, PASSWORD)
+        self.db.insert_registry_entries([
+            {"university_id": f"RR{i:06d}", "full_name": f"Student {i}", "phone": f"333{i:07d}"}
+            for i in range(self.registrations)
+        ])
+        self.appmod.election_catalog.invalidate()
+        return dict(zip(candidate_ids, seeded))
+
+    def client_for(self, user_id):
+        """``(client, lock)``; one signed-in client per user, requests of one user run one at a time."""
+        if user_id is None:
+            return self.appmod.app.test_client(), threading.Lock()
+        with self._lock:
+            client = self._clients.get(user_id)
+            if client is None:
+                client = self._clients[user_id] = self.appmod.app.test_client()
+                with client.session_transaction() as s:
+                    s["user"] = self.users[user_id][0]
+        return client, self._client_locks[user_id]
+
+    def next_registration(self):
+        with self._lock:
+            i = self._next_registration
+            self._next_registration += 1
+        return i
+
+    def send(self, client, entry):
+        endpoint, args = entry["e"], dict(entry.get("a") or {})
+        if "candidate_id" in args:
+            args["candidate_id"] = self.candidates.get(args["candidate_id"], args["candidate_id"])
+        url = self._urls.build(endpoint, args, method=entry["m"])
+        if entry["m"] != "POST":
+            return client.open(url, method=entry["m"])
+        if endpoint == "login":
+            email = self.users[entry["u"]][0] if entry.get("u") in self.users else ADMIN_EMAIL
+            password = PASSWORD if email != ADMIN_EMAIL else os.environ["LOCAL_ADMIN_PASSWORD"]
+            return client.post(url, data={"email": email, "password": password})
+        if endpoint == "register":
+            i = self.next_registration()
+            return client.post(url, data={
+                "full_name": f"Student {i}", "username": f"student{i}", "university_id": f"RR{i:06d}",
+                "phone": f"333{i:07d}", "faculty": "IT", "semester": "1",
+                "email": f"student{i}@replay.local", "password": PASSWORD,
+            })
+        return client.post(url)
+
+
+def replay_once(trace_path, speed, workers, latency_ms, password_iterations, limit):
+    """Replay the trace once in this (fresh) process; returns the run's report."""
+    from benchmarks.fanout_bench import load_app
+    from repository import sqlite_backend
+
+    sqlite_backend.PASSWORD_ITERATIONS = password_iterations
+    appmod = load_app(latency_ms / 1000)
+    entries = read_trace(trace_path)[:limit or None]
+    world = ReplayWorld(appmod, entries)
+    todo = [e for e in entries if replayable(e)]
+    skipped = defaultdict(int)
+    for entry in entries:
+        if not replayable(entry):
+            skipped[f"{entry['m']} {entry['e']}"] += 1
+
+    results = []  # (entry, latency ms, lag ms, status)
+    in_flight = peak = 0
+    counter_lock = threading.Lock()
+
+    def run(entry, due):
+        nonlocal in_flight, peak
+        started = time.perf_counter()
+        with counter_lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        client, lock = world.client_for(entry.get("u"))
+        with lock:
+            try:
+                response = world.send(client, entry)
+                status = response.status_code
+                response.close()
+            except Exception as e:
+                print(f"[REPLAY] {entry['m']} {entry['e']} failed: {e}")
+                status = 599
+        elapsed = (time.perf_counter() - started) * 1000
+        with counter_lock:
+            in_flight -= 1
+            results.append((entry, elapsed, (started - due) * 1000, status))
+
+    calls_before = appmod.db.calls
+    t0 = todo[0]["t"] if todo else 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for entry in todo:
+            due = started + (entry["t"] - t0) / speed
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(run, entry, due)
+    wall = time.perf_counter() - started
+    span = (todo[-1]["t"] - t0) / speed if todo else 0.0
+
+    return {
+        "speed": speed,
+        "replayed": len(results),
+        "skipped": dict(skipped),
+        "seconds": round(wall, 3),
+        "trace_seconds": round(span, 3),
+        "throughput_rps": round(len(results) / wall, 1) if wall else 0.0,
+        "peak_in_flight": peak,
+        "lag_p95_ms": round(percentile(sorted(r[2] for r in results), 95), 1),
+        "lag_max_ms": round(max((r[2] for r in results), default=0.0), 1),
+        "backend_calls_per_request": round((appmod.db.calls - calls_before) / len(results), 2) if results else 0.0,
+        "endpoints": summarise_endpoints(appmod, results),
+    }
+
+
+def summarise_endpoints(appmod, results):
+    by_endpoint = defaultdict(list)
+    for result in results:
+        by_endpoint[result[0]["e"]].append(result)
+    # Backend calls made under each URL rule, from the app's own metrics
+    calls_by_route = defaultdict(int)
+    for (route, _, _), count in appmod.metrics.backend_calls.values().items():
+        calls_by_route[route] += count
+
+    requests_by_route = defaultdict(int)
+    for result in results:
+        requests_by_route[result[0]["r"]] += 1
+
+    rows = []
+    for endpoint, items in sorted(by_endpoint.items()):
+        latencies = sorted(r[1] for r in items)
+        routes = {r[0]["r"] for r in items}
+        route_calls = sum(calls_by_route[route] for route in routes)
+        route_requests = sum(requests_by_route[route] for route in routes)
+        rows.append({
+            "endpoint": endpoint,
+            "requests": len(items),
+            "errors": sum(1 for r in items if r[3] >= 500),
+            "status_mismatches": sum(1 for r in items if r[3] != r[0].get("s")),
+            "p50_ms": round(percentile(latencies, 50), 1),
+            "p95_ms": round(percentile(latencies, 95), 1),
+            "p99_ms": round(percentile(latencies, 99), 1),
+            "recorded_p95_ms": round(percentile(sorted(r[0].get("ms", 0.0) for r in items), 95), 1),
+            "backend_calls_per_request": round(route_calls / route_requests, 2) if route_requests else 0.0,
+            "recorded_calls_per_request": round(sum(r[0].get("c", 0) for r in items) / len(items), 2),
+        })
+    return rows
+
+
+def save(report, output_dir):
+    os.makedirs(output_dir, exist_ok=True)
+    base = os.path.join(output_dir, f"replay-{report['started_at'].replace(':', '').replace('-', '')}")
+    with open(base + ".json", "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+    with open(base + ".csv", "w", encoding="utf-8", newline="") as fh:
+        writer = csv.DictWriter(fh, fieldnames=ENDPOINT_COLUMNS)
+        writer.writeheader()
+        for run in report["runs"]:
+            for row in run["endpoints"]:
+                writer.writerow({"speed": run["speed"], **row})
+    return base
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("trace", help="JSON Lines file written with TRACE_RECORD_PATH")
+    parser.add_argument("--speed", type=float, nargs="+", default=[1.0, 5.0, 10.0])
+    parser.add_argument("--workers", type=int, default=16, help="requests served at once (worker threads)")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="simulated round trip per backend call")
+    parser.add_argument("--limit", type=int, default=0, help="replay only the first N requests")
+    parser.add_argument("--password-iterations", type=int, default=1000,
+                        help="local PBKDF2 rounds; Supabase does this work on its auth server")
+    parser.add_argument("--output", default=os.path.join("benchmarks", "results"),
+                        help="directory for the JSON/CSV results ('' to skip saving)")
+    args = parser.parse_args()
+
+    report = {
+        "benchmark": "replay",
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "config": {"trace": args.trace, "workers": args.workers, "latency_ms": args.latency_ms, "limit": args.limit},
+        "runs": [],
+    }
+    print(f"{args.trace}: {args.workers} workers, {args.latency_ms:.0f} ms per backend call\n")
+    print(f"{'speed':>5s} {'req':>6s} {'req/s':>8s} {'peak':>5s} {'lag p95':>8s} {'lag max':>8s} {'calls':>6s}")
+    spawn = multiprocessing.get_context("spawn")
+    for speed in args.speed:
+        # A fresh process per speed: empty database, cold caches, no votes from the previous run
+        with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as pool:
+            run = pool.submit(
+                replay_once, args.trace, speed, args.workers, args.latency_ms, args.password_iterations, args.limit,
+            ).result()
+        report["runs"].append(run)
+        print(
+            f"{speed:4.0f}x {run['replayed']:6d} {run['throughput_rps']:8.1f} {run['peak_in_flight']:5d} "
+            f"{run['lag_p95_ms']:8.1f} {run['lag_max_ms']:8.1f} {run['backend_calls_per_request']:6.2f}"
+        )
+
+    for run in report["runs"]:
+        print(f"\n{run['speed']:.0f}x  {'endpoint':24s} {'req':>5s} {'p50 ms':>8s} {'p95 ms':>8s} "
+              f"{'rec p95':>8s} {'calls':>6s} {'rec':>5s} {'diff':>5s}")
+        for row in run["endpoints"]:
+            print(
+                f"     {row['endpoint']:24s} {row['requests']:5d} {row['p50_ms']:8.1f} {row['p95_ms']:8.1f} "
+                f"{row['recorded_p95_ms']:8.1f} {row['backend_calls_per_request']:6.2f} "
+                f"{row['recorded_calls_per_request']:5.2f} {row['status_mismatches']:5d}"
+            )
+        if run["skipped"]:
+            print(f"     skipped: {', '.join(f'{k} x{n}' for k, n in sorted(run['skipped'].items()))}")
+    if args.output:
+        print(f"\nSaved {save(report, args.output)}.json / .csv")
+
+
+if __name__ == "__main__":
+    main()
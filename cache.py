@@ -0,0 +1,116 @@
+"""Process-local caches for hot read paths.
+
+Each gunicorn worker keeps its own copy, so writes made through this process
+invalidate immediately while other workers pick them up when the TTL expires.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class CachedValue:
+    """Holds one loaded value (e.g. the ``settings`` row) in memory for ``ttl`` seconds.
+
+    ``invalidate()`` forces the next read to reload. ``mark_stale()`` is the
+    soft version for frequent events such as ballots: the value is reloaded
+    once it is at least ``min_age`` seconds old, so a burst of events costs
+    one reload instead of one per event.
+    """
+
+    def __init__(self, loader, ttl=30.0, min_age=0.0):
+        self.loader = loader
+        self.ttl = ttl
+        self.min_age = min_age
+        self._lock = threading.Lock()
+        self._value = None
+        self._loaded_at = None
+        self._stale = False
+
+    def get(self):
+        """Return the cached value, reloading it once it has expired.
+
+        Loader errors propagate and nothing is cached, so the next call retries.
+        Concurrent callers wait for a single reload instead of each running one.
+        """
+        with self._lock:
+            if self._loaded_at is not None:
+                age = time.monotonic() - self._loaded_at
+                if age < self.ttl and not (self._stale and age >= self.min_age):
+                    return self._value
+            value = self.loader()
+            self._value = value
+            self._loaded_at = time.monotonic()
+            self._stale = False
+            return value
+
+    def invalidate(self):
+        """Drop the cached value so the next ``get`` goes to the backend."""
+        with self._lock:
+            self._value = None
+            self._loaded_at = None
+            self._stale = False
+
+    def mark_stale(self):
+        """Reload on the first ``get`` after the value is ``min_age`` seconds old."""
+        with self._lock:
+            self._stale = True
+
+
+class LRUCache:
+    """Bounded least-recently-used cache whose entries also expire after ``ttl`` seconds.
+
+    Keeps hit/miss/eviction counters so the size can be tuned from ``stats()``.
+    """
+
+    _MISSING = object()
+
+    def __init__(self, maxsize=10000, ttl=300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._data = OrderedDict()  # key -> (value, stored_at)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """Return the cached value for ``key`` (counting a hit) or ``default`` (a miss)."""
+        with self._lock:
+            entry = self._data.get(key, self._MISSING)
+            if entry is not self._MISSING and time.monotonic() - entry[1] < self.ttl:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not self._MISSING:
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,69 @@
+-- ==============================================================================
+-- 🗳️ ATOMIC CAST_VOTE RPC
+-- Replaces the separate votes insert + increment_vote calls made by submit_vote.
+-- Checks the election window and one-vote-per-election, inserts the ballot and
+-- bumps candidates.votes in ONE transaction (one round trip from the app).
+-- ==============================================================================
+
+DROP FUNCTION IF EXISTS cast_vote CASCADE;
+
+-- Returns one of: 'ok', 'not_found', 'not_started', 'ended', 'already_voted'
+CREATE OR REPLACE FUNCTION cast_vote(
+    voter_email TEXT,
+    cid INT,
+    voted_now TIMESTAMP DEFAULT NULL, -- app server's clock; defaults to DB time
+    bump_counter BOOLEAN DEFAULT TRUE -- FALSE when the app batches counters (vote_counters.sql)
+)
+RETURNS TEXT
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+    eid INT;
+    e_start TIMESTAMP;
+    e_end TIMESTAMP;
+    check_time TIMESTAMP := COALESCE(voted_now, now()::timestamp);
+    inserted INT;
+BEGIN
+    -- 1. Candidate + election in one lookup
+    SELECT c.election_id, e.start_time, e.end_time
+    INTO eid, e_start, e_end
+    FROM candidates c
+    JOIN elections e ON e.id = c.election_id
+    WHERE c.id = cid;
+
+    IF NOT FOUND THEN
+        RETURN 'not_found';
+    END IF;
+
+    -- 2. Strict time check
+    IF check_time < e_start THEN
+        RETURN 'not_started';
+    END IF;
+    IF check_time > e_end THEN
+        RETURN 'ended';
+    END IF;
+
+    -- 3. One vote per election per person (UNIQUE(email, election_id))
+    INSERT INTO votes (email, candidate_id, election_id)
+    VALUES (voter_email, cid, eid)
+    ON CONFLICT (email, election_id) DO NOTHING;
+
+    GET DIAGNOSTICS inserted = ROW_COUNT;
+    IF inserted = 0 THEN
+        RETURN 'already_voted';
+    END IF;
+
+    -- 4. Counter bump in the same transaction, so it can never drift from votes
+    IF bump_counter THEN
+        UPDATE candidates SET votes = votes + 1 WHERE id = cid;
+    END IF;
+
+    RETURN 'ok';
+END;
+$$;
+
+-- Server-side only: the caller chooses the voter and the clock, so the anon key the
+-- browser sees must not reach it. The app calls it with the service_role key.
+REVOKE EXECUTE ON FUNCTION cast_vote(TEXT, INT, TIMESTAMP, BOOLEAN) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION cast_vote(TEXT, INT, TIMESTAMP, BOOLEAN) TO service_role;
@@ -0,0 +1,171 @@
+"""In-memory, time-indexed catalog of elections and their candidates.
+
+Elections are loaded once, their start/end times parsed a single time into
+epoch seconds and kept in two sorted arrays, so classifying every election as
+Active/Upcoming/Closed at a given instant is a pair of bisects instead of a
+``fromisoformat`` per election per request. Candidates are grouped by election.
+
+Times follow the routes' convention: naive timestamps in server-local time.
+Admin mutations call ``invalidate()``; other workers reload after ``ttl``.
+
+A catalog can also hold a subset of the elections (the vote page loads only
+the open and recently closed ones): with ``candidates_by_election_ids`` the
+candidates loader is called with the ids of the elections just loaded.
+"""
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+DISPLAY_FORMAT = "%d %b %Y, %I:%M %p"
+
+
+def parse_naive(value):
+    """Parse a stored timestamp the way the routes do (drop 'Z' and any tzinfo)."""
+    return datetime.fromisoformat(value.replace("Z", "")).replace(tzinfo=None)
+
+
+class CatalogSnapshot:
+    """One immutable load of the catalog; swapped atomically on reload."""
+
+    def __init__(self, version, elections, candidates):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.elections = []  # newest start first, as the admin dashboard lists them
+        self.by_id = {}
+        self.invalid = []  # elections whose times could not be parsed
+        self.candidates = list(candidates)
+        self.candidates_by_election = {}
+        self.candidates_by_id = {}
+
+        starts, ends = [], []
+        for e in elections:
+            e = dict(e)
+            try:
+                start_dt = parse_naive(e["start_time"])
+                end_dt = parse_naive(e["end_time"])
+            except Exception:
+                self.invalid.append(e)
+                self.elections.append(e)
+                self.by_id[e["id"]] = e
+                continue
+            e["start_dt_obj"] = start_dt
+            e["end_dt_obj"] = end_dt
+            e["start_epoch"] = start_dt.timestamp()
+            e["end_epoch"] = end_dt.timestamp()
+            e["formatted_start"] = e["start_time_display"] = start_dt.strftime(DISPLAY_FORMAT)
+            e["formatted_end"] = e["end_time_display"] = end_dt.strftime(DISPLAY_FORMAT)
+            self.elections.append(e)
+            self.by_id[e["id"]] = e
+            starts.append((e["start_epoch"], e["id"]))
+            ends.append((e["end_epoch"], e["id"]))
+
+        starts.sort()
+        ends.sort()
+        self.start_keys = [s for s, _ in starts]
+        self.start_ids = [eid for _, eid in starts]
+        self.end_keys = [t for t, _ in ends]
+        self.end_ids = [eid for _, eid in ends]
+
+        for c in self.candidates:
+            self.candidates_by_id[c["id"]] = c
+            self.candidates_by_election.setdefault(c["election_id"], []).append(c)
+        for group in self.candidates_by_election.values():
+            group.sort(key=lambda c: c["id"])
+
+
+class ElectionCatalog:
+    """Versioned, lazily (re)loaded election catalog shared by all requests in a worker."""
+
+    def __init__(self, load_elections, load_candidates, ttl=30.0, executor=None, candidates_by_election_ids=False):
+        self.load_elections = load_elections
+        self.load_candidates = load_candidates
+        self.ttl = ttl
+        self.executor = executor  # fanout.QueryExecutor: load both tables concurrently
+        self.candidates_by_election_ids = candidates_by_election_ids
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._version = 0
+
+    @property
+    def version(self):
+        return self._version
+
+    def snapshot(self):
+        """Return the current snapshot, loading it if missing or older than ``ttl``."""
+        snap = self._snapshot
+        if snap is not None and time.monotonic() - snap.loaded_at < self.ttl:
+            return snap
+        with self._lock:
+            snap = self._snapshot
+            if snap is None or time.monotonic() - snap.loaded_at >= self.ttl:
+                elections, candidates = self._load()
+                self._version += 1
+                snap = CatalogSnapshot(self._version, elections, candidates)
+                self._snapshot = snap
+            return snap
+
+    def _load(self):
+        if self.candidates_by_election_ids:
+            elections = self.load_elections()
+            return elections, self.load_candidates([e["id"] for e in elections])
+        if self.executor is None:
+            return self.load_elections(), self.load_candidates()
+        with self.executor.batch() as batch:
+            elections = batch.submit(self.load_elections, label="catalog elections")
+            candidates = batch.submit(self.load_candidates, label="catalog candidates")
+        return elections.result(), candidates.result()
+
+    def invalidate(self):
+        """Drop the loaded data; the next read reloads it under a new version."""
+        with self._lock:
+            self._snapshot = None
+            self._version += 1
+
+    # -------------------- READERS --------------------
+    def elections(self):
+        return self.snapshot().elections
+
+    def election(self, election_id):
+        return self.snapshot().by_id.get(election_id)
+
+    def candidates(self):
+        return self.snapshot().candidates
+
+    def candidates_for(self, election_id):
+        return self.snapshot().candidates_by_election.get(election_id, [])
+
+    def candidate(self, candidate_id):
+        return self.snapshot().candidates_by_id.get(candidate_id)
+
+    def classify(self, now=None):
+        """Split elections into ``(active, upcoming, closed)`` at ``now`` (naive local time).
+
+        Upcoming is the suffix of the start-sorted array after ``now``, closed
+        is the prefix of the end-sorted array before ``now``; active is the
+        started prefix minus the closed ones. Active and upcoming are ordered
+        by start time, closed by most recently ended first.
+        """
+        snap = self.snapshot()
+        t = (now or datetime.now()).timestamp()
+        started = bisect_right(snap.start_keys, t)
+        closed_count = bisect_left(snap.end_keys, t)
+
+        # An election that has not started is Upcoming even if its end is (wrongly) in the past
+        closed_ids = [eid for eid in snap.end_ids[:closed_count] if snap.by_id[eid]["start_epoch"] <= t]
+        closed_set = set(closed_ids)
+        active = [snap.by_id[eid] for eid in snap.start_ids[:started] if eid not in closed_set]
+        upcoming = [snap.by_id[eid] for eid in snap.start_ids[started:]]
+        closed = [snap.by_id[eid] for eid in reversed(closed_ids)]
+        return active, upcoming, closed
+
+    def status_of(self, election, now=None):
+        """Return 'Active', 'Upcoming', 'Closed' or 'Error' for one catalog election."""
+        if "start_epoch" not in election:
+            return "Error"
+        t = (now or datetime.now()).timestamp()
+        if t < election["start_epoch"]:
+            return "Upcoming"
+        if t <= election["end_epoch"]:
+            return "Active"
+        return "Closed"
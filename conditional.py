@@ -0,0 +1,181 @@
+"""Conditional GET for the public pages, driven by digests of the data they render.
+
+``DataVersion`` keeps, per data domain, a digest of the value each watched
+cache loader last returned. A page's ETag is derived from the digests of the
+domains it renders plus whatever else varies (viewer role, user, the results
+board), so a client that is current gets a 304 without the route touching the
+backend or Jinja. Validators only change when the loaded data does, and they
+are the same in every worker that has loaded the same data: a revalidation
+can be answered by any worker. ``release_id`` (a digest of the code,
+templates and static files) keeps a deploy from answering 304 for HTML an
+older release rendered.
+
+The voter-specific part of ``/vote`` comes from ``SharedCounters``: one
+counter per voter, bumped when a ballot is cast and shared by the workers of
+a host through a memory-mapped file, so checking it needs no query.
+
+No Last-Modified is sent: load times differ between workers, so
+If-Modified-Since could produce a false 304.
+"""
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import zlib
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, the counters stay in this process
+    fcntl = None
+
+from flask import make_response, request
+
+RELEASE_DIRS = ("repository", "templates", "static")
+
+
+def digest(value):
+    """Short digest of a loaded value; equal data gives the same digest in every worker."""
+    return hashlib.sha1(repr(value).encode()).hexdigest()[:16]
+
+
+def release_id(root):
+    """Digest of the top-level modules and the files in ``RELEASE_DIRS`` under ``root``."""
+    sha = hashlib.sha1()
+    paths = [name for name in os.listdir(root) if name.endswith(".py")]
+    for sub in RELEASE_DIRS:
+        folder = os.path.join(root, sub)
+        if os.path.isdir(folder):
+            paths += [os.path.join(sub, name) for name in os.listdir(folder)]
+    for path in sorted(paths):
+        full = os.path.join(root, path)
+        if os.path.isfile(full):
+            sha.update(path.encode())
+            with open(full, "rb") as f:
+                sha.update(f.read())
+    return sha.hexdigest()[:12]
+
+
+class DataVersion:
+    """Per-domain digests of what the watched cache loaders last returned."""
+
+    def __init__(self, release):
+        self.release = release
+        self._lock = threading.Lock()
+        self._digests = {}  # domain -> {loader number: digest}
+        self._loaders = 0
+
+    def watch(self, loader, *domains):
+        """Wrap a cache loader so each reload records a digest of its value under ``domains``."""
+        with self._lock:
+            # Numbered in import order, so the same in every worker
+            number = self._loaders
+            self._loaders += 1
+            for domain in domains:
+                self._digests.setdefault(domain, {})
+
+        def load(*args, **kwargs):
+            value = loader(*args, **kwargs)
+            value_digest = digest(value)
+            with self._lock:
+                for domain in domains:
+                    self._digests[domain][number] = value_digest
+            return value
+
+        return load
+
+    def get(self, *domains):
+        with self._lock:
+            return tuple(tuple(sorted(self._digests[d].items())) for d in domains)
+
+    def stats(self):
+        with self._lock:
+            return {d: digest(sorted(loaders.items()))[:8] for d, loaders in self._digests.items()}
+
+
+class SharedCounters:
+    """Counters keyed by string, shared by the workers of one host through a memory-mapped file.
+
+    Keys hash onto ``slots`` counters, so two keys can share one: a bump then
+    changes both, which only costs the other key a full response. Reads are a
+    memory access; bumps hold an flock. The header carries a random epoch,
+    written when the file is created or resized, so counters starting over
+    never repeat a value an old validator carries. Without a path the counters
+    live in this process only (single worker).
+    """
+
+    _HEADER = struct.Struct("<8sQ")  # epoch, slots
+    _COUNTER = struct.Struct("<Q")
+
+    def __init__(self, path=None, slots=65536):
+        if path and fcntl is None:
+            print("[CONDITIONAL] flock is not available on this platform; counters are kept per process")
+            path = None
+        self.slots = slots
+        self._lock = threading.Lock()
+        self._fd = None
+        size = self._HEADER.size + self._COUNTER.size * slots
+        if not path:
+            self._map = bytearray(size)
+            self._HEADER.pack_into(self._map, 0, os.urandom(8), slots)
+            return
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size < size:
+                # Only ever grown: a worker of the previous release may still have it mapped
+                os.ftruncate(self._fd, size)
+            self._map = mmap.mmap(self._fd, size)
+            if self._HEADER.unpack_from(self._map, 0)[1] != slots:
+                self._HEADER.pack_into(self._map, 0, os.urandom(8), slots)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _offset(self, key):
+        # crc32 rather than hash(): string hashes differ between processes
+        return self._HEADER.size + self._COUNTER.size * (zlib.crc32(key.encode()) % self.slots)
+
+    def get(self, key):
+        """``(epoch, value)`` for ``key``; changes with every ``bump(key)`` on this host."""
+        epoch = self._HEADER.unpack_from(self._map, 0)[0]
+        return epoch.hex(), self._COUNTER.unpack_from(self._map, self._offset(key))[0]
+
+    def bump(self, key):
+        offset = self._offset(key)
+        with self._lock:
+            if self._fd is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                value = self._COUNTER.unpack_from(self._map, offset)[0]
+                self._COUNTER.pack_into(self._map, offset, value + 1)
+            finally:
+                if self._fd is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+
+def make_etag(data_version, *parts):
+    return hashlib.sha1(repr((data_version.release,) + parts).encode()).hexdigest()[:24]
+
+
+def is_not_modified(etag):
+    """True if the request's If-None-Match shows the client already has this version."""
+    return bool(request.if_none_match) and request.if_none_match.contains(etag)
+
+
+def conditional_page(etag, render, page_cache=None, cache_key=None, private=False):
+    """Return 304 if the client is current, else the (possibly cached) HTML from ``render()``."""
+    if is_not_modified(etag):
+        response = make_response("", 304)
+    else:
+        html = page_cache.get(cache_key) if page_cache is not None else None
+        if html is None:
+            html = render()
+            if page_cache is not None:
+                page_cache.set(cache_key, html)
+        response = make_response(html)
+    response.set_etag(etag)
+    # Always revalidate; the ETag makes that cheap
+    response.cache_control.no_cache = True
+    if private:
+        response.cache_control.private = True
+    return response
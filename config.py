@@ -1,5 +1,6 @@
-from supabase import create_client, ClientOptions
+import hashlib
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -10,11 +11,150 @@ SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 print("Loaded SUPABASE_URL:", bool(SUPABASE_URL))
 print("Loaded SUPABASE_KEY:", bool(SUPABASE_KEY))
 
-supabase = create_client(
-    SUPABASE_URL, 
-    SUPABASE_KEY,
-    options=ClientOptions(
-        postgrest_client_timeout=60,
-        storage_client_timeout=60
+# Storage bucket for candidate photos (MUST be a public bucket in Supabase)
+BUCKET_NAME = os.getenv("CANDIDATE_BUCKET", "candidate-photos")
+
+# Files the workers of this deployment share (locks, stamps, checkpoints). The default is
+# derived from the app directory, so two deployments on one host never share them.
+RUNTIME_DIR = os.getenv("RUNTIME_DIR", os.path.join(
+    tempfile.gettempdir(),
+    "gsu-voting-" + hashlib.sha1(os.path.dirname(os.path.abspath(__file__)).encode()).hexdigest()[:10],
+))
+os.makedirs(RUNTIME_DIR, exist_ok=True)
+
+# Data-access backend: "supabase" (default) or "sqlite" for offline/local runs
+DATA_BACKEND = os.getenv("DATA_BACKEND", "supabase")
+SQLITE_PATH = os.getenv("SQLITE_PATH", ":memory:")
+# Password for admin@gsu.edu on the sqlite backend (no admin login if unset)
+LOCAL_ADMIN_PASSWORD = os.getenv("LOCAL_ADMIN_PASSWORD", "")
+
+# Seconds the settings row (election end, registration flag) is served from memory
+SETTINGS_CACHE_TTL = float(os.getenv("SETTINGS_CACHE_TTL", "30"))
+
+# Bounded email -> verified cache used by the voting routes
+VERIFIED_CACHE_SIZE = int(os.getenv("VERIFIED_CACHE_SIZE", "10000"))
+VERIFIED_CACHE_TTL = float(os.getenv("VERIFIED_CACHE_TTL", "300"))
+
+# Home page statistics snapshot: max age, and the minimum age before a vote forces a refresh
+HERO_STATS_TTL = float(os.getenv("HERO_STATS_TTL", "15"))
+HERO_STATS_MIN_AGE = float(os.getenv("HERO_STATS_MIN_AGE", "2"))
+
+# "atomic": cast_vote bumps candidates.votes itself (default).
+# "batched": counters are aggregated in-process and flushed in batches (vote_counters.sql)
+VOTE_COUNTER_MODE = os.getenv("VOTE_COUNTER_MODE", "atomic")
+VOTE_COUNTER_FLUSH_INTERVAL = float(os.getenv("VOTE_COUNTER_FLUSH_INTERVAL", "1"))
+VOTE_COUNTER_MAX_PENDING = int(os.getenv("VOTE_COUNTER_MAX_PENDING", "500"))
+# Recount candidates.votes from the votes table when a worker starts in batched mode.
+# Single-process deployments only: the recount includes ballots still pending in other
+# workers, which they then add again. With several workers run "python -m vote_counter"
+# before starting them, and let TALLY_RECONCILE_REPAIR recover lost increments while live.
+VOTE_COUNTER_REBUILD_ON_START = os.getenv("VOTE_COUNTER_REBUILD_ON_START", "false").lower() == "true"
+# Incremental audit of candidates.votes against the votes table (tally_reconciler.py).
+# Interval 0 turns the background job off. It runs (and repairs) in one process only: the
+# worker holding TALLY_RECONCILE_LOCK_PATH; the others serve the status it publishes into
+# TALLY_CHECKPOINT_PATH (both in RUNTIME_DIR by default). On Windows, where there is no
+# flock, there is no leader lock and every process audits on its own.
+TALLY_RECONCILE_INTERVAL = float(os.getenv("TALLY_RECONCILE_INTERVAL", "60"))
+TALLY_RECONCILE_REPAIR = os.getenv("TALLY_RECONCILE_REPAIR", "false").lower() == "true"
+TALLY_RECONCILE_BATCH_SIZE = int(os.getenv("TALLY_RECONCILE_BATCH_SIZE", "5000"))
+# Seconds before a ballot id counts as committed (ids may commit out of order)
+TALLY_RECONCILE_SETTLE = float(os.getenv("TALLY_RECONCILE_SETTLE", "30"))
+# JSON file keeping the checkpoint across restarts; empty keeps it in memory (single worker)
+TALLY_CHECKPOINT_PATH = os.getenv(
+    "TALLY_CHECKPOINT_PATH", os.path.join(RUNTIME_DIR, "tally-checkpoint.json"))
+# Empty lets every process run the audit (single worker, or "python -m tally_reconciler" only)
+TALLY_RECONCILE_LOCK_PATH = os.getenv(
+    "TALLY_RECONCILE_LOCK_PATH", os.path.join(RUNTIME_DIR, "tally-reconciler.lock"))
+
+# Seconds before the in-memory election catalog reloads (admin edits invalidate it at once)
+CATALOG_TTL = float(os.getenv("CATALOG_TTL", "30"))
+
+# Background thread keeping elections.status current. With several workers it
+# is enough to enable it in one of them (the writes are idempotent either way).
+ELECTION_SCHEDULER_ENABLED = os.getenv("ELECTION_SCHEDULER_ENABLED", "true").lower() == "true"
+ELECTION_SCHEDULER_RESYNC = float(os.getenv("ELECTION_SCHEDULER_RESYNC", "300"))
+# Most recent closed elections listed on the vote page
+VOTE_PAGE_CLOSED_LIMIT = int(os.getenv("VOTE_PAGE_CLOSED_LIMIT", "10"))
+# Rows read, checked and inserted per batch by the student registry import
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "1000"))
+# Rows fetched per query while streaming an admin CSV/XLSX export
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+# In-memory registry eligibility index used by register(); "bloom" keeps only the filter
+REGISTRY_INDEX_ENABLED = os.getenv("REGISTRY_INDEX_ENABLED", "true").lower() == "true"
+REGISTRY_INDEX_MODE = os.getenv("REGISTRY_INDEX_MODE", "exact")
+REGISTRY_INDEX_TTL = float(os.getenv("REGISTRY_INDEX_TTL", "300"))
+REGISTRY_BLOOM_ERROR_RATE = float(os.getenv("REGISTRY_BLOOM_ERROR_RATE", "0.01"))
+# File the workers of one host touch after registry changes (user deletion, edits, imports)
+# so their indexes know to reload; "already registered" is only answered from memory while
+# it is unchanged. Empty assumes a single worker process.
+REGISTRY_INDEX_STAMP_PATH = os.getenv(
+    "REGISTRY_INDEX_STAMP_PATH", os.path.join(RUNTIME_DIR, "registry-index.stamp"))
+# Reject pairs missing from a current index (stamp unchanged since load) without asking the
+# database. Turn off if registry rows are added outside the app (e.g. in Supabase) while
+# registration is open: they would otherwise be missed until the next TTL reload.
+REGISTRY_INDEX_TRUST_MISSES = os.getenv("REGISTRY_INDEX_TRUST_MISSES", "true").lower() == "true"
+# /results: live tallies re-read at most this often; closed elections frozen this long after their end
+RESULTS_REFRESH_INTERVAL = float(os.getenv("RESULTS_REFRESH_INTERVAL", "5"))
+RESULTS_FREEZE_GRACE = float(os.getenv("RESULTS_FREEZE_GRACE", "10"))
+# /results/stream: one shared poll per interval. Each open stream holds a gunicorn thread, so
+# streams per worker are capped at half of GUNICORN_THREADS (the Profile reads the same
+# variable); page requests always keep the other half. Viewers over the cap, and the home
+# page, poll /results/live instead.
+GUNICORN_THREADS = int(os.getenv("GUNICORN_THREADS", "64"))
+LIVE_RESULTS_INTERVAL = float(os.getenv("LIVE_RESULTS_INTERVAL", "2"))
+LIVE_RESULTS_MAX_CLIENTS = min(
+    int(os.getenv("LIVE_RESULTS_MAX_CLIENTS", str(GUNICORN_THREADS // 2))), GUNICORN_THREADS // 2)
+LIVE_RESULTS_MAX_STREAM_SECONDS = float(os.getenv("LIVE_RESULTS_MAX_STREAM_SECONDS", "600"))
+# Per-voter ballot counters keyed into the /vote ETag, so a revalidation needs no query.
+# The file is memory-mapped by the workers of one host; a ballot cast on another host is
+# only seen there (or once the voter tries to vote again). Empty keeps them in this
+# process (single worker). Emails hash onto BALLOT_VERSION_SLOTS counters of 8 bytes.
+BALLOT_VERSIONS_PATH = os.getenv("BALLOT_VERSIONS_PATH", os.path.join(RUNTIME_DIR, "ballot-versions"))
+BALLOT_VERSION_SLOTS = int(os.getenv("BALLOT_VERSION_SLOTS", "65536"))
+# Rendered HTML of / and /results kept per ETag (old versions simply age out)
+PAGE_CACHE_SIZE = int(os.getenv("PAGE_CACHE_SIZE", "64"))
+PAGE_CACHE_TTL = float(os.getenv("PAGE_CACHE_TTL", "300"))
+# Independent reads of one request run concurrently; at most this many in flight per
+# worker process (more run inline in the request thread). 0 runs everything inline.
+QUERY_FANOUT_MAX_IN_FLIGHT = int(os.getenv("QUERY_FANOUT_MAX_IN_FLIGHT", "8"))
+# Largest candidate photo accepted by the upload pipeline (photos.py)
+PHOTO_MAX_BYTES = int(os.getenv("PHOTO_MAX_BYTES", str(10 * 1024 * 1024)))
+# Rendered initials avatars kept in memory, keyed by (initials, colour, size)
+AVATAR_CACHE_SIZE = int(os.getenv("AVATAR_CACHE_SIZE", "512"))
+# Serve gzip (and brotli, if installed) variants of text-like /assets files
+STATIC_PRECOMPRESS = os.getenv("STATIC_PRECOMPRESS", "true").lower() == "true"
+# Per-request backend call metrics (served at /metrics) and the [SLOW] request log
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "500"))
+# Lets a Prometheus scraper read /metrics with "Authorization: Bearer <token>"; admins need no token
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+# Opt-in request trace file for benchmarks/replay.py (needs METRICS_ENABLED). Users are
+# recorded as an HMAC of their email under TRACE_SALT (defaults to SECRET_KEY).
+TRACE_RECORD_PATH = os.getenv("TRACE_RECORD_PATH", "")
+TRACE_SALT = os.getenv("TRACE_SALT", os.getenv("SECRET_KEY", "supersecretkey"))
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))
+
+
+# Supabase HTTP transport shared by all threads of a worker: keep-alive connections
+# (HTTP/2, so each carries many concurrent calls) and per-call timeouts in seconds.
+# SUPABASE_POOL_TIMEOUT is how long a call may wait for a free connection.
+SUPABASE_POOL_SIZE = int(os.getenv("SUPABASE_POOL_SIZE", "16"))
+SUPABASE_TIMEOUT = float(os.getenv("SUPABASE_TIMEOUT", "10"))
+SUPABASE_CONNECT_TIMEOUT = float(os.getenv("SUPABASE_CONNECT_TIMEOUT", "5"))
+SUPABASE_POOL_TIMEOUT = float(os.getenv("SUPABASE_POOL_TIMEOUT", "5"))
+SUPABASE_KEEPALIVE_EXPIRY = float(os.getenv("SUPABASE_KEEPALIVE_EXPIRY", "60"))
+
+
+def create_supabase_pool():
+    """Build the Supabase client pool (supabase is imported lazily so the sqlite backend runs without it)."""
+    from repository.supabase_pool import SupabaseClientPool
+
+    return SupabaseClientPool(
+        SUPABASE_URL,
+        SUPABASE_KEY,
+        size=SUPABASE_POOL_SIZE,
+        timeout=SUPABASE_TIMEOUT,
+        connect_timeout=SUPABASE_CONNECT_TIMEOUT,
+        pool_timeout=SUPABASE_POOL_TIMEOUT,
+        keepalive_expiry=SUPABASE_KEEPALIVE_EXPIRY,
     )
-)
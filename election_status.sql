@@ -0,0 +1,7 @@
+-- ==============================================================================
+-- ⏱️ ELECTION STATUS INDEX
+-- elections.status is now kept current by the app's status scheduler
+-- (scheduler.py), so readers can filter on it in the database.
+-- ==============================================================================
+
+CREATE INDEX IF NOT EXISTS idx_elections_status ON elections(status);
@@ -0,0 +1,132 @@
+"""Run a request's independent backend reads concurrently.
+
+A route opens a ``QueryBatch``, submits the reads it needs and then uses
+their results; the batch waits for all of them on exit, so the request costs
+roughly the slowest round trip instead of the sum of them.
+
+One ``QueryExecutor`` (a small thread pool) is shared by the whole worker
+process and bounds how many submitted reads are in flight at once. When every
+slot is taken a read simply runs inline in the calling thread: nothing queues
+behind a busy pool, and a read that fans out again (a cache loader called
+from a batch) can never deadlock it. Pooled reads run in a copy of the
+submitting thread's context, so per-request context variables (the backend
+call trace of ``metrics.py``) follow them.
+"""
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+_NO_DEFAULT = object()
+
+
+class PendingQuery:
+    """Handle for one submitted read."""
+
+    def __init__(self, label, default):
+        self.label = label
+        self.default = default
+        self._future = None
+        self._value = None
+        self._error = None
+
+    def _run(self, fn, args, kwargs):
+        try:
+            self._value = fn(*args, **kwargs)
+        except Exception as e:
+            self._error = e
+
+    def wait(self):
+        if self._future is not None:
+            self._future.result()
+
+    def result(self):
+        """The read's value; on error the ``default`` given to ``submit`` (logged), or the error re-raised."""
+        self.wait()
+        if self._error is None:
+            return self._value
+        if self.default is _NO_DEFAULT:
+            raise self._error
+        print(f"[FANOUT] {self.label} failed: {self._error}")
+        return self.default
+
+    @property
+    def error(self):
+        self.wait()
+        return self._error
+
+
+class QueryBatch:
+    """The concurrent reads of one request; use as a context manager."""
+
+    def __init__(self, executor):
+        self.executor = executor
+        self.queries = []
+
+    def submit(self, fn, *args, label=None, default=_NO_DEFAULT, **kwargs):
+        """Start ``fn(*args, **kwargs)`` and return its ``PendingQuery``.
+
+        With a ``default`` a failure is logged and replaced by it; without one
+        ``result()`` raises the original exception.
+        """
+        query = PendingQuery(label or getattr(fn, "__name__", "query"), default)
+        self.queries.append(query)
+        self.executor._start(query, fn, args, kwargs)
+        return query
+
+    def wait(self):
+        for query in self.queries:
+            query.wait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.wait()
+        return False
+
+
+class QueryExecutor:
+    """Process-wide pool running at most ``max_in_flight`` submitted reads at a time."""
+
+    def __init__(self, max_in_flight=8):
+        self.max_in_flight = max_in_flight
+        self._slots = threading.BoundedSemaphore(max_in_flight) if max_in_flight > 0 else None
+        self._pool = (
+            ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="fanout")
+            if max_in_flight > 0 else None
+        )
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.inline = 0
+
+    def batch(self):
+        return QueryBatch(self)
+
+    def _start(self, query, fn, args, kwargs):
+        if self._slots is not None and self._slots.acquire(blocking=False):
+            def task():
+                try:
+                    query._run(fn, args, kwargs)
+                finally:
+                    self._slots.release()
+
+            try:
+                query._future = self._pool.submit(contextvars.copy_context().run, task)
+            except RuntimeError:
+                # Pool shut down (interpreter exit): fall through and run inline
+                self._slots.release()
+            else:
+                with self._lock:
+                    self.submitted += 1
+                return
+        with self._lock:
+            self.inline += 1
+        query._run(fn, args, kwargs)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+
+    def stats(self):
+        with self._lock:
+            return {"max_in_flight": self.max_in_flight, "submitted": self.submitted, "inline": self.inline}
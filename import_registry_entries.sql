@@ -0,0 +1,34 @@
+-- ==============================================================================
+-- 📥 REGISTRY IMPORT RPC
+-- Inserts one chunk of student_registry rows from the admin import and skips
+-- every row that hits a unique constraint (university_id, phone or username).
+-- A PostgREST upsert can only name one conflict column, so a phone already
+-- taken by another student would otherwise fail the whole chunk.
+-- ==============================================================================
+
+DROP FUNCTION IF EXISTS import_registry_entries CASCADE;
+
+-- entries: [{"university_id": ..., "full_name": ..., "phone": ..., "is_registered": false}, ...]
+-- Returns the number of rows actually inserted
+CREATE OR REPLACE FUNCTION import_registry_entries(entries JSONB)
+RETURNS INT
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+    inserted INT;
+BEGIN
+    INSERT INTO student_registry (university_id, full_name, phone, is_registered)
+    SELECT e.university_id, e.full_name, e.phone, COALESCE(e.is_registered, FALSE)
+    FROM jsonb_to_recordset(entries) AS e(university_id TEXT, full_name TEXT, phone TEXT, is_registered BOOLEAN)
+    -- No conflict target: a clash on any unique column skips just that row
+    ON CONFLICT DO NOTHING;
+
+    GET DIAGNOSTICS inserted = ROW_COUNT;
+    RETURN inserted;
+END;
+$$;
+
+-- Server-side only: the anon key the browser sees must not write to the registry.
+REVOKE EXECUTE ON FUNCTION import_registry_entries(JSONB) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION import_registry_entries(JSONB) TO service_role;
@@ -0,0 +1,164 @@
+"""Shared Server-Sent Events broadcaster for live election results.
+
+One background thread polls the results board (which itself reads the
+database at most once per refresh interval) every ``interval`` seconds while
+at least one client is connected, and stamps every election whose tally
+changed with a new sequence number. Each SSE connection only waits on a
+condition variable and, when woken, sends the elections changed since the
+last sequence it saw - so any burst of votes reaches a client as at most one
+message per interval, and N viewers cost one poll per interval, not N.
+"""
+import json
+import threading
+import time
+
+
+def format_event(data, event=None, event_id=None):
+    """Encode one SSE message."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+class ResultsBroadcaster:
+    """Polls live tallies on one thread and fans out coalesced deltas to SSE clients."""
+
+    def __init__(self, load_tallies, load_summary=None, interval=2.0, heartbeat=15.0,
+                 max_clients=32, max_stream_seconds=600.0):
+        self.load_tallies = load_tallies  # () -> {election_id: ElectionTally}
+        self.load_summary = load_summary  # () -> dict of site-wide numbers (home page)
+        self.interval = interval
+        self.heartbeat = heartbeat
+        self.max_clients = max_clients
+        self.max_stream_seconds = max_stream_seconds
+
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._elections = {}  # election_id -> (seq, data)
+        self._summary = (0, None)
+        self._clients = 0
+        self._thread = None
+        self._last_poll = 0.0
+
+        self.polls = 0
+        self.messages_sent = 0
+        self.rejected = 0
+
+    # -------------------- POLLING --------------------
+    def poll(self):
+        """Read the current tallies and stamp whatever changed with a new sequence number."""
+        tallies = self.load_tallies()
+        summary = self.load_summary() if self.load_summary else None
+        with self._cond:
+            seq = self._seq + 1
+            changed = False
+            for eid, tally in tallies.items():
+                data = {"total": tally.total, "candidates": [[cid, votes] for cid, votes in tally.ranked()]}
+                old = self._elections.get(eid)
+                if old is None or old[1] != data:
+                    self._elections[eid] = (seq, data)
+                    changed = True
+            if summary is not None and summary != self._summary[1]:
+                self._summary = (seq, summary)
+                changed = True
+            if changed:
+                self._seq = seq
+                self._cond.notify_all()
+            self._last_poll = time.monotonic()
+            self.polls += 1
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._clients == 0:
+                    self._thread = None
+                    return
+            started = time.monotonic()
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"[LIVE_RESULTS] Poll failed: {e}")
+            time.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def _ensure_thread(self):
+        # Caller holds self._cond
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="live-results-poller", daemon=True)
+            self._thread.start()
+
+    # -------------------- CLIENTS --------------------
+    def _changes_since(self, client_seq):
+        # Caller holds self._cond
+        elections = {str(eid): data for eid, (seq, data) in self._elections.items() if seq > client_seq}
+        payload = {"seq": self._seq, "elections": elections}
+        if self._summary[1] is not None and self._summary[0] > client_seq:
+            payload["summary"] = self._summary[1]
+        return payload
+
+    def snapshot(self):
+        """Everything currently known, for clients that poll instead of streaming."""
+        if time.monotonic() - self._last_poll >= self.interval:
+            self.poll()
+        with self._cond:
+            return self._changes_since(0)
+
+    def try_acquire(self):
+        """Take a stream slot; False when ``max_clients`` streams are already open in this worker.
+
+        The check and the increment share one critical section, so concurrent
+        requests can never overshoot the cap. Every successful call must be
+        paired with one ``release()`` - the route ties it to the response's
+        close, which the WSGI server calls even for a stream never started.
+        """
+        with self._cond:
+            if self._clients >= self.max_clients:
+                self.rejected += 1
+                return False
+            self._clients += 1
+            self._ensure_thread()
+            return True
+
+    def release(self):
+        """Give back a slot taken by ``try_acquire()``."""
+        with self._cond:
+            self._clients = max(0, self._clients - 1)
+
+    def stream(self, last_seq=0):
+        """Yield SSE messages for one client holding a slot from ``try_acquire()``.
+
+        The stream ends after ``max_stream_seconds`` (EventSource reconnects
+        with Last-Event-ID) so worker threads are handed back regularly.
+        """
+        with self._cond:
+            # A sequence from a previous process run means nothing here
+            client_seq = last_seq if 0 <= last_seq <= self._seq else 0
+        yield "retry: 3000\n\n"
+        deadline = time.monotonic() + self.max_stream_seconds
+        while time.monotonic() < deadline:
+            with self._cond:
+                self._cond.wait_for(lambda: self._seq > client_seq, timeout=self.heartbeat)
+                if self._seq > client_seq:
+                    payload = self._changes_since(client_seq)
+                    client_seq = self._seq
+                else:
+                    payload = None
+            if payload is None:
+                yield ": ping\n\n"
+                continue
+            self.messages_sent += 1
+            yield format_event(payload, event="results", event_id=client_seq)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "clients": self._clients,
+                "seq": self._seq,
+                "polls": self.polls,
+                "messages_sent": self.messages_sent,
+                "rejected": self.rejected,
+                "interval_s": self.interval,
+            }
@@ -0,0 +1,293 @@
+"""Per-request backend instrumentation and Prometheus metrics.
+
+``InstrumentedRepository`` wraps the data-access layer: every call records its
+table, operation (the repository method), latency and an estimate of its
+payload size (JSON size of the arguments plus the result). Calls are
+attributed to the request being served through a context variable, which the
+fan-out executor copies into its worker threads; calls made outside a
+request (scheduler, counter flushes) are reported under ``background``.
+
+``Metrics`` aggregates them into per-route counters and histograms rendered in
+the Prometheus text format by ``/metrics``, and logs every request slower than
+``SLOW_REQUEST_MS`` with a breakdown of its backend calls, so loops that issue
+one call per row (N+1) stand out as ``candidates.update_candidate x12``.
+"""
+import contextvars
+import json
+import threading
+import time
+
+BACKGROUND_ROUTE = "background"
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CALLS_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+_INF_LABEL = 'le="+Inf"'
+
+_current_trace = contextvars.ContextVar("request_trace", default=None)
+
+# Repository method -> table, where the method name does not say it
+_TABLE_OVERRIDES = {
+    "set_registration_open": "settings",
+    "register_student": "profiles",
+    "release_registration": "profiles",
+    "delete_user": "profiles",
+    "voted_election_ids": "votes",
+    "cast_vote": "votes",
+    "apply_vote_increments": "candidates",
+    "rebuild_vote_counters": "candidates",
+    "mark_registered": "student_registry",
+}
+_TABLE_WORDS = {
+    "settings": "settings",
+    "profile": "profiles", "profiles": "profiles",
+    "election": "elections", "elections": "elections",
+    "candidate": "candidates", "candidates": "candidates",
+    "vote": "votes", "votes": "votes",
+    "registry": "student_registry",
+    "photo": "storage",
+    "sign": "auth", "password": "auth",
+}
+# Generic methods whose first argument names the table
+_TABLE_ARGUMENT = {"page_rows", "iter_rows", "count_rows"}
+
+
+def table_for(method, args, kwargs):
+    if method in _TABLE_ARGUMENT:
+        return str(kwargs.get("table", args[0] if args else "unknown"))
+    if method in _TABLE_OVERRIDES:
+        return _TABLE_OVERRIDES[method]
+    for word in method.split("_"):
+        if word in _TABLE_WORDS:
+            return _TABLE_WORDS[word]
+    return "unknown"
+
+
+def payload_size(value):
+    """Rough wire size of a call's arguments or result, in bytes."""
+    if value is None or isinstance(value, (bool, int, float)):
+        return 0
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, (dict, list, tuple, set)):
+        if not value:
+            return 0
+        try:
+            return len(json.dumps(value if not isinstance(value, set) else list(value), default=str))
+        except (TypeError, ValueError):
+            return 0
+    return 0  # generators, auth users, ...
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + list(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter per label set."""
+
+    def __init__(self, name, help_text, labels):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def values(self):
+        """``{label values: count}`` snapshot."""
+        with self._lock:
+            return dict(self._values)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_label_text(self.labels, label_values)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, as Prometheus expects."""
+
+    def __init__(self, name, help_text, labels, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}  # label values -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, label_values, value):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[len(self.buckets)] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_values, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series):
+                    le = _label_text(self.labels, label_values, [f'le="{_number(bound)}"'])
+                    lines.append(f"{self.name}_bucket{le} {count}")
+                le = _label_text(self.labels, label_values, [_INF_LABEL])
+                lines.append(f"{self.name}_bucket{le} {series[len(self.buckets)]}")
+                labels = _label_text(self.labels, label_values)
+                lines.append(f"{self.name}_sum{labels} {_number(series[-1])}")
+                lines.append(f"{self.name}_count{labels} {series[len(self.buckets)]}")
+        return lines
+
+
+class RequestTrace:
+    """Backend calls made while serving one request."""
+
+    def __init__(self, route, method):
+        self.route = route
+        self.method = method
+        self.started = time.perf_counter()
+        self.elapsed = None
+        self.calls = []  # (table, operation, seconds, bytes, error); list.append is thread-safe
+        self.finished = False
+
+    def summary(self, limit=5):
+        """``table.operation xN (ms)`` for the costliest operations, slowest first."""
+        grouped = {}
+        for table, operation, seconds, _, _ in self.calls:
+            count, total = grouped.get((table, operation), (0, 0.0))
+            grouped[(table, operation)] = (count + 1, total + seconds)
+        ranked = sorted(grouped.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+        return ", ".join(f"{t}.{op} x{n} ({total * 1000:.0f} ms)" for (t, op), (n, total) in ranked)
+
+
+class Metrics:
+    """Process-wide request and backend-call metrics."""
+
+    def __init__(self, slow_request_ms=500):
+        self.slow_request_ms = slow_request_ms
+        self.requests = Counter(
+            "voting_http_requests_total", "Requests served.", ("route", "method", "status"))
+        self.request_seconds = Histogram(
+            "voting_http_request_duration_seconds", "Time to build the response.", ("route", "method"),
+            DURATION_BUCKETS)
+        self.calls_per_request = Histogram(
+            "voting_backend_calls_per_request", "Backend calls made by one request.", ("route", "method"),
+            CALLS_BUCKETS)
+        self.backend_calls = Counter(
+            "voting_backend_calls_total", "Backend calls by route, table and operation.",
+            ("route", "table", "operation"))
+        self.backend_errors = Counter(
+            "voting_backend_errors_total", "Backend calls that raised.", ("table", "operation"))
+        self.backend_seconds = Histogram(
+            "voting_backend_call_duration_seconds", "Latency of one backend call.", ("table", "operation"),
+            DURATION_BUCKETS)
+        self.backend_bytes = Histogram(
+            "voting_backend_payload_bytes", "Estimated JSON size of a backend call's arguments and result.",
+            ("table", "operation"), BYTES_BUCKETS)
+        self.slow_requests = Counter(
+            "voting_slow_requests_total", "Requests slower than the slow-request threshold.", ("route", "method"))
+
+    # -------------------- requests --------------------
+    def start_request(self, route, method):
+        """Begin tracing a request; returns the trace and the token for ``end_request``."""
+        trace = RequestTrace(route, method)
+        return trace, _current_trace.set(trace)
+
+    def finish_request(self, trace, status):
+        """Record a finished request once (after_request, or teardown after an unhandled error)."""
+        if trace.finished:
+            return
+        trace.finished = True
+        elapsed = trace.elapsed = time.perf_counter() - trace.started
+        self.requests.inc((trace.route, trace.method, str(status)))
+        self.request_seconds.observe((trace.route, trace.method), elapsed)
+        self.calls_per_request.observe((trace.route, trace.method), len(trace.calls))
+        if self.slow_request_ms and elapsed * 1000 >= self.slow_request_ms:
+            self.slow_requests.inc((trace.route, trace.method))
+            backend = sum(call[2] for call in trace.calls)
+            print(
+                f"[SLOW] {trace.method} {trace.route} {elapsed * 1000:.0f} ms (status {status}), "
+                f"{len(trace.calls)} backend calls in {backend * 1000:.0f} ms"
+                + (f": {trace.summary()}" if trace.calls else "")
+            )
+
+    @staticmethod
+    def end_request(token):
+        _current_trace.reset(token)
+
+    # -------------------- backend calls --------------------
+    def record_call(self, table, operation, seconds, nbytes, error=False):
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.calls.append((table, operation, seconds, nbytes, error))
+        self.backend_calls.inc((trace.route if trace else BACKGROUND_ROUTE, table, operation))
+        self.backend_seconds.observe((table, operation), seconds)
+        self.backend_bytes.observe((table, operation), nbytes)
+        if error:
+            self.backend_errors.inc((table, operation))
+
+    def render(self):
+        lines = []
+        for metric in (
+            self.requests, self.request_seconds, self.calls_per_request, self.slow_requests,
+            self.backend_calls, self.backend_errors, self.backend_seconds, self.backend_bytes,
+        ):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class InstrumentedRepository:
+    """Delegates to ``repository`` and records every method call in ``metrics``.
+
+    For methods returning a generator (``iter_rows``) only the call itself is
+    timed, not the iteration.
+    """
+
+    def __init__(self, repository, metrics):
+        self._repository = repository
+        self._metrics = metrics
+        self._wrapped = {}
+
+    def __getattr__(self, name):
+        wrapped = self._wrapped.get(name)
+        if wrapped is not None:
+            return wrapped
+        attr = getattr(self._repository, name)
+        if not callable(attr) or name.startswith("_"):
+            return attr
+        metrics = self._metrics
+
+        def call(*args, **kwargs):
+            table = table_for(name, args, kwargs)
+            started = time.perf_counter()
+            try:
+                result = attr(*args, **kwargs)
+            except Exception:
+                metrics.record_call(table, name, time.perf_counter() - started,
+                                    payload_size(list(args)) + payload_size(kwargs), error=True)
+                raise
+            elapsed = time.perf_counter() - started
+            metrics.record_call(table, name, elapsed,
+                                payload_size(list(args)) + payload_size(kwargs) + payload_size(result))
+            return result
+
+        self._wrapped[name] = call
+        return call
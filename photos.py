@@ -0,0 +1,155 @@
+"""Candidate photo pipeline: stream, resize, re-encode, store by content hash.
+
+An upload is read in chunks (hashing as it goes) into a spooled temp file,
+decoded once and written out as fixed-size variants:
+
+* ``<name>.jpg`` / ``<name>.webp`` - at most ``FULL_SIZE`` px on the long side
+* ``<name>_thumb.jpg`` / ``<name>_thumb.webp`` - ``THUMB_SIZE`` px square crop,
+  twice the 96 px avatars of the vote page for high-DPI screens
+
+``<name>`` is derived from the SHA-256 of the original bytes, so the same
+image uploaded twice is processed and stored once. ``candidates.photo`` keeps
+the full JPEG URL; templates pick the variant they need with ``photo_variant``.
+"""
+import hashlib
+import io
+import os
+import re
+import tempfile
+
+CHUNK_SIZE = 64 * 1024
+FULL_SIZE = 640
+THUMB_SIZE = 192
+JPEG_QUALITY = 82
+WEBP_QUALITY = 78
+
+# <prefix>_<24 hex>.jpg as written by store_photo; anything else is a legacy URL
+_HASHED_NAME = re.compile(r"^(?P<base>.*/candidate_[0-9a-f]{24})\.jpg(?P<query>\?[^/]*)?$")
+_VARIANT_FILE = re.compile(r"(^|/)candidate_[0-9a-f]{24}(_thumb)?\.(jpg|webp)$")
+
+
+class PhotoError(ValueError):
+    """The upload is not a usable image (or is too large)."""
+
+
+def read_upload(stream, max_bytes):
+    """Copy ``stream`` into a spooled temp file in chunks; return ``(sha256 hex, file)``."""
+    digest = hashlib.sha256()
+    spool = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    size = 0
+    for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+        size += len(chunk)
+        if size > max_bytes:
+            spool.close()
+            raise PhotoError(f"Photo is larger than {max_bytes // (1024 * 1024)} MB.")
+        digest.update(chunk)
+        spool.write(chunk)
+    if not size:
+        spool.close()
+        raise PhotoError("Photo file is empty.")
+    spool.seek(0)
+    return digest.hexdigest(), spool
+
+
+def _encode(image, fmt, **options):
+    out = io.BytesIO()
+    image.save(out, fmt, **options)
+    return out.getvalue()
+
+
+def render_variants(fh):
+    """Decode the image in ``fh`` and return ``{suffix: (bytes, content_type)}`` for every variant."""
+    from PIL import Image, ImageOps
+
+    try:
+        image = Image.open(fh)
+        # JPEG can decode straight at a reduced scale, which is most of the work saved
+        image.draft("RGB", (FULL_SIZE, FULL_SIZE))
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ("RGBA", "LA", "P"):
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+    except Exception as e:
+        raise PhotoError(f"Unsupported image: {e}")
+
+    full = image.copy()
+    full.thumbnail((FULL_SIZE, FULL_SIZE), Image.LANCZOS)
+    thumb = ImageOps.fit(image, (THUMB_SIZE, THUMB_SIZE), Image.LANCZOS)
+
+    variants = {}
+    for suffix, img in (("", full), ("_thumb", thumb)):
+        variants[f"{suffix}.jpg"] = (
+            _encode(img, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True), "image/jpeg"
+        )
+        variants[f"{suffix}.webp"] = (_encode(img, "WEBP", quality=WEBP_QUALITY, method=4), "image/webp")
+    return variants
+
+
+def store_photo(repository, stream, max_bytes):
+    """Run an upload through the pipeline and return the URL of its full JPEG variant.
+
+    Nothing is decoded or uploaded when a photo with the same content is already stored.
+    """
+    digest, spool = read_upload(stream, max_bytes)
+    name = f"candidate_{digest[:24]}"
+    with spool:
+        existing = repository.find_photo(f"{name}.jpg")
+        if existing:
+            print(f"[PHOTOS] {name} already stored, reusing it")
+            return existing
+        variants = render_variants(spool)
+
+    url = None
+    # The full JPEG goes last: once it exists every other variant does too
+    for suffix in sorted(variants, key=lambda s: s == ".jpg"):
+        data, content_type = variants[suffix]
+        url = repository.upload_photo(f"{name}{suffix}", data, content_type)
+    print(f"[PHOTOS] Stored {name} ({', '.join(f'{s} {len(d) // 1024} KB' for s, (d, _) in variants.items())})")
+    return url
+
+
+def photo_variant(url, variant="thumb", fmt="jpg"):
+    """URL of one variant of a pipeline photo; legacy and external URLs are returned unchanged."""
+    match = _HASHED_NAME.match(url or "")
+    if not match:
+        return url
+    suffix = "_thumb" if variant == "thumb" else ""
+    return f"{match.group('base')}{suffix}.{fmt}{match.group('query') or ''}"
+
+
+def is_variant_file(path):
+    """True for a file written by ``store_photo``: its name is its content, so it never changes."""
+    return bool(_VARIANT_FILE.search(path or ""))
+
+
+def migrate_local_photos(repository, upload_folder, url_prefix="/static/uploads", max_bytes=10 * 1024 * 1024):
+    """Re-process candidates whose photo is a raw file in ``upload_folder`` and point them at the variants."""
+    migrated = 0
+    for candidate in repository.list_candidates(columns="id,photo"):
+        photo = candidate.get("photo") or ""
+        if not photo.startswith(url_prefix + "/") or _HASHED_NAME.match(photo):
+            continue
+        path = os.path.join(upload_folder, photo[len(url_prefix) + 1:])
+        if not os.path.isfile(path):
+            continue
+        try:
+            with open(path, "rb") as fh:
+                url = store_photo(repository, fh, max_bytes)
+        except PhotoError as e:
+            print(f"[PHOTOS] Skipping candidate {candidate['id']} ({photo}): {e}")
+            continue
+        repository.update_candidate(candidate["id"], {"photo": url})
+        migrated += 1
+    return migrated
+
+
+if __name__ == "__main__":
+    from repository import create_repository
+
+    folder = os.path.join(os.getcwd(), "static", "uploads")
+    count = migrate_local_photos(create_repository(upload_folder=folder), folder)
+    print(f"[PHOTOS] Migrated {count} candidate photos")
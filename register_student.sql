@@ -0,0 +1,81 @@
+-- ==============================================================================
+-- 🎓 ATOMIC REGISTER_STUDENT RPC
+-- Replaces the registry check, profile uniqueness check, profiles insert and
+-- registry is_registered update made one by one by register(). All four run in
+-- ONE transaction; the app's only other call is auth sign_up.
+-- release_registration undoes it when sign_up fails afterwards.
+-- ==============================================================================
+
+DROP FUNCTION IF EXISTS register_student CASCADE;
+DROP FUNCTION IF EXISTS release_registration CASCADE;
+
+-- Returns one of: 'ok', 'not_in_registry', 'already_registered', 'id_taken', 'email_taken'
+CREATE OR REPLACE FUNCTION register_student(
+    p_email TEXT,
+    p_name TEXT,
+    p_faculty TEXT,
+    p_university_id TEXT,
+    p_phone TEXT
+)
+RETURNS TEXT
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+    entry_registered BOOLEAN;
+BEGIN
+    -- 1. Whitelist check; the row lock serialises two attempts for the same student
+    SELECT is_registered INTO entry_registered
+    FROM student_registry
+    WHERE university_id = p_university_id AND phone = p_phone
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN 'not_in_registry';
+    END IF;
+    IF entry_registered THEN
+        RETURN 'already_registered';
+    END IF;
+
+    -- 2. University ID / email not used by another profile
+    IF EXISTS (SELECT 1 FROM profiles WHERE university_id = p_university_id) THEN
+        RETURN 'id_taken';
+    END IF;
+    IF EXISTS (SELECT 1 FROM profiles WHERE email = p_email) THEN
+        RETURN 'email_taken';
+    END IF;
+
+    -- 3. Profile (auto-verified, the student is in the registry) + registry flag
+    INSERT INTO profiles (email, name, faculty, university_id, phone, verified)
+    VALUES (p_email, p_name, p_faculty, p_university_id, p_phone, TRUE);
+
+    UPDATE student_registry SET is_registered = TRUE WHERE university_id = p_university_id;
+
+    RETURN 'ok';
+EXCEPTION
+    WHEN unique_violation THEN
+        -- A concurrent registration won the race for this email or ID
+        RETURN 'email_taken';
+END;
+$$;
+
+-- Compensation for a register_student whose auth sign_up then failed
+CREATE OR REPLACE FUNCTION release_registration(p_email TEXT, p_university_id TEXT)
+RETURNS VOID
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+BEGIN
+    DELETE FROM profiles WHERE email = p_email AND university_id = p_university_id;
+    IF FOUND THEN
+        UPDATE student_registry SET is_registered = FALSE WHERE university_id = p_university_id;
+    END IF;
+END;
+$$;
+
+-- Server-side only: both take the student's identity from the caller (release_registration
+-- deletes a profile), so the anon key the browser sees must not reach them.
+REVOKE EXECUTE ON FUNCTION register_student(TEXT, TEXT, TEXT, TEXT, TEXT) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION release_registration(TEXT, TEXT) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION register_student(TEXT, TEXT, TEXT, TEXT, TEXT) TO service_role;
+GRANT EXECUTE ON FUNCTION release_registration(TEXT, TEXT) TO service_role;
@@ -0,0 +1,284 @@
+"""Process-local eligibility index over ``student_registry`` for ``register()``.
+
+Keyed by the ``(university_id, phone)`` pair a student types, in one of two modes:
+
+* exact (``keep_entries=True``): a hash index of pair ->
+  ``{id, university_id, phone, is_registered}``; repeat registrations are
+  answered from memory.
+* bloom (``keep_entries=False``): only a Bloom filter (about 150 KB for 100k
+  students at 1% error) that rejects pairs certainly not in the registry, so
+  typos and guesses never reach the database; pairs it lets through are
+  confirmed against the database. For workers that cannot spare the memory.
+
+A dict probe is cheaper than the filter's hashing, so exact mode does not
+consult a filter at all.
+
+The index is loaded lazily and reloaded after ``ttl`` seconds so rows written
+by other workers show up; the registry routes in this process update it in
+place through ``add``/``update``/``remove``/``set_registered``.
+
+Being per process, the index can lag behind the table. Changes made through
+the app in any worker (imports, registry edits and deletes, user deletion)
+touch a stamp file shared by the workers of a host (``mark_changed``). While
+the stamp is the one seen at load the index is current, and its misses,
+filter rejects and "already registered" hits are final. Once the stamp has
+moved, those answers are left to the database until this worker has
+reloaded. Rows written outside the app (directly in Supabase) show up with
+the next ``ttl`` reload; ``trust_misses=False`` sends every miss to the
+database for deployments where that happens during registration.
+"""
+import hashlib
+import math
+import os
+import threading
+import time
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings using double hashing on one blake2b digest."""
+
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(1, int(capacity))
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.hash_count = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+def pair_key(university_id, phone):
+    return f"{university_id}\x1f{phone}"
+
+
+class RegistryIndex:
+    """Exact index or Bloom filter of registry pairs, rebuilt every ``ttl`` seconds."""
+
+    # Extra filter capacity so entries added in place do not push the error rate up
+    HEADROOM = 1.25
+
+    def __init__(self, load_entries, ttl=300.0, error_rate=0.01, keep_entries=True, stamp_path=None,
+                 trust_misses=True):
+        self.load_entries = load_entries
+        self.ttl = ttl
+        self.error_rate = error_rate
+        self.keep_entries = keep_entries
+        self.stamp_path = stamp_path
+        self.trust_misses = trust_misses
+
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._loaded_at = None
+        self._loaded_stamp = None
+        self._bloom = None
+        self._pairs = {}
+        self._by_id = {}
+        self._by_uid = {}
+
+        self.builds = 0
+        self.last_build_seconds = 0.0
+        self.bloom_rejects = 0
+        self.hits = 0
+        self.misses = 0
+        self.passthrough = 0
+        self.stale_lookups = 0
+
+    # -------------------- STAMP --------------------
+    def _read_stamp(self):
+        if not self.stamp_path:
+            return ""
+        try:
+            with open(self.stamp_path, encoding="utf-8") as fh:
+                return fh.read()
+        except FileNotFoundError:
+            return ""
+
+    def mark_changed(self):
+        """Tell every worker's index that a registry change may have made it wrong.
+
+        Call after applying the change in place: this index stays current
+        unless another change landed since it was loaded.
+        """
+        if not self.stamp_path:
+            return
+        with self._lock:
+            was_current = self._loaded_stamp is not None and self._loaded_stamp == self._read_stamp()
+            tmp = f"{self.stamp_path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as fh:
+                fh.write(f"{os.getpid()}:{time.time_ns()}")
+            os.replace(tmp, self.stamp_path)
+            if was_current:
+                self._loaded_stamp = self._read_stamp()
+
+    def is_current(self):
+        """True while no registry change was stamped since the index was loaded."""
+        return self._loaded_at is not None and self._loaded_stamp == self._read_stamp()
+
+    # -------------------- BUILD --------------------
+    def rebuild(self):
+        """Load every registry row and swap in a fresh filter and index."""
+        started = time.perf_counter()
+        # Read before loading: a change stamped during the load leaves the index stale
+        stamp = self._read_stamp()
+        rows = [
+            {
+                "id": r["id"],
+                "university_id": str(r["university_id"]),
+                "phone": str(r["phone"]),
+                "is_registered": bool(r.get("is_registered")),
+            }
+            for r in self.load_entries()
+        ]
+        bloom = None if self.keep_entries else BloomFilter(len(rows) * self.HEADROOM + 1000, self.error_rate)
+        pairs, by_id, by_uid = {}, {}, {}
+        for entry in rows:
+            if bloom is not None:
+                bloom.add(pair_key(entry["university_id"], entry["phone"]))
+            else:
+                pairs[(entry["university_id"], entry["phone"])] = entry
+                by_id[entry["id"]] = entry
+                by_uid[entry["university_id"]] = entry
+        with self._lock:
+            self._bloom, self._pairs, self._by_id, self._by_uid = bloom, pairs, by_id, by_uid
+            self._loaded_at = time.monotonic()
+            self._loaded_stamp = stamp
+            self.builds += 1
+            self.last_build_seconds = time.perf_counter() - started
+        print(f"[REGISTRY_INDEX] Loaded {len(rows)} entries in {self.last_build_seconds * 1000:.0f} ms")
+
+    def _needs_load(self):
+        loaded_at = self._loaded_at
+        return loaded_at is None or time.monotonic() - loaded_at >= self.ttl or not self.is_current()
+
+    def _ensure_loaded(self):
+        """Reload when expired or stale, one thread at a time.
+
+        While a reload runs, other requests keep using the old index (its
+        answers are checked against ``is_current``); only the very first load
+        makes them wait.
+        """
+        if not self._needs_load():
+            return
+        if not self._build_lock.acquire(blocking=self._loaded_at is None):
+            return
+        try:
+            if self._needs_load():
+                self.rebuild()
+        finally:
+            self._build_lock.release()
+
+    def invalidate(self):
+        """Force a reload on the next lookup."""
+        with self._lock:
+            self._loaded_at = None
+
+    # -------------------- LOOKUP --------------------
+    def lookup(self, university_id, phone):
+        """Return ``(found, entry)`` for a typed ID/phone pair.
+
+        ``found`` is True with the entry when the exact index knows the pair
+        (with ``is_registered`` only while the index is current), False when
+        the pair is not in the registry and the index is current, and None
+        when the database has to tell.
+        """
+        self._ensure_loaded()
+        current = self.is_current()
+        if not self.keep_entries:
+            if pair_key(university_id, phone) not in self._bloom:
+                self.bloom_rejects += 1
+                return (False, None) if self.trust_misses and current else (None, None)
+            self.passthrough += 1
+            return None, None
+        entry = self._pairs.get((university_id, phone))
+        if entry is None:
+            self.misses += 1
+            return (False, None) if self.trust_misses and current else (None, None)
+        self.hits += 1
+        entry = dict(entry)
+        if entry["is_registered"] and not current:
+            # Possibly released by another worker since the load
+            self.stale_lookups += 1
+            entry["is_registered"] = False
+        return True, entry
+
+    # -------------------- IN-PLACE UPDATES --------------------
+    def add(self, entry):
+        """Index a newly inserted registry row."""
+        if self._loaded_at is None:
+            return
+        entry = {
+            "id": entry.get("id"),
+            "university_id": str(entry["university_id"]),
+            "phone": str(entry["phone"]),
+            "is_registered": bool(entry.get("is_registered")),
+        }
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(pair_key(entry["university_id"], entry["phone"]))
+            else:
+                self._pairs[(entry["university_id"], entry["phone"])] = entry
+                self._by_uid[entry["university_id"]] = entry
+                if entry["id"] is not None:
+                    self._by_id[entry["id"]] = entry
+
+    def update(self, entry_id, university_id, phone):
+        """Re-key an edited registry row (a filter keeps the old pair; the database rejects it)."""
+        if self._loaded_at is None:
+            return
+        with self._lock:
+            old = self._by_id.pop(entry_id, None)
+            if old:
+                self._pairs.pop((old["university_id"], old["phone"]), None)
+                self._by_uid.pop(old["university_id"], None)
+        self.add({
+            "id": entry_id, "university_id": university_id, "phone": phone,
+            "is_registered": old["is_registered"] if old else False,
+        })
+
+    def remove(self, entry_id):
+        """Drop a deleted registry row from the exact index (a filter cannot forget it)."""
+        with self._lock:
+            old = self._by_id.pop(entry_id, None)
+            if old:
+                self._pairs.pop((old["university_id"], old["phone"]), None)
+                self._by_uid.pop(old["university_id"], None)
+
+    def set_registered(self, university_id, registered=True):
+        with self._lock:
+            entry = self._by_uid.get(str(university_id))
+            if entry:
+                entry["is_registered"] = registered
+
+    def stats(self):
+        bloom = self._bloom
+        return {
+            "loaded": self._loaded_at is not None,
+            "current": self.is_current(),
+            "trust_misses": self.trust_misses,
+            "mode": "exact" if self.keep_entries else "bloom",
+            "entries": len(self._pairs) if self.keep_entries else (bloom.count if bloom else 0),
+            "bloom_bytes": len(bloom.bits) if bloom else 0,
+            "bloom_hashes": bloom.hash_count if bloom else 0,
+            "builds": self.builds,
+            "last_build_ms": round(self.last_build_seconds * 1000, 1),
+            "bloom_rejects": self.bloom_rejects,
+            "hits": self.hits,
+            "misses": self.misses,
+            "passthrough": self.passthrough,
+            "stale_lookups": self.stale_lookups,
+        }
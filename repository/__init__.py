@@ -0,0 +1,43 @@
+"""Pluggable data-access layer.
+
+``create_repository()`` picks the backend from ``config.DATA_BACKEND``:
+
+* ``supabase`` (default) - the hosted Supabase project.
+* ``sqlite`` - a local SQLite file (``SQLITE_PATH``) or ``:memory:`` database
+  following ``release.sql``; used for offline stations and benchmarking.
+"""
+from .base import (
+    PAGE_FILTER_COLUMNS, PAGE_SEARCH_COLUMNS, PAGE_SORT_COLUMNS, REGISTER_ALREADY_REGISTERED,
+    REGISTER_EMAIL_TAKEN, REGISTER_ID_TAKEN, REGISTER_NOT_IN_REGISTRY, REGISTER_OK, VOTE_ALREADY_CAST,
+    VOTE_ENDED, VOTE_NOT_FOUND, VOTE_NOT_STARTED, VOTE_OK, AuthUser, Repository,
+)
+from .sqlite_backend import SqliteRepository
+from .supabase_backend import SupabaseRepository
+
+
+def create_repository(backend=None, upload_folder=None):
+    """Build the repository configured in ``config.py`` (or the one named by ``backend``)."""
+    import config
+
+    backend = (backend or config.DATA_BACKEND).lower()
+    if backend == "sqlite":
+        repo = SqliteRepository(config.SQLITE_PATH, upload_folder=upload_folder)
+        if config.LOCAL_ADMIN_PASSWORD:
+            repo.set_password("admin@gsu.edu", config.LOCAL_ADMIN_PASSWORD)
+        return repo
+    if backend == "supabase":
+        return SupabaseRepository(
+            config.create_supabase_pool(),
+            supabase_url=config.SUPABASE_URL or "",
+            bucket_name=config.BUCKET_NAME,
+        )
+    raise ValueError(f"Unknown DATA_BACKEND: {backend!r} (expected 'supabase' or 'sqlite')")
+
+
+__all__ = [
+    "AuthUser", "Repository", "SqliteRepository", "SupabaseRepository", "create_repository",
+    "VOTE_OK", "VOTE_NOT_FOUND", "VOTE_NOT_STARTED", "VOTE_ENDED", "VOTE_ALREADY_CAST",
+    "REGISTER_OK", "REGISTER_NOT_IN_REGISTRY", "REGISTER_ALREADY_REGISTERED", "REGISTER_ID_TAKEN",
+    "REGISTER_EMAIL_TAKEN",
+    "PAGE_SORT_COLUMNS", "PAGE_FILTER_COLUMNS", "PAGE_SEARCH_COLUMNS",
+]
@@ -0,0 +1,278 @@
+"""Abstract data-access interface shared by every backend.
+
+Each method maps onto one of the queries the routes in ``app.py`` used to
+build inline against the Supabase client. Rows are plain dicts shaped like
+the PostgREST responses (column name -> value), so templates do not care
+which backend produced them.
+"""
+
+# Outcomes of Repository.cast_vote (same strings the cast_vote SQL function returns)
+VOTE_OK = "ok"
+VOTE_NOT_FOUND = "not_found"
+VOTE_NOT_STARTED = "not_started"
+VOTE_ENDED = "ended"
+VOTE_ALREADY_CAST = "already_voted"
+
+# Outcomes of Repository.register_student (same strings register_student.sql returns)
+REGISTER_OK = "ok"
+REGISTER_NOT_IN_REGISTRY = "not_in_registry"
+REGISTER_ALREADY_REGISTERED = "already_registered"
+REGISTER_ID_TAKEN = "id_taken"
+REGISTER_EMAIL_TAKEN = "email_taken"
+
+# Keyset-paginated admin listings (Repository.page_rows): per table, the columns
+# that may be sorted on, the equality filters with their types, and the text
+# columns a search term is matched against. Rows are always tie-broken by id.
+PAGE_SORT_COLUMNS = {
+    "votes": {"id", "voted_at", "email", "election_id", "candidate_id"},
+    "profiles": {"id", "created_at", "email", "name", "university_id", "faculty", "verified"},
+    "student_registry": {"id", "created_at", "university_id", "full_name", "phone", "is_registered"},
+}
+PAGE_FILTER_COLUMNS = {
+    "votes": {"election_id": int, "candidate_id": int, "email": str},
+    "profiles": {"verified": bool, "faculty": str},
+    "student_registry": {"is_registered": bool},
+}
+PAGE_SEARCH_COLUMNS = {
+    "votes": ("email",),
+    "profiles": ("email", "name", "university_id", "phone"),
+    "student_registry": ("university_id", "full_name", "phone"),
+}
+
+
+def validate_page_args(table, sort, filters):
+    """Raise ValueError unless ``table``/``sort``/``filters`` are in the allow-lists above."""
+    if table not in PAGE_SORT_COLUMNS:
+        raise ValueError(f"Table {table!r} cannot be paged")
+    if sort not in PAGE_SORT_COLUMNS[table]:
+        raise ValueError(f"Cannot sort {table} by {sort!r}")
+    unknown = set(filters or {}) - set(PAGE_FILTER_COLUMNS[table])
+    if unknown:
+        raise ValueError(f"Cannot filter {table} by {', '.join(sorted(unknown))}")
+
+
+class AuthUser:
+    """Minimal user object returned by ``sign_in`` (mirrors Supabase's User)."""
+
+    def __init__(self, id, email):
+        self.id = id
+        self.email = email
+
+    def __repr__(self):
+        return f"AuthUser(id={self.id!r}, email={self.email!r})"
+
+
+class Repository:
+    """Base class for data-access backends. Subclasses implement every method."""
+
+    name = "base"
+
+    # -------------------- SETTINGS --------------------
+    def get_settings(self):
+        """Return the global settings row (id=1) as a dict, or None."""
+        raise NotImplementedError
+
+    def set_registration_open(self, is_open: bool):
+        """Create or update the settings row with the new registration flag."""
+        raise NotImplementedError
+
+    # -------------------- PROFILES --------------------
+    def get_profile(self, email: str):
+        """Return the profile row for ``email`` or None."""
+        raise NotImplementedError
+
+    def profile_exists_for_university_id(self, university_id: str) -> bool:
+        """True if a profile already uses this university ID."""
+        raise NotImplementedError
+
+    def create_profile(self, profile: dict):
+        """Insert a new profile row."""
+        raise NotImplementedError
+
+    def count_profiles(self) -> int:
+        """Return the number of profile rows without fetching them."""
+        raise NotImplementedError
+
+    def verify_profiles(self, emails):
+        """Set ``verified = TRUE`` for all given emails."""
+        raise NotImplementedError
+
+    def delete_user(self, email: str):
+        """Remove a voter's votes and profile and release their registry entry.
+
+        Returns the released university ID, or None if the voter had no profile.
+        """
+        raise NotImplementedError
+
+    # -------------------- ELECTIONS --------------------
+    def list_elections(self, newest_first=False, statuses=None):
+        """Return elections, optionally only those whose stored ``status`` is in ``statuses``.
+
+        With ``newest_first`` the rows are ordered by start_time descending.
+        """
+        raise NotImplementedError
+
+    def list_recent_closed_elections(self, limit):
+        """Return at most ``limit`` elections stored as 'Closed', most recently ended first."""
+        raise NotImplementedError
+
+    def set_election_status(self, election_id, status):
+        """Store the election's current status (kept up to date by the scheduler)."""
+        raise NotImplementedError
+
+    def create_election_with_candidates(self, title, description, start_time, end_time, candidates):
+        """Atomically create an election and its candidates."""
+        raise NotImplementedError
+
+    def update_election(self, election_id, data: dict):
+        """Update election columns."""
+        raise NotImplementedError
+
+    def delete_election(self, election_id):
+        """Delete an election (cascades to candidates and votes)."""
+        raise NotImplementedError
+
+    # -------------------- CANDIDATES --------------------
+    def list_candidates(self, columns="*", election_ids=None):
+        """Return candidates, optionally restricted to the given elections."""
+        raise NotImplementedError
+
+    def top_candidates(self, limit, columns="id,name,photo,votes"):
+        """Return the ``limit`` candidates with the most votes, highest first."""
+        raise NotImplementedError
+
+    def list_candidates_with_election_title(self):
+        """Return candidates with an embedded ``elections: {title}`` dict."""
+        raise NotImplementedError
+
+    def create_candidate(self, data: dict):
+        """Insert a candidate row."""
+        raise NotImplementedError
+
+    def update_candidate(self, candidate_id, data: dict):
+        """Update candidate columns."""
+        raise NotImplementedError
+
+    def delete_candidate(self, candidate_id):
+        """Delete a candidate together with the votes cast for them."""
+        raise NotImplementedError
+
+    # -------------------- VOTES --------------------
+    def count_votes(self) -> int:
+        """Return the number of vote rows without fetching them."""
+        raise NotImplementedError
+
+    def votes_after(self, after_id, limit):
+        """Up to ``limit`` ``{id, candidate_id}`` rows with ``id > after_id``, in id order."""
+        rows = self.page_rows("votes", sort="id", after=(after_id, after_id), limit=limit)
+        return [{"id": r["id"], "candidate_id": r["candidate_id"]} for r in rows]
+
+    def voted_election_ids(self, email: str):
+        """Return the set of election ids this voter has already voted in."""
+        raise NotImplementedError
+
+    def cast_vote(self, email, candidate_id, now=None, bump_counter=True):
+        """Validate and record a ballot atomically; return one of the ``VOTE_*`` outcomes.
+
+        ``now`` is the naive timestamp the election window is checked against
+        (defaults to the backend's clock). With ``bump_counter=False`` only the
+        ballot row is written and the caller batches the counter update.
+        """
+        raise NotImplementedError
+
+    def apply_vote_increments(self, increments: dict):
+        """Add ``{candidate_id: n}`` to ``candidates.votes`` in one batched statement."""
+        raise NotImplementedError
+
+    def rebuild_vote_counters(self):
+        """Recount ``candidates.votes`` for every candidate from the ``votes`` table."""
+        raise NotImplementedError
+
+    # -------------------- STUDENT REGISTRY --------------------
+    def find_registry_entry(self, university_id, phone):
+        """Return the registry row matching both ID and phone, or None."""
+        raise NotImplementedError
+
+    def mark_registered(self, university_id):
+        """Flag the registry entry for this university ID as registered."""
+        raise NotImplementedError
+
+    def insert_registry_entries(self, records):
+        """Insert a batch of registry rows."""
+        raise NotImplementedError
+
+    def existing_registry_keys(self, university_ids, phones):
+        """Return ``(ids, phones)``: the given IDs and phones already present in the registry."""
+        raise NotImplementedError
+
+    def upsert_registry_entries(self, records):
+        """Insert registry rows, silently skipping ones that conflict. Returns the number inserted."""
+        raise NotImplementedError
+
+    def register_student(self, email, name, faculty, university_id, phone):
+        """Check the registry and profiles, create the verified profile and mark the entry
+        registered, all atomically; return one of the ``REGISTER_*`` outcomes."""
+        raise NotImplementedError
+
+    def release_registration(self, email, university_id):
+        """Undo ``register_student`` (delete the profile, unmark the entry) when sign-up fails."""
+        raise NotImplementedError
+
+    def update_registry_entry(self, entry_id, data: dict):
+        """Update one registry row."""
+        raise NotImplementedError
+
+    def delete_registry_entry(self, entry_id):
+        """Delete one registry row."""
+        raise NotImplementedError
+
+    # -------------------- ADMIN LISTINGS --------------------
+    def page_rows(self, table, sort="id", descending=False, after=None, limit=50, filters=None, search=None):
+        """Return one keyset page of ``table`` ordered by ``(sort, id)``.
+
+        ``after`` is the ``(sort_value, id)`` pair of the last row of the
+        previous page, ``filters`` maps columns to required values and
+        ``search`` is matched case-insensitively against the table's search
+        columns. See ``PAGE_*`` above for what is allowed.
+        """
+        raise NotImplementedError
+
+    def iter_rows(self, table, batch_size=1000, filters=None):
+        """Yield every row of a pageable table in id order, ``batch_size`` rows per query."""
+        after = None
+        while True:
+            rows = self.page_rows(table, sort="id", after=after, limit=batch_size, filters=filters)
+            yield from rows
+            if len(rows) < batch_size:
+                return
+            after = (rows[-1]["id"], rows[-1]["id"])
+
+    def count_rows(self, table, filters=None) -> int:
+        """Count rows of ``table`` matching the equality ``filters`` without fetching them."""
+        raise NotImplementedError
+
+    # -------------------- AUTH --------------------
+    def sign_up(self, email, password):
+        """Create an auth user."""
+        raise NotImplementedError
+
+    def sign_in(self, email, password):
+        """Return an ``AuthUser``-like object or raise on invalid credentials."""
+        raise NotImplementedError
+
+    def sign_out(self):
+        """End the backend auth session (no-op where sessions are not kept)."""
+        raise NotImplementedError
+
+    def send_password_reset(self, email, redirect_to):
+        """Send a password reset link to ``email``."""
+        raise NotImplementedError
+
+    # -------------------- STORAGE --------------------
+    def upload_photo(self, path, data: bytes, content_type):
+        """Store a candidate photo and return its public URL (or None)."""
+        raise NotImplementedError
+
+    def find_photo(self, path):
+        """Return the public URL of an already stored photo, or None if there is none."""
+        raise NotImplementedError
@@ -0,0 +1,618 @@
+"""Local SQLite / in-memory implementation of the data-access layer.
+
+The schema follows ``release.sql`` + ``student_registry.sql`` (with the later
+``add_phone_to_profiles.sql`` / settings migrations folded in), translated to
+SQLite types. It is used for offline polling stations and for profiling the
+routes without a live Supabase project.
+"""
+import hashlib
+import os
+import secrets
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timezone
+
+from .base import (
+    PAGE_SEARCH_COLUMNS, REGISTER_ALREADY_REGISTERED, REGISTER_EMAIL_TAKEN, REGISTER_ID_TAKEN,
+    REGISTER_NOT_IN_REGISTRY, REGISTER_OK, VOTE_ALREADY_CAST, VOTE_ENDED, VOTE_NOT_FOUND, VOTE_NOT_STARTED,
+    VOTE_OK, AuthUser, Repository, validate_page_args,
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    id TEXT PRIMARY KEY,
+    email TEXT NOT NULL UNIQUE,
+    name TEXT,
+    faculty TEXT,
+    university_id TEXT UNIQUE,
+    phone TEXT,
+    verified INTEGER DEFAULT 0,
+    created_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS elections (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    description TEXT,
+    start_time TEXT NOT NULL,
+    end_time TEXT NOT NULL,
+    status TEXT DEFAULT 'Upcoming',
+    winner_message TEXT
+);
+
+CREATE TABLE IF NOT EXISTS candidates (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    election_id INTEGER NOT NULL REFERENCES elections(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    motto TEXT,
+    photo TEXT,
+    bio TEXT,
+    department TEXT,
+    year_level TEXT,
+    manifesto TEXT,
+    votes INTEGER DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS votes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    email TEXT NOT NULL,
+    election_id INTEGER NOT NULL REFERENCES elections(id) ON DELETE CASCADE,
+    candidate_id INTEGER NOT NULL REFERENCES candidates(id) ON DELETE CASCADE,
+    voted_at TEXT,
+    UNIQUE(email, election_id)
+);
+
+CREATE TABLE IF NOT EXISTS student_registry (
+    id TEXT PRIMARY KEY,
+    university_id TEXT UNIQUE NOT NULL,
+    full_name TEXT NOT NULL,
+    phone TEXT UNIQUE NOT NULL,
+    is_registered INTEGER DEFAULT 0,
+    created_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS settings (
+    id INTEGER PRIMARY KEY,
+    university_name TEXT DEFAULT 'Global Science University',
+    registration_open INTEGER DEFAULT 1,
+    maintenance_mode INTEGER DEFAULT 0,
+    election_end TEXT
+);
+
+-- Stand-in for Supabase Auth
+CREATE TABLE IF NOT EXISTS auth_users (
+    id TEXT PRIMARY KEY,
+    email TEXT NOT NULL UNIQUE,
+    password_hash TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_candidates_election ON candidates(election_id);
+CREATE INDEX IF NOT EXISTS idx_elections_status ON elections(status);
+CREATE INDEX IF NOT EXISTS idx_votes_candidate ON votes(candidate_id);
+
+INSERT OR IGNORE INTO settings (id, university_name, registration_open, maintenance_mode)
+VALUES (1, 'Global Science University', 1, 0);
+
+INSERT OR IGNORE INTO profiles (id, email, name, faculty, university_id, verified, created_at)
+VALUES (lower(hex(randomblob(16))), 'admin@gsu.edu', 'System Admin', 'Administration', 'ADMIN-001', 1, datetime('now'));
+"""
+
+# Columns stored as INTEGER 0/1 that PostgREST would return as booleans
+BOOL_COLUMNS = {"verified", "is_registered", "registration_open", "maintenance_mode"}
+
+TABLE_COLUMNS = {
+    "profiles": {"id", "email", "name", "faculty", "university_id", "phone", "verified", "created_at"},
+    "elections": {"id", "title", "description", "start_time", "end_time", "status", "winner_message"},
+    "candidates": {"id", "election_id", "name", "motto", "photo", "bio", "department", "year_level", "manifesto", "votes"},
+    "votes": {"id", "email", "election_id", "candidate_id", "voted_at"},
+    "student_registry": {"id", "university_id", "full_name", "phone", "is_registered", "created_at"},
+    "settings": {"id", "university_name", "registration_open", "maintenance_mode", "election_end"},
+    "auth_users": {"id", "email", "password_hash"},
+}
+
+
+def utc_now_iso():
+    return datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
+
+
+def normalize_timestamp(value):
+    """Store timestamps the way Postgres returns TIMESTAMP columns (``YYYY-MM-DDTHH:MM:SS``)."""
+    if not value:
+        return value
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).replace(tzinfo=None).isoformat()
+    except ValueError:
+        return value
+
+
+# PBKDF2 rounds for local auth_users; benchmarks lower it (Supabase hashes on its auth server)
+PASSWORD_ITERATIONS = 100_000
+
+
+def hash_password(password, salt=None):
+    salt = salt or secrets.token_hex(16)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt.encode(), PASSWORD_ITERATIONS).hex()
+    return f"{salt}${digest}"
+
+
+def check_password(password, stored):
+    salt, _, _ = stored.partition("$")
+    return secrets.compare_digest(hash_password(password, salt), stored)
+
+
+class SqliteRepository(Repository):
+    """Single-connection SQLite backend. ``path=':memory:'`` keeps everything in RAM."""
+
+    name = "sqlite"
+
+    def __init__(self, path=":memory:", upload_folder=None, upload_url_prefix="/static/uploads"):
+        self.path = path
+        self.upload_folder = upload_folder
+        self.upload_url_prefix = upload_url_prefix.rstrip("/")
+        # Flask may serve requests from several threads; serialise access to the one connection
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        if path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(SCHEMA)
+
+    # -------------------- INTERNAL HELPERS --------------------
+    def _row(self, row):
+        if row is None:
+            return None
+        data = dict(row)
+        for key in BOOL_COLUMNS.intersection(data):
+            if data[key] is not None:
+                data[key] = bool(data[key])
+        return data
+
+    def _query(self, sql, params=()):
+        with self.lock:
+            return [self._row(r) for r in self.conn.execute(sql, params).fetchall()]
+
+    def _query_one(self, sql, params=()):
+        rows = self._query(sql, params)
+        return rows[0] if rows else None
+
+    def _execute(self, sql, params=()):
+        with self.lock:
+            return self.conn.execute(sql, params)
+
+    def _columns(self, table, columns):
+        """Translate a PostgREST-style column list into a safe SQL column list."""
+        if not columns or columns.strip() == "*":
+            return "*"
+        names = [c.strip() for c in columns.split(",") if c.strip()]
+        unknown = [n for n in names if n not in TABLE_COLUMNS[table]]
+        if unknown:
+            raise ValueError(f"Unknown column(s) for {table}: {', '.join(unknown)}")
+        return ", ".join(names)
+
+    def _update(self, table, data, where, params):
+        data = {k: v for k, v in data.items() if k in TABLE_COLUMNS[table]}
+        if not data:
+            return
+        assignments = ", ".join(f"{k} = ?" for k in data)
+        self._execute(f"UPDATE {table} SET {assignments} WHERE {where}", (*data.values(), *params))
+
+    def _insert(self, table, data):
+        data = {k: v for k, v in data.items() if k in TABLE_COLUMNS[table]}
+        cols = ", ".join(data)
+        marks = ", ".join("?" for _ in data)
+        return self._execute(f"INSERT INTO {table} ({cols}) VALUES ({marks})", tuple(data.values()))
+
+    # -------------------- SETTINGS --------------------
+    def get_settings(self):
+        return self._query_one("SELECT * FROM settings WHERE id = 1")
+
+    def set_registration_open(self, is_open):
+        self._execute(
+            "INSERT INTO settings (id, registration_open) VALUES (1, ?) "
+            "ON CONFLICT(id) DO UPDATE SET registration_open = excluded.registration_open",
+            (int(bool(is_open)),),
+        )
+
+    # -------------------- PROFILES --------------------
+    def get_profile(self, email):
+        return self._query_one("SELECT * FROM profiles WHERE email = ?", (email,))
+
+    def profile_exists_for_university_id(self, university_id):
+        return self._query_one("SELECT id FROM profiles WHERE university_id = ?", (university_id,)) is not None
+
+    def create_profile(self, profile):
+        row = dict(profile)
+        row.setdefault("id", str(uuid.uuid4()))
+        row.setdefault("created_at", utc_now_iso())
+        self._insert("profiles", row)
+
+    def _count(self, table):
+        with self.lock:
+            return self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def count_profiles(self):
+        return self._count("profiles")
+
+    def verify_profiles(self, emails):
+        emails = list(emails)
+        if not emails:
+            return
+        marks = ", ".join("?" for _ in emails)
+        self._execute(f"UPDATE profiles SET verified = 1 WHERE email IN ({marks})", tuple(emails))
+
+    def delete_user(self, email):
+        with self.lock:
+            self.conn.execute("BEGIN")
+            try:
+                row = self.conn.execute("SELECT university_id FROM profiles WHERE email = ?", (email,)).fetchone()
+                university_id = row[0] if row else None
+                if university_id:
+                    self.conn.execute(
+                        "UPDATE student_registry SET is_registered = 0 WHERE university_id = ?", (university_id,)
+                    )
+                self.conn.execute("DELETE FROM votes WHERE email = ?", (email,))
+                self.conn.execute("DELETE FROM profiles WHERE email = ?", (email,))
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return university_id
+
+    # -------------------- ELECTIONS --------------------
+    def list_elections(self, newest_first=False, statuses=None):
+        sql, params = "SELECT * FROM elections", ()
+        if statuses is not None:
+            params = tuple(statuses)
+            if not params:
+                return []
+            sql += f" WHERE status IN ({', '.join('?' for _ in params)})"
+        if newest_first:
+            sql += " ORDER BY start_time DESC"
+        return self._query(sql, params)
+
+    def list_recent_closed_elections(self, limit):
+        return self._query(
+            "SELECT * FROM elections WHERE status = 'Closed' ORDER BY end_time DESC LIMIT ?", (limit,)
+        )
+
+    def set_election_status(self, election_id, status):
+        self._execute("UPDATE elections SET status = ? WHERE id = ? AND status IS NOT ?", (status, election_id, status))
+
+    def create_election_with_candidates(self, title, description, start_time, end_time, candidates):
+        with self.lock:
+            self.conn.execute("BEGIN")
+            try:
+                cur = self.conn.execute(
+                    "INSERT INTO elections (title, description, start_time, end_time, status) "
+                    "VALUES (?, ?, ?, ?, 'Upcoming')",
+                    (title, description, normalize_timestamp(start_time), normalize_timestamp(end_time)),
+                )
+                election_id = cur.lastrowid
+                for c in candidates:
+                    self.conn.execute(
+                        "INSERT INTO candidates (election_id, name, motto, photo, bio, department, year_level, manifesto) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (
+                            election_id, c.get("name"), c.get("motto"), c.get("photo"), c.get("bio"),
+                            c.get("department"), c.get("year_level"), c.get("manifesto"),
+                        ),
+                    )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return election_id
+
+    def update_election(self, election_id, data):
+        data = dict(data)
+        for key in ("start_time", "end_time"):
+            if key in data:
+                data[key] = normalize_timestamp(data[key])
+        self._update("elections", data, "id = ?", (election_id,))
+
+    def delete_election(self, election_id):
+        self._execute("DELETE FROM elections WHERE id = ?", (election_id,))
+
+    # -------------------- CANDIDATES --------------------
+    def list_candidates(self, columns="*", election_ids=None):
+        sql = f"SELECT {self._columns('candidates', columns)} FROM candidates"
+        if election_ids is None:
+            return self._query(sql)
+        election_ids = list(election_ids)
+        if not election_ids:
+            return []
+        marks = ", ".join("?" for _ in election_ids)
+        return self._query(f"{sql} WHERE election_id IN ({marks})", tuple(election_ids))
+
+    def top_candidates(self, limit, columns="id,name,photo,votes"):
+        return self._query(
+            f"SELECT {self._columns('candidates', columns)} FROM candidates ORDER BY votes DESC LIMIT ?", (limit,)
+        )
+
+    def list_candidates_with_election_title(self):
+        rows = self._query(
+            "SELECT c.*, e.title AS election_title FROM candidates c "
+            "LEFT JOIN elections e ON e.id = c.election_id"
+        )
+        for r in rows:
+            title = r.pop("election_title")
+            r["elections"] = {"title": title} if title is not None else None
+        return rows
+
+    def create_candidate(self, data):
+        return self._insert("candidates", data).lastrowid
+
+    def update_candidate(self, candidate_id, data):
+        self._update("candidates", data, "id = ?", (candidate_id,))
+
+    def delete_candidate(self, candidate_id):
+        # votes rows go with the candidate through ON DELETE CASCADE
+        self._execute("DELETE FROM candidates WHERE id = ?", (candidate_id,))
+
+    # -------------------- VOTES --------------------
+    def count_votes(self):
+        return self._count("votes")
+
+    def votes_after(self, after_id, limit):
+        return self._query(
+            "SELECT id, candidate_id FROM votes WHERE id > ? ORDER BY id LIMIT ?", (after_id, limit)
+        )
+
+    def voted_election_ids(self, email):
+        return {r["election_id"] for r in self._query("SELECT election_id FROM votes WHERE email = ?", (email,))}
+
+    def cast_vote(self, email, candidate_id, now=None, bump_counter=True):
+        check_time = (now or datetime.now()).replace(tzinfo=None)
+        with self.lock:
+            # IMMEDIATE takes the database write lock before the window check, so the
+            # ballot and the counter bump commit together; duplicates are caught by
+            # UNIQUE(email, election_id) + ON CONFLICT DO NOTHING, as in cast_vote.sql
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute(
+                    "SELECT c.election_id, e.start_time, e.end_time FROM candidates c "
+                    "JOIN elections e ON e.id = c.election_id WHERE c.id = ?",
+                    (candidate_id,),
+                ).fetchone()
+                if row is None:
+                    outcome = VOTE_NOT_FOUND
+                elif check_time < datetime.fromisoformat(row["start_time"]):
+                    outcome = VOTE_NOT_STARTED
+                elif check_time > datetime.fromisoformat(row["end_time"]):
+                    outcome = VOTE_ENDED
+                else:
+                    cur = self.conn.execute(
+                        "INSERT INTO votes (email, candidate_id, election_id, voted_at) VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT(email, election_id) DO NOTHING",
+                        (email, candidate_id, row["election_id"], utc_now_iso()),
+                    )
+                    if cur.rowcount == 0:
+                        outcome = VOTE_ALREADY_CAST
+                    else:
+                        if bump_counter:
+                            self.conn.execute("UPDATE candidates SET votes = votes + 1 WHERE id = ?", (candidate_id,))
+                        outcome = VOTE_OK
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return outcome
+
+    def apply_vote_increments(self, increments):
+        with self.lock:
+            self.conn.execute("BEGIN")
+            try:
+                self.conn.executemany(
+                    "UPDATE candidates SET votes = votes + ? WHERE id = ?",
+                    [(n, cid) for cid, n in increments.items()],
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def rebuild_vote_counters(self):
+        self._execute(
+            "UPDATE candidates SET votes = (SELECT COUNT(*) FROM votes v WHERE v.candidate_id = candidates.id)"
+        )
+
+    # -------------------- STUDENT REGISTRY --------------------
+    def find_registry_entry(self, university_id, phone):
+        return self._query_one(
+            "SELECT * FROM student_registry WHERE university_id = ? AND phone = ?", (university_id, phone)
+        )
+
+    def mark_registered(self, university_id):
+        self._execute("UPDATE student_registry SET is_registered = 1 WHERE university_id = ?", (university_id,))
+
+    def _registry_rows(self, records):
+        now = utc_now_iso()
+        return [
+            (
+                r.get("id") or str(uuid.uuid4()), r["university_id"], r["full_name"], r["phone"],
+                int(bool(r.get("is_registered", False))), r.get("created_at") or now,
+            )
+            for r in records
+        ]
+
+    def _insert_registry_rows(self, verb, rows):
+        with self.lock:
+            before = self.conn.total_changes
+            self.conn.execute("BEGIN")
+            try:
+                self.conn.executemany(
+                    f"{verb} INTO student_registry (id, university_id, full_name, phone, is_registered, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            return self.conn.total_changes - before
+
+    def insert_registry_entries(self, records):
+        self._insert_registry_rows("INSERT", self._registry_rows(records))
+
+    def existing_registry_keys(self, university_ids, phones):
+        university_ids, phones = list(university_ids), list(phones)
+        with self.lock:
+            ids = set()
+            # Stay under SQLite's bound-parameter limit for very large chunks
+            for i in range(0, len(university_ids), 500):
+                part = university_ids[i:i + 500]
+                marks = ", ".join("?" * len(part))
+                ids.update(r[0] for r in self.conn.execute(
+                    f"SELECT university_id FROM student_registry WHERE university_id IN ({marks})", part
+                ))
+            found_phones = set()
+            for i in range(0, len(phones), 500):
+                part = phones[i:i + 500]
+                marks = ", ".join("?" * len(part))
+                found_phones.update(r[0] for r in self.conn.execute(
+                    f"SELECT phone FROM student_registry WHERE phone IN ({marks})", part
+                ))
+        return ids, found_phones
+
+    def upsert_registry_entries(self, records):
+        # OR IGNORE skips rows that hit either UNIQUE(university_id) or UNIQUE(phone)
+        return self._insert_registry_rows("INSERT OR IGNORE", self._registry_rows(records))
+
+    def register_student(self, email, name, faculty, university_id, phone):
+        with self.lock:
+            # Same steps as register_student.sql, under one write lock
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                entry = self.conn.execute(
+                    "SELECT is_registered FROM student_registry WHERE university_id = ? AND phone = ?",
+                    (university_id, phone),
+                ).fetchone()
+                if entry is None:
+                    outcome = REGISTER_NOT_IN_REGISTRY
+                elif entry[0]:
+                    outcome = REGISTER_ALREADY_REGISTERED
+                elif self.conn.execute("SELECT 1 FROM profiles WHERE university_id = ?", (university_id,)).fetchone():
+                    outcome = REGISTER_ID_TAKEN
+                elif self.conn.execute("SELECT 1 FROM profiles WHERE email = ?", (email,)).fetchone():
+                    outcome = REGISTER_EMAIL_TAKEN
+                else:
+                    self.conn.execute(
+                        "INSERT INTO profiles (id, email, name, faculty, university_id, phone, verified, created_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, 1, ?)",
+                        (str(uuid.uuid4()), email, name, faculty, university_id, phone, utc_now_iso()),
+                    )
+                    self.conn.execute(
+                        "UPDATE student_registry SET is_registered = 1 WHERE university_id = ?", (university_id,)
+                    )
+                    outcome = REGISTER_OK
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return outcome
+
+    def release_registration(self, email, university_id):
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                cur = self.conn.execute(
+                    "DELETE FROM profiles WHERE email = ? AND university_id = ?", (email, university_id)
+                )
+                if cur.rowcount:
+                    self.conn.execute(
+                        "UPDATE student_registry SET is_registered = 0 WHERE university_id = ?", (university_id,)
+                    )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def update_registry_entry(self, entry_id, data):
+        self._update("student_registry", data, "id = ?", (entry_id,))
+
+    def delete_registry_entry(self, entry_id):
+        self._execute("DELETE FROM student_registry WHERE id = ?", (entry_id,))
+
+    # -------------------- ADMIN LISTINGS --------------------
+    def _where(self, filters):
+        clauses, params = [], []
+        for column, value in (filters or {}).items():
+            clauses.append(f"{column} = ?")
+            params.append(value)
+        return clauses, params
+
+    def page_rows(self, table, sort="id", descending=False, after=None, limit=50, filters=None, search=None):
+        validate_page_args(table, sort, filters)
+        clauses, params = self._where(filters)
+        if search:
+            columns = PAGE_SEARCH_COLUMNS[table]
+            clauses.append("(" + " OR ".join(f"LOWER({c}) LIKE ?" for c in columns) + ")")
+            params.extend([f"%{search.lower()}%"] * len(columns))
+        if after is not None:
+            value, last_id = after
+            op = "<" if descending else ">"
+            if sort == "id":
+                clauses.append(f"id {op} ?")
+                params.append(last_id)
+            else:
+                clauses.append(f"({sort} {op} ? OR ({sort} = ? AND id {op} ?))")
+                params.extend([value, value, last_id])
+        direction = "DESC" if descending else "ASC"
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self._query(
+            f"SELECT * FROM {table}{where} ORDER BY {sort} {direction}, id {direction} LIMIT ?",
+            (*params, limit),
+        )
+
+    def count_rows(self, table, filters=None):
+        validate_page_args(table, "id", filters)
+        clauses, params = self._where(filters)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self.lock:
+            return self.conn.execute(f"SELECT COUNT(*) FROM {table}{where}", params).fetchone()[0]
+
+    # -------------------- AUTH --------------------
+    def sign_up(self, email, password):
+        user_id = str(uuid.uuid4())
+        try:
+            self._insert("auth_users", {"id": user_id, "email": email, "password_hash": hash_password(password)})
+        except sqlite3.IntegrityError:
+            raise Exception("User already registered")
+        return AuthUser(user_id, email)
+
+    def sign_in(self, email, password):
+        row = self._query_one("SELECT * FROM auth_users WHERE email = ?", (email,))
+        # Same message Supabase Auth uses so the login route's handling applies unchanged
+        if not row or not check_password(password, row["password_hash"]):
+            raise Exception("Invalid login credentials")
+        return AuthUser(row["id"], row["email"])
+
+    def sign_out(self):
+        pass
+
+    def send_password_reset(self, email, redirect_to):
+        print(f"[LOCAL AUTH] Password reset requested for {email} (no mail is sent by the local backend)")
+
+    def set_password(self, email, password):
+        """Create or reset a local auth user (used to seed the admin account)."""
+        self._execute(
+            "INSERT INTO auth_users (id, email, password_hash) VALUES (?, ?, ?) "
+            "ON CONFLICT(email) DO UPDATE SET password_hash = excluded.password_hash",
+            (str(uuid.uuid4()), email, hash_password(password)),
+        )
+
+    # -------------------- STORAGE --------------------
+    def upload_photo(self, path, data, content_type):
+        if not self.upload_folder:
+            return None
+        os.makedirs(self.upload_folder, exist_ok=True)
+        with open(os.path.join(self.upload_folder, path), "wb") as fh:
+            fh.write(data)
+        return f"{self.upload_url_prefix}/{path}"
+
+    def find_photo(self, path):
+        if self.upload_folder and os.path.isfile(os.path.join(self.upload_folder, path)):
+            return f"{self.upload_url_prefix}/{path}"
+        return None
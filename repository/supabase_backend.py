@@ -0,0 +1,341 @@
+"""Supabase (PostgREST) implementation of the data-access layer."""
+from .base import PAGE_SEARCH_COLUMNS, Repository, validate_page_args
+
+# Values per in_() filter in the registry existence check
+REGISTRY_IN_BATCH = 200
+
+
+def quote_value(value):
+    """Quote a value for use inside a PostgREST ``or=(...)`` filter."""
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{text}"'
+
+
+class SupabaseRepository(Repository):
+    """Talks to the hosted Supabase project through the official client.
+
+    ``pool`` is a ``SupabaseClientPool``: data calls share its stateless
+    client, auth calls each get a private one.
+    """
+
+    name = "supabase"
+
+    def __init__(self, pool, supabase_url="", bucket_name="candidate-photos"):
+        self.pool = pool
+        self.client = pool.client
+        self.supabase_url = supabase_url
+        self.bucket_name = bucket_name
+
+    def table(self, name):
+        return self.client.table(name)
+
+    # -------------------- SETTINGS --------------------
+    def get_settings(self):
+        rows = self.table("settings").select("*").eq("id", 1).limit(1).execute().data
+        return rows[0] if rows else None
+
+    def set_registration_open(self, is_open):
+        exists = self.table("settings").select("id").eq("id", 1).execute().data
+        if exists:
+            self.table("settings").update({"registration_open": is_open}).eq("id", 1).execute()
+        else:
+            self.table("settings").insert({"id": 1, "registration_open": is_open}).execute()
+
+    # -------------------- PROFILES --------------------
+    def get_profile(self, email):
+        rows = self.table("profiles").select("*").eq("email", email).limit(1).execute().data
+        return rows[0] if rows else None
+
+    def profile_exists_for_university_id(self, university_id):
+        rows = self.table("profiles").select("id").eq("university_id", university_id).execute().data
+        return bool(rows)
+
+    def create_profile(self, profile):
+        self.table("profiles").insert(profile).execute()
+
+    def count_profiles(self):
+        # head=True sends a HEAD request: PostgREST returns the count, no rows
+        return self.table("profiles").select("id", count="exact", head=True).execute().count or 0
+
+    def verify_profiles(self, emails):
+        self.table("profiles").update({"verified": True}).in_("email", list(emails)).execute()
+
+    def delete_user(self, email):
+        # student_registry has no email column, so release the entry via the profile's university ID
+        profile = self.get_profile(email)
+        self.table("votes").delete().eq("email", email).execute()
+        self.table("profiles").delete().eq("email", email).execute()
+        if profile and profile.get("university_id"):
+            self.table("student_registry").update({"is_registered": False}).eq(
+                "university_id", profile["university_id"]
+            ).execute()
+        return profile.get("university_id") if profile else None
+
+    # -------------------- ELECTIONS --------------------
+    def list_elections(self, newest_first=False, statuses=None):
+        query = self.table("elections").select("*")
+        if statuses is not None:
+            query = query.in_("status", list(statuses))
+        if newest_first:
+            query = query.order("start_time", desc=True)
+        return query.execute().data or []
+
+    def list_recent_closed_elections(self, limit):
+        return (
+            self.table("elections").select("*").eq("status", "Closed")
+            .order("end_time", desc=True).limit(limit).execute().data or []
+        )
+
+    def set_election_status(self, election_id, status):
+        self.table("elections").update({"status": status}).eq("id", election_id).neq("status", status).execute()
+
+    def create_election_with_candidates(self, title, description, start_time, end_time, candidates):
+        self.client.rpc("create_election_with_candidates", {
+            "title": title,
+            "description": description,
+            "start_time": start_time,
+            "end_time": end_time,
+            "candidates_json": candidates
+        }).execute()
+
+    def update_election(self, election_id, data):
+        self.table("elections").update(data).eq("id", election_id).execute()
+
+    def delete_election(self, election_id):
+        self.table("elections").delete().eq("id", election_id).execute()
+
+    # -------------------- CANDIDATES --------------------
+    def list_candidates(self, columns="*", election_ids=None):
+        query = self.table("candidates").select(columns)
+        if election_ids is not None:
+            query = query.in_("election_id", list(election_ids))
+        return query.execute().data or []
+
+    def top_candidates(self, limit, columns="id,name,photo,votes"):
+        return (
+            self.table("candidates")
+            .select(columns)
+            .order("votes", desc=True, nullsfirst=False)
+            .limit(limit)
+            .execute()
+            .data or []
+        )
+
+    def list_candidates_with_election_title(self):
+        return self.table("candidates").select("*, elections(title)").execute().data or []
+
+    def create_candidate(self, data):
+        self.table("candidates").insert(data).execute()
+
+    def update_candidate(self, candidate_id, data):
+        self.table("candidates").update(data).eq("id", candidate_id).execute()
+
+    def delete_candidate(self, candidate_id):
+        self.table("votes").delete().eq("candidate_id", candidate_id).execute()
+        self.table("candidates").delete().eq("id", candidate_id).execute()
+
+    # -------------------- VOTES --------------------
+    def count_votes(self):
+        return self.table("votes").select("id", count="exact", head=True).execute().count or 0
+
+    def votes_after(self, after_id, limit):
+        return (
+            self.table("votes").select("id,candidate_id").gt("id", after_id).order("id").limit(limit).execute().data
+            or []
+        )
+
+    def voted_election_ids(self, email):
+        rows = self.table("votes").select("election_id").eq("email", email).execute().data or []
+        return {v["election_id"] for v in rows}
+
+    def cast_vote(self, email, candidate_id, now=None, bump_counter=True):
+        params = {"voter_email": email, "cid": candidate_id, "bump_counter": bump_counter}
+        if now is not None:
+            params["voted_now"] = now.isoformat()
+        # Single round trip: see cast_vote.sql. No result is not a success: the route
+        # reports anything but an explicit VOTE_* outcome as "not recorded"
+        return self.client.rpc("cast_vote", params).execute().data
+
+    def apply_vote_increments(self, increments):
+        # JSON object keys must be strings; see vote_counters.sql
+        self.client.rpc("apply_vote_increments", {
+            "increments": {str(cid): n for cid, n in increments.items()}
+        }).execute()
+
+    def rebuild_vote_counters(self):
+        self.client.rpc("rebuild_vote_counters", {}).execute()
+
+    # -------------------- STUDENT REGISTRY --------------------
+    def find_registry_entry(self, university_id, phone):
+        rows = (
+            self.table("student_registry")
+            .select("*")
+            .eq("university_id", university_id)
+            .eq("phone", phone)
+            .execute()
+            .data
+        )
+        return rows[0] if rows else None
+
+    def mark_registered(self, university_id):
+        self.table("student_registry").update({"is_registered": True}).eq("university_id", university_id).execute()
+
+    def insert_registry_entries(self, records):
+        self.table("student_registry").insert(list(records)).execute()
+
+    def existing_registry_keys(self, university_ids, phones):
+        return (
+            self._existing_values("university_id", university_ids),
+            self._existing_values("phone", phones),
+        )
+
+    def _existing_values(self, column, values):
+        values, found = list(values), set()
+        # in_() puts every value in the query string: keep each URL well under proxy limits
+        for i in range(0, len(values), REGISTRY_IN_BATCH):
+            rows = (
+                self.table("student_registry").select(column)
+                .in_(column, values[i:i + REGISTRY_IN_BATCH]).execute().data or []
+            )
+            found.update(r[column] for r in rows)
+        return found
+
+    def upsert_registry_entries(self, records):
+        records = list(records)
+        if not records:
+            return 0
+        # Skips rows clashing on university_id OR phone; see import_registry_entries.sql
+        return self.client.rpc("import_registry_entries", {"entries": records}).execute().data or 0
+
+    def register_student(self, email, name, faculty, university_id, phone):
+        # Single round trip: see register_student.sql
+        return self.client.rpc("register_student", {
+            "p_email": email,
+            "p_name": name,
+            "p_faculty": faculty,
+            "p_university_id": university_id,
+            "p_phone": phone,
+        }).execute().data
+
+    def release_registration(self, email, university_id):
+        self.client.rpc("release_registration", {"p_email": email, "p_university_id": university_id}).execute()
+
+    def update_registry_entry(self, entry_id, data):
+        self.table("student_registry").update(data).eq("id", entry_id).execute()
+
+    def delete_registry_entry(self, entry_id):
+        self.table("student_registry").delete().eq("id", entry_id).execute()
+
+    # -------------------- ADMIN LISTINGS --------------------
+    def _filtered(self, query, filters):
+        for column, value in (filters or {}).items():
+            query = query.eq(column, value)
+        return query
+
+    def page_rows(self, table, sort="id", descending=False, after=None, limit=50, filters=None, search=None):
+        validate_page_args(table, sort, filters)
+        query = self._filtered(self.table(table).select("*"), filters)
+        if search:
+            # Characters with a meaning in PostgREST filter syntax are dropped from the term
+            term = "".join(ch for ch in search if ch not in ',()"*\\')
+            if term:
+                query = query.or_(",".join(
+                    f"{col}.ilike.{quote_value(f'*{term}*')}" for col in PAGE_SEARCH_COLUMNS[table]
+                ))
+        if after is not None:
+            value, last_id = after
+            op = "lt" if descending else "gt"
+            if sort == "id":
+                query = query.filter("id", op, last_id)
+            else:
+                query = query.or_(
+                    f"{sort}.{op}.{quote_value(value)},"
+                    f"and({sort}.eq.{quote_value(value)},id.{op}.{quote_value(last_id)})"
+                )
+        query = query.order(sort, desc=descending)
+        if sort != "id":
+            query = query.order("id", desc=descending)
+        return query.limit(limit).execute().data or []
+
+    def count_rows(self, table, filters=None):
+        validate_page_args(table, "id", filters)
+        query = self.table(table).select("id", count="exact", head=True)
+        return self._filtered(query, filters).execute().count or 0
+
+    # -------------------- AUTH --------------------
+    def sign_up(self, email, password):
+        with self.pool.auth_client() as client:
+            return client.auth.sign_up({"email": email, "password": password})
+
+    def sign_in(self, email, password):
+        with self.pool.auth_client() as client:
+            response = client.auth.sign_in_with_password({"email": email, "password": password})
+            # Supabase Python SDK often puts the user object inside the session key
+            user = getattr(response, "user", None)
+            if not user:
+                session = getattr(response, "session", None)
+                user = session.user if session else None
+            # The app keeps its own session cookie; revoke this Supabase session right away
+            try:
+                client.auth.sign_out({"scope": "local"})
+            except Exception as e:
+                print(f"[AUTH] Could not revoke sign-in session: {e}")
+        return user
+
+    def sign_out(self):
+        # sign_in keeps no Supabase session around, so there is nothing to end here
+        pass
+
+    def send_password_reset(self, email, redirect_to):
+        # Use redirectTo for modern Supabase
+        with self.pool.auth_client() as client:
+            client.auth.reset_password_for_email(email, options={"redirectTo": redirect_to})
+
+    # -------------------- STORAGE --------------------
+    def upload_photo(self, path, data, content_type):
+        bucket = self.client.storage.from_(self.bucket_name)
+        bucket.upload(file=data, path=path, file_options={
+            "content-type": content_type,
+            "upsert": "true",
+            # Photo names are unique per upload (content hash), so browsers may keep them
+            "cache-control": "31536000",
+        })
+        return self._public_url(bucket, path)
+
+    def find_photo(self, path):
+        bucket = self.client.storage.from_(self.bucket_name)
+        try:
+            if not bucket.exists(path):
+                return None
+        except Exception:
+            return None
+        return self._public_url(bucket, path)
+
+    def _public_url(self, bucket, path):
+        public_url_response = bucket.get_public_url(path)
+        photo_url = ""
+        try:
+            # Handle various possible response shapes from different Supabase SDK versions
+            if isinstance(public_url_response, str):
+                photo_url = public_url_response
+            elif isinstance(public_url_response, dict):
+                photo_url = (
+                    public_url_response.get("publicUrl")
+                    or public_url_response.get("public_url")
+                    or public_url_response.get("publicURL")
+                    or ""
+                )
+            else:
+                # Some SDKs return an object with a 'data' attribute containing the URL
+                data_attr = getattr(public_url_response, "data", None)
+                if isinstance(data_attr, dict):
+                    photo_url = data_attr.get("publicUrl") or data_attr.get("public_url") or ""
+                else:
+                    photo_url = str(public_url_response)
+        except Exception:
+            photo_url = ""
+
+        # Final fallback: Construct URL manually
+        if not photo_url and self.supabase_url:
+            photo_url = f"{self.supabase_url.rstrip('/')}/storage/v1/object/public/{self.bucket_name}/{path}"
+        return photo_url or None
@@ -0,0 +1,58 @@
+"""Thread-safe Supabase clients for a multi-threaded worker.
+
+Every data call goes through one shared client that never signs in, so it
+always sends the service key and carries no per-user state. Its HTTP
+transport is a single ``httpx.Client`` with a bounded pool of keep-alive
+(HTTP/2) connections and explicit timeouts, shared by all threads.
+
+Auth calls (sign in, sign up, password reset) mutate a client's session and
+its Authorization header, so each one gets a fresh client of its own
+(``auth_client()``) that is thrown away afterwards. It still reuses the
+shared connections.
+"""
+from contextlib import contextmanager
+
+
+class SupabaseClientPool:
+    """Shared keep-alive connections, one stateless data client, isolated auth clients."""
+
+    def __init__(self, url, key, size=16, timeout=10.0, connect_timeout=5.0, pool_timeout=5.0,
+                 keepalive_expiry=60.0, http2=True):
+        import httpx
+
+        self.url = url
+        self.key = key
+        self.size = size
+        self.http = httpx.Client(
+            http2=http2,
+            follow_redirects=True,
+            # ``pool``: how long a call waits for a free connection before failing
+            timeout=httpx.Timeout(timeout, connect=connect_timeout, pool=pool_timeout),
+            limits=httpx.Limits(
+                max_connections=size,
+                max_keepalive_connections=size,
+                keepalive_expiry=keepalive_expiry,
+            ),
+        )
+        self.client = self._create_client()
+
+    def _create_client(self):
+        from supabase import ClientOptions, create_client
+
+        return create_client(
+            self.url,
+            self.key,
+            options=ClientOptions(
+                persist_session=False,
+                auto_refresh_token=False,
+                httpx_client=self.http,
+            ),
+        )
+
+    @contextmanager
+    def auth_client(self):
+        """A private client for one auth operation; its session never reaches other requests."""
+        yield self._create_client()
+
+    def close(self):
+        self.http.close()
@@ -0,0 +1,263 @@
+"""Results for ``/results`` without re-reading every election on each view.
+
+* Closed elections (ended more than ``freeze_grace`` seconds ago, so batched
+  counters have been flushed) are frozen: their counts are read once and the
+  ranked candidate list is kept until an admin edit calls ``invalidate()``.
+* Active (and just-closed) elections are kept as ``ElectionTally`` objects:
+  counts plus a ranking that is adjusted in place when a vote is recorded in
+  this process, and refreshed from the database for all live elections at
+  once at most every ``refresh_interval`` seconds (votes from other workers).
+* Upcoming elections cannot have votes yet; they are rendered from the catalog.
+
+So the database work behind ``/results`` depends on the number of live
+elections, not on how many past elections exist. ``current_digest()`` sums up
+the counts the page shows for the route's ETag: workers holding the same counts
+return the same digest.
+"""
+import hashlib
+import threading
+import time
+
+
+class ElectionTally:
+    """Vote counts for one election plus candidate ids ranked by (votes desc, id)."""
+
+    def __init__(self, election_id, counts):
+        self.election_id = election_id
+        self.counts = dict(counts)
+        self.total = sum(self.counts.values())
+        self.order = sorted(self.counts, key=self._key)
+        self.position = {cid: i for i, cid in enumerate(self.order)}
+        self.version = 0
+
+    def _key(self, cid):
+        return (-self.counts[cid], cid)
+
+    def add(self, candidate_id, n=1):
+        """Count ``n`` more votes and move the candidate up past anyone it overtook."""
+        if candidate_id not in self.counts:
+            return False
+        self.counts[candidate_id] += n
+        self.total += n
+        i = self.position[candidate_id]
+        order, key = self.order, self._key
+        while i > 0 and key(order[i - 1]) > key(candidate_id):
+            order[i] = order[i - 1]
+            self.position[order[i]] = i
+            i -= 1
+        order[i] = candidate_id
+        self.position[candidate_id] = i
+        self.version += 1
+        return True
+
+    def set_counts(self, counts):
+        """Replace the counts (periodic refresh); re-rank only if something changed."""
+        counts = dict(counts)
+        if counts == self.counts:
+            return False
+        self.counts = counts
+        self.total = sum(counts.values())
+        self.order = sorted(counts, key=self._key)
+        self.position = {cid: i for i, cid in enumerate(self.order)}
+        self.version += 1
+        return True
+
+    def ranked(self):
+        return [(cid, self.counts[cid]) for cid in self.order]
+
+
+class ResultsBoard:
+    """Frozen closed-election results plus live tallies, built on an ``ElectionCatalog``."""
+
+    def __init__(self, catalog, load_counts, pending_counts=None, refresh_interval=5.0, freeze_grace=10.0):
+        self.catalog = catalog
+        self.load_counts = load_counts  # election_ids -> {candidate_id: votes}
+        self.pending_counts = pending_counts  # votes queued by the write-behind counter, if any
+        self.refresh_interval = refresh_interval
+        self.freeze_grace = freeze_grace
+
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()  # one database refresh at a time
+        self._frozen_counts = {}  # election_id -> {candidate_id: votes}
+        self._frozen_views = {}  # election_id -> view, valid for one catalog snapshot
+        self._frozen_views_of = None
+        self._live = {}  # election_id -> ElectionTally
+        self._live_loaded_at = 0.0
+
+        self.version = 0
+        self._digest = None  # of the counts at ``version``, computed on demand
+        self.refreshes = 0
+        self.freezes = 0
+
+    # -------------------- HELPERS --------------------
+    def _changed(self):
+        # Caller holds self._lock
+        self.version += 1
+        self._digest = None
+
+    def _view(self, election, counts, ranked=None, frozen=False):
+        """The dict results.html renders: the election and its candidates ranked by votes."""
+        by_id = {c["id"]: c for c in self.catalog.candidates_for(election["id"])}
+        if ranked is None:
+            ranked = sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))
+        candidates = [dict(by_id[cid], votes=votes) for cid, votes in ranked if cid in by_id]
+        return {
+            "election": election,
+            "candidates": candidates,
+            "total_votes": sum(c["votes"] for c in candidates),
+            "frozen": frozen,
+        }
+
+    def _counts_with_pending(self, election_ids):
+        counts = self.load_counts(election_ids)
+        if self.pending_counts:
+            for cid, n in self.pending_counts().items():
+                if cid in counts:
+                    counts[cid] += n
+        return counts
+
+    def _split(self, counts, election_ids):
+        per_election = {eid: {} for eid in election_ids}
+        for eid in election_ids:
+            for c in self.catalog.candidates_for(eid):
+                per_election[eid][c["id"]] = counts.get(c["id"], 0)
+        return per_election
+
+    # -------------------- CLOSED --------------------
+    def _freeze(self, election_ids):
+        counts = self._split(self._counts_with_pending(election_ids), election_ids)
+        with self._lock:
+            self._frozen_counts.update(counts)
+            for eid in election_ids:
+                self._live.pop(eid, None)
+            self.freezes += len(election_ids)
+            self._changed()
+
+    def _frozen_view(self, snap, election):
+        if self._frozen_views_of is not snap:
+            # Catalog reloaded (names, photos may have changed): rebuild views lazily
+            self._frozen_views = {}
+            self._frozen_views_of = snap
+        view = self._frozen_views.get(election["id"])
+        if view is None:
+            view = self._view(election, self._frozen_counts[election["id"]], frozen=True)
+            self._frozen_views[election["id"]] = view
+        return view
+
+    # -------------------- LIVE --------------------
+    def _live_is_current(self, live_ids):
+        fresh = time.monotonic() - self._live_loaded_at < self.refresh_interval
+        return fresh and all(eid in self._live for eid in live_ids)
+
+    def _refresh_live(self, live_ids):
+        if self._live_is_current(live_ids):
+            return
+        with self._refresh_lock:
+            if self._live_is_current(live_ids):
+                return
+            counts = self._split(self._counts_with_pending(live_ids), live_ids) if live_ids else {}
+            self._store_live(counts)
+
+    def _store_live(self, counts):
+        with self._lock:
+            changed = False
+            for eid in list(self._live):
+                if eid not in counts:
+                    del self._live[eid]
+                    changed = True
+            for eid, election_counts in counts.items():
+                tally = self._live.get(eid)
+                if tally is None or set(tally.counts) != set(election_counts):
+                    self._live[eid] = ElectionTally(eid, election_counts)
+                    changed = True
+                elif tally.set_counts(election_counts):
+                    changed = True
+            if changed:
+                self._changed()
+            self._live_loaded_at = time.monotonic()
+            self.refreshes += 1
+
+    def record_vote(self, candidate_id, n=1):
+        """Apply a vote cast in this process to its live tally right away."""
+        candidate = self.catalog.candidate(candidate_id)
+        if not candidate:
+            return
+        with self._lock:
+            tally = self._live.get(candidate["election_id"])
+            if tally and tally.add(candidate_id, n):
+                self._changed()
+
+    def live_tallies(self, now=None):
+        """``{election_id: ElectionTally}`` for every live election, refreshed if due."""
+        self._update(now)
+        with self._lock:
+            return dict(self._live)
+
+    def current_digest(self, now=None):
+        """Bring the board up to date (freezing/refreshing only if due) and digest its counts."""
+        self._update(now)
+        with self._lock:
+            if self._digest is None:
+                # Sorted: the order elections were frozen or loaded in differs between workers
+                state = (
+                    sorted((eid, sorted(counts.items())) for eid, counts in self._frozen_counts.items()),
+                    sorted((eid, sorted(tally.counts.items())) for eid, tally in self._live.items()),
+                )
+                self._digest = hashlib.sha1(repr(state).encode()).hexdigest()[:16]
+            return self._digest
+
+    # -------------------- READ --------------------
+    def _update(self, now=None):
+        """Freeze newly closed elections and refresh live tallies if due."""
+        t = time.time() if now is None else now.timestamp()
+        snap = self.catalog.snapshot()
+        active, upcoming, closed = self.catalog.classify(now)
+
+        to_freeze = [
+            e["id"] for e in closed
+            if e["id"] not in self._frozen_counts and t - e["end_epoch"] >= self.freeze_grace
+        ]
+        if to_freeze:
+            self._freeze(to_freeze)
+
+        upcoming_ids = {e["id"] for e in upcoming}
+        live_ids = [e["id"] for e in snap.elections if e["id"] not in upcoming_ids and e["id"] not in self._frozen_counts]
+        self._refresh_live(live_ids)
+        return snap, upcoming_ids
+
+    def results(self, now=None):
+        """One view per election, newest first, for results.html."""
+        snap, upcoming_ids = self._update(now)
+        views = []
+        with self._lock:
+            for e in snap.elections:
+                eid = e["id"]
+                if eid in self._frozen_counts:
+                    views.append(self._frozen_view(snap, e))
+                elif eid in upcoming_ids:
+                    counts = {c["id"]: c.get("votes", 0) or 0 for c in self.catalog.candidates_for(eid)}
+                    views.append(self._view(e, counts))
+                elif eid in self._live:
+                    views.append(self._view(e, None, ranked=self._live[eid].ranked()))
+        return views
+
+    def invalidate(self):
+        """Forget frozen and live results (after admin edits to elections, candidates or votes)."""
+        with self._lock:
+            self._frozen_counts = {}
+            self._frozen_views = {}
+            self._frozen_views_of = None
+            self._live = {}
+            self._live_loaded_at = 0.0
+            self._changed()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "frozen_elections": len(self._frozen_counts),
+                "live_elections": len(self._live),
+                "version": self.version,
+                "refreshes": self.refreshes,
+                "freezes": self.freezes,
+                "live_age_s": round(time.monotonic() - self._live_loaded_at, 1) if self._live_loaded_at else None,
+            }
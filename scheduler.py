@@ -0,0 +1,176 @@
+"""Background scheduler that keeps ``elections.status`` current.
+
+On start (and every ``resync_interval`` seconds) every election's status is
+recomputed from its times and written back where the stored value is wrong.
+Future Upcoming->Active and Active->Closed transitions go on a min-heap; the
+worker thread sleeps until the earliest one is due, writes the new status and
+publishes a change event to subscribers (caches, live results, ...).
+
+Times follow the routes' convention: naive timestamps in server-local time.
+"""
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from catalog import parse_naive
+
+
+def status_at(start_epoch, end_epoch, t):
+    if t < start_epoch:
+        return "Upcoming"
+    if t <= end_epoch:
+        return "Active"
+    return "Closed"
+
+
+class ElectionStatusScheduler:
+    """Min-heap of pending status transitions, applied by one background thread."""
+
+    def __init__(self, load_elections, write_status, resync_interval=300.0):
+        self.load_elections = load_elections
+        self.write_status = write_status
+        self.resync_interval = resync_interval
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._heap = []  # (when_epoch, seq, election_id, new_status, generation)
+        self._seq = itertools.count()
+        self._generation = {}  # election_id -> generation; stale heap entries are skipped
+        self._times = {}  # election_id -> (start_epoch, end_epoch)
+        self._status = {}  # election_id -> last known status
+        self._subscribers = []
+        self._last_sync = 0.0
+        self.recent_events = deque(maxlen=100)
+        self.transitions_applied = 0
+
+    # -------------------- EVENTS --------------------
+    def subscribe(self, callback):
+        """Call ``callback(event)`` for every status change; ``event`` is a dict."""
+        self._subscribers.append(callback)
+
+    def _publish(self, event):
+        self.recent_events.append(event)
+        for callback in list(self._subscribers):
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"[SCHEDULER] Subscriber failed for {event}: {e}")
+
+    # -------------------- SCHEDULING --------------------
+    def _schedule(self, election_id, start_epoch, end_epoch, now):
+        generation = self._generation.get(election_id, 0) + 1
+        self._generation[election_id] = generation
+        self._times[election_id] = (start_epoch, end_epoch)
+        if now < start_epoch:
+            heapq.heappush(self._heap, (start_epoch, next(self._seq), election_id, "Active", generation))
+        if now <= end_epoch:
+            # Closed once strictly past the end, matching the routes' start <= now <= end check
+            heapq.heappush(self._heap, (end_epoch + 0.001, next(self._seq), election_id, "Closed", generation))
+
+    def _set_status(self, election_id, new_status, stored_status, now):
+        """Write ``new_status`` if it differs from what the database holds; publish on change."""
+        if stored_status == new_status:
+            self._status[election_id] = new_status
+            return
+        try:
+            self.write_status(election_id, new_status)
+        except Exception as e:
+            print(f"[SCHEDULER] Could not set election {election_id} to {new_status}: {e}")
+            return
+        self._status[election_id] = new_status
+        self._publish({
+            "election_id": election_id,
+            "old_status": stored_status,
+            "new_status": new_status,
+            "at": datetime.fromtimestamp(now).isoformat(),
+        })
+
+    def sync(self):
+        """Reload all elections, fix stored statuses and rebuild the heap."""
+        elections = self.load_elections()
+        now = time.time()
+        with self._lock:
+            self._heap = []
+            seen = set()
+            changes = []
+            for e in elections:
+                try:
+                    start_epoch = parse_naive(e["start_time"]).timestamp()
+                    end_epoch = parse_naive(e["end_time"]).timestamp()
+                except Exception:
+                    continue
+                eid = e["id"]
+                seen.add(eid)
+                self._schedule(eid, start_epoch, end_epoch, now)
+                changes.append((eid, status_at(start_epoch, end_epoch, now), e.get("status")))
+            for eid in set(self._times) - seen:
+                # Deleted elections: forget them and let their heap entries go stale
+                self._times.pop(eid, None)
+                self._status.pop(eid, None)
+                self._generation[eid] = self._generation.get(eid, 0) + 1
+            self._last_sync = time.monotonic()
+        for eid, status, stored in changes:
+            self._set_status(eid, status, stored, now)
+        self._wake.set()
+
+    def _fire_due(self):
+        now = time.time()
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                _, _, eid, new_status, generation = heapq.heappop(self._heap)
+                if self._generation.get(eid) != generation:
+                    continue
+                due.append((eid, new_status, self._status.get(eid)))
+        for eid, new_status, stored in due:
+            self._set_status(eid, new_status, stored, now)
+            self.transitions_applied += 1
+
+    def _run(self):
+        while not self._stop.is_set():
+            if time.monotonic() - self._last_sync >= self.resync_interval:
+                try:
+                    self.sync()
+                except Exception as e:
+                    print(f"[SCHEDULER] Resync failed: {e}")
+                    self._last_sync = time.monotonic()
+            with self._lock:
+                next_due = self._heap[0][0] - time.time() if self._heap else self.resync_interval
+            self._wake.wait(max(0.0, min(next_due, self.resync_interval)))
+            self._wake.clear()
+            self._fire_due()
+
+    def start(self):
+        """Start the scheduler thread (the first loop iteration runs a full sync)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="election-status-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def request_resync(self):
+        """Ask the thread to reload elections soon (after admin create/edit/delete)."""
+        self._last_sync = 0.0
+        self._wake.set()
+
+    def stats(self):
+        with self._lock:
+            next_due = self._heap[0][0] if self._heap else None
+            return {
+                "tracked_elections": len(self._times),
+                "pending_transitions": len(self._heap),
+                "next_transition_at": datetime.fromtimestamp(next_due).isoformat() if next_due else None,
+                "transitions_applied": self.transitions_applied,
+                "recent_events": list(self.recent_events)[-10:],
+            }
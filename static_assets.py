@@ -0,0 +1,113 @@
+"""Content-fingerprinted URLs for files in ``static/``.
+
+``asset_url('static', filename='logo.png')`` (same arguments as ``url_for``)
+returns ``/assets/logo.<hash>.png``, where ``<hash>`` is taken from the file's
+bytes. Such a URL can never point at different content, so the ``/assets``
+route serves it with ``Cache-Control: immutable`` and a one-year max-age:
+repeat page loads take every asset from the browser cache.
+
+Hashes are computed on first use and recomputed only when the file's size or
+mtime changes. Text-like assets (SVG, CSS, JS, ...) are also kept gzip- and,
+if the ``brotli`` package is installed, brotli-compressed in memory and
+served to clients that accept them.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+
+from werkzeug.security import safe_join
+
+COMPRESSIBLE_EXTENSIONS = {".svg", ".css", ".js", ".json", ".txt", ".ico", ".map", ".xml"}
+_FINGERPRINTED = re.compile(r"^(?P<stem>.+)\.(?P<digest>[0-9a-f]{12})(?P<ext>\.[^./]+)$")
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+
+class AssetManifest:
+    """Maps static filenames to fingerprinted names and back, with optional precompressed bodies."""
+
+    def __init__(self, static_folder, precompress=True):
+        self.static_folder = static_folder
+        self.precompress = precompress
+        self._lock = threading.Lock()
+        self._entries = {}  # filename -> (size, mtime_ns, digest)
+        self._compressed = {}  # (filename, digest, encoding) -> bytes
+
+    def _path(self, filename):
+        return safe_join(self.static_folder, filename)
+
+    def digest(self, filename):
+        """12-hex-digit content hash of ``static/<filename>``, or None if there is no such file."""
+        path = self._path(filename)
+        try:
+            st = os.stat(path) if path else None
+        except OSError:
+            st = None
+        if st is None or not os.path.isfile(path):
+            return None
+        with self._lock:
+            entry = self._entries.get(filename)
+            if entry and entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+                return entry[2]
+        sha = hashlib.sha256()
+        with open(path, "rb") as fh:
+            for chunk in iter(lambda: fh.read(64 * 1024), b""):
+                sha.update(chunk)
+        digest = sha.hexdigest()[:12]
+        with self._lock:
+            self._entries[filename] = (st.st_size, st.st_mtime_ns, digest)
+        return digest
+
+    def fingerprinted(self, filename):
+        """``dir/name.<hash>.ext`` for ``dir/name.ext``, or None if the file does not exist."""
+        digest = self.digest(filename)
+        if digest is None:
+            return None
+        stem, ext = os.path.splitext(filename)
+        return f"{stem}.{digest}{ext}"
+
+    def resolve(self, name):
+        """``(filename, current)`` for a fingerprinted name; ``current`` is False for an outdated hash."""
+        match = _FINGERPRINTED.match(name)
+        if not match:
+            return None, False
+        filename = match.group("stem") + match.group("ext")
+        return filename, self.digest(filename) == match.group("digest")
+
+    def compressed(self, filename, accept_encoding):
+        """``(body, encoding)`` of a precompressed variant the client accepts, or ``(None, None)``."""
+        if not self.precompress or os.path.splitext(filename)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+            return None, None
+        accepted = {part.split(";")[0].strip() for part in (accept_encoding or "").lower().split(",")}
+        encodings = (["br"] if brotli is not None else []) + ["gzip"]
+        encoding = next((e for e in encodings if e in accepted), None)
+        if encoding is None:
+            return None, None
+        digest = self.digest(filename)
+        key = (filename, digest, encoding)
+        with self._lock:
+            body = self._compressed.get(key)
+        if body is None:
+            with open(self._path(filename), "rb") as fh:
+                raw = fh.read()
+            body = brotli.compress(raw) if encoding == "br" else gzip.compress(raw, compresslevel=9)
+            if len(body) >= len(raw):
+                return None, None
+            with self._lock:
+                self._compressed[key] = body
+        return body, encoding
+
+    @staticmethod
+    def mimetype(filename):
+        return mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+    def stats(self):
+        with self._lock:
+            return {"fingerprinted": len(self._entries), "compressed_variants": len(self._compressed),
+                    "brotli": brotli is not None}
@@ -0,0 +1,217 @@
+"""Streaming, chunked import of the student registry from Excel or CSV.
+
+The file is read ``chunk_size`` rows at a time (openpyxl read-only mode for
+.xlsx, ``pandas.read_csv(chunksize=...)`` for .csv), each chunk is cleaned and
+de-duplicated with vectorized pandas operations, checked against the registry
+for just that chunk's IDs and phones, and written with an insert that skips
+conflicting rows. Memory stays bounded by the chunk size plus the set of keys
+already seen in the file (needed to report in-file duplicates).
+"""
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+REQUIRED_COLUMNS = ["ID", "Name", "Phone"]
+SUPPORTED_EXTENSIONS = (".xlsx", ".xls", ".csv")
+
+
+class MissingColumnsError(ValueError):
+    def __init__(self, missing):
+        super().__init__(f"Missing columns: {', '.join(missing)}")
+        self.missing = missing
+
+
+def _check_columns(columns):
+    missing = [col for col in REQUIRED_COLUMNS if col not in columns]
+    if missing:
+        raise MissingColumnsError(missing)
+
+
+def iter_xlsx_chunks(file, chunk_size):
+    """Yield DataFrames of at most ``chunk_size`` rows from the first sheet of an .xlsx file."""
+    from openpyxl import load_workbook
+
+    wb = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(h).strip() if h is not None else "" for h in header]
+        _check_columns(columns)
+        index = [columns.index(col) for col in REQUIRED_COLUMNS]
+
+        batch = []
+        for row in rows:
+            batch.append([row[i] if i < len(row) else None for i in index])
+            if len(batch) >= chunk_size:
+                yield pd.DataFrame(batch, columns=REQUIRED_COLUMNS, dtype=object)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=REQUIRED_COLUMNS, dtype=object)
+    finally:
+        wb.close()
+
+
+def iter_csv_chunks(file, chunk_size):
+    """Yield DataFrames of at most ``chunk_size`` rows from a CSV file (all cells as text)."""
+    reader = pd.read_csv(file, dtype=str, chunksize=chunk_size, skipinitialspace=True)
+    for df in reader:
+        df.columns = [str(c).strip() for c in df.columns]
+        _check_columns(df.columns)
+        yield df[REQUIRED_COLUMNS]
+
+
+def iter_xls_chunks(file, chunk_size):
+    """Legacy .xls has no streaming reader; load it once and hand it out in chunks."""
+    df = pd.read_excel(file)
+    df.columns = [str(c).strip() for c in df.columns]
+    _check_columns(df.columns)
+    df = df[REQUIRED_COLUMNS]
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size]
+
+
+def iter_chunks(file, filename, chunk_size):
+    name = filename.lower()
+    if name.endswith(".xlsx"):
+        return iter_xlsx_chunks(file, chunk_size)
+    if name.endswith(".csv"):
+        return iter_csv_chunks(file, chunk_size)
+    if name.endswith(".xls"):
+        return iter_xls_chunks(file, chunk_size)
+    raise ValueError(f"Unsupported file type: {filename}")
+
+
+def clean_chunk(df):
+    """Drop incomplete rows and strip every cell (same rules as the original importer)."""
+    df = df.dropna(subset=REQUIRED_COLUMNS)
+    df = df[REQUIRED_COLUMNS].astype(str).apply(lambda col: col.str.strip())
+    # Cells that were blank strings are as incomplete as missing ones
+    return df[(df != "").all(axis=1)]
+
+
+class ImportProgress:
+    """Counters and per-chunk timings for one import; readable while it runs."""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.started_at = datetime.now().isoformat(timespec="seconds")
+        self.finished = False
+        self.error = None
+        self.rows_read = 0
+        self.rows_invalid = 0
+        self.duplicate_ids = 0
+        self.duplicate_phones = 0
+        self.duplicate_samples = []
+        self.skipped_existing = 0
+        self.imported = 0
+        self.chunks = []
+        self.total_seconds = 0.0
+
+    def as_dict(self):
+        return {
+            "filename": self.filename,
+            "started_at": self.started_at,
+            "finished": self.finished,
+            "error": self.error,
+            "rows_read": self.rows_read,
+            "rows_invalid": self.rows_invalid,
+            "duplicate_ids": self.duplicate_ids,
+            "duplicate_phones": self.duplicate_phones,
+            "skipped_existing": self.skipped_existing,
+            "imported": self.imported,
+            "chunk_count": len(self.chunks),
+            "chunks": self.chunks[-50:],
+            "total_ms": round(self.total_seconds * 1000, 1),
+        }
+
+
+class StudentImporter:
+    """Runs chunked registry imports against a repository and keeps the latest progress."""
+
+    def __init__(self, repository, chunk_size=1000):
+        self.db = repository
+        self.chunk_size = chunk_size
+        self._lock = threading.Lock()
+        self.current = None
+
+    def status(self):
+        progress = self.current
+        return progress.as_dict() if progress else None
+
+    def run(self, file, filename):
+        """Import ``file``; returns the finished :class:`ImportProgress`. Only one import runs at a time."""
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("Another student import is already running.")
+        progress = ImportProgress(filename)
+        self.current = progress
+        started = time.perf_counter()
+        try:
+            seen_ids, seen_phones = set(), set()
+            for number, chunk in enumerate(iter_chunks(file, filename, self.chunk_size), start=1):
+                self._import_chunk(number, chunk, seen_ids, seen_phones, progress)
+                progress.total_seconds = time.perf_counter() - started
+        except Exception as e:
+            progress.error = str(e)
+            raise
+        finally:
+            progress.total_seconds = time.perf_counter() - started
+            progress.finished = True
+            self._lock.release()
+        return progress
+
+    def _import_chunk(self, number, chunk, seen_ids, seen_phones, progress):
+        t0 = time.perf_counter()
+        rows = len(chunk)
+        df = clean_chunk(chunk)
+        invalid = rows - len(df)
+
+        # Duplicates inside the chunk, then against earlier chunks of the same file
+        dup_id = df["ID"].duplicated() | df["ID"].isin(seen_ids)
+        dup_phone = ~dup_id & (df["Phone"].duplicated() | df["Phone"].isin(seen_phones))
+        if dup_id.any() or dup_phone.any():
+            room = 5 - len(progress.duplicate_samples)
+            if room > 0:
+                progress.duplicate_samples.extend(df.loc[dup_id | dup_phone, "ID"].head(room).tolist())
+        df = df[~(dup_id | dup_phone)]
+        seen_ids.update(df["ID"])
+        seen_phones.update(df["Phone"])
+        t_clean = time.perf_counter()
+
+        # Existence check limited to this chunk's keys
+        existing_ids, existing_phones = self.db.existing_registry_keys(df["ID"].tolist(), df["Phone"].tolist())
+        exists = df["ID"].isin(existing_ids) | df["Phone"].isin(existing_phones)
+        new = df[~exists]
+        t_check = time.perf_counter()
+
+        records = [
+            {"university_id": uid, "full_name": name, "phone": phone, "is_registered": False}
+            for uid, name, phone in zip(new["ID"], new["Name"], new["Phone"])
+        ]
+        inserted = self.db.upsert_registry_entries(records) if records else 0
+        t_write = time.perf_counter()
+
+        progress.rows_read += rows
+        progress.rows_invalid += invalid
+        progress.duplicate_ids += int(dup_id.sum())
+        progress.duplicate_phones += int(dup_phone.sum())
+        # Rows skipped by the insert itself lost a race with a concurrent writer
+        progress.skipped_existing += int(exists.sum()) + (len(records) - inserted)
+        progress.imported += inserted
+        timing = {
+            "chunk": number,
+            "rows": rows,
+            "imported": inserted,
+            "clean_ms": round((t_clean - t0) * 1000, 1),
+            "check_ms": round((t_check - t_clean) * 1000, 1),
+            "write_ms": round((t_write - t_check) * 1000, 1),
+            "total_ms": round((t_write - t0) * 1000, 1),
+        }
+        progress.chunks.append(timing)
+        print(
+            f"[IMPORT] {progress.filename} chunk {number}: {rows} rows, {inserted} imported, "
+            f"{progress.rows_read} read so far ({timing['total_ms']} ms)"
+        )
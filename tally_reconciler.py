@@ -0,0 +1,402 @@
+"""Incremental audit of ``candidates.votes`` against the ``votes`` table.
+
+The reconciler keeps a checkpoint: the id of the last ballot it has folded
+into its own per-candidate counts. Each run reads only ballots with a larger
+id (``votes_after``), so after a 50k-ballot election an audit costs a few
+small queries instead of a full-table pass. Checkpoint and counts can be
+saved to a JSON file so a restart does not start from zero.
+
+Ballot ids come from a sequence and may commit out of order, so a ballot is
+folded only once it is ``settle_seconds`` older than the first run that saw a
+larger id. Newer ballots are re-read and counted provisionally on every run.
+Deleted ballots (user or candidate deletion) cannot be seen incrementally:
+they show up as fewer rows in ``votes`` than counted, or are announced with
+``request_recount()``, and trigger one full recount.
+
+Counters are read before the ballots, so a correct counter is never above
+its ballot count, and never below the count of settled ballots: those were
+cast long enough ago that every worker has flushed their increments. A
+counter outside that range is a suspect. When the same difference is seen
+on two consecutive runs it is flagged as a mismatch, and with ``repair`` it
+is corrected by a relative increment, so votes cast meanwhile are not
+overwritten.
+
+Only one process may run it, or a repair would be applied once per worker.
+With ``lock_path`` the workers of a host compete for an exclusive file lock:
+the holder runs the background audit and publishes its status into the
+checkpoint file, the others serve that status and retry the lock each
+interval, so a new leader takes over when the old one exits.
+"""
+import json
+import os
+import threading
+import time
+from collections import Counter, deque
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, so no leader lock (run a single process there)
+    fcntl = None
+
+
+class NotLeaderError(RuntimeError):
+    """The audit runs in another process (the holder of the lock file)."""
+
+
+class TallyReconciler:
+    """Checkpointed per-candidate ballot counts compared with the stored counters."""
+
+    def __init__(self, votes_after, count_votes, load_counters, apply_increments, pending_counts=None,
+                 batch_size=5000, settle_seconds=30.0, interval=60.0, repair=False, checkpoint_path=None,
+                 lock_path=None, on_repair=None):
+        self.votes_after = votes_after
+        self.count_votes = count_votes
+        self.load_counters = load_counters
+        self.apply_increments = apply_increments
+        self.pending_counts = pending_counts
+        self.batch_size = batch_size
+        self.settle_seconds = settle_seconds
+        self.interval = interval
+        self.repair = repair
+        self.checkpoint_path = checkpoint_path
+        if lock_path and fcntl is None:
+            print("[TALLY] File locks are not available on this platform; auditing without a leader lock")
+            lock_path = None
+        self.lock_path = lock_path
+        self.on_repair = on_repair
+        # Deletions in any worker ask the leader for a recount through this file
+        self.recount_path = f"{lock_path}.recount" if lock_path else None
+        self._lock_fd = None
+
+        self._run_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        # Every ballot with id <= _checkpoint is in _counts, none above it
+        self._checkpoint = 0
+        self._counts = Counter()
+        self._marks = deque()  # (monotonic time, largest id seen by the run at that time)
+        self._settled = 0  # every ballot up to this id has committed
+        self._recount = False
+        self._suspects = {}  # candidate_id -> difference seen by the previous run
+        self.mismatches = {}
+
+        self.runs = 0
+        self.full_recounts = 0
+        self.repaired_votes = 0
+        self.failures = 0
+        self.last_run_at = None
+        self.last_run_seconds = 0.0
+        self.last_scanned = 0
+        self.max_seen_id = 0
+        self.unsettled_votes = 0
+        self.unseen_votes = 0
+        self.last_report = None
+        if not lock_path:
+            self._load()
+
+    # -------------------- CHECKPOINT --------------------
+    def _load(self):
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return
+        try:
+            with open(self.checkpoint_path, encoding="utf-8") as fh:
+                data = json.load(fh)
+            self._checkpoint = int(data["checkpoint"])
+            self._counts = Counter({int(cid): n for cid, n in data["counts"].items()})
+            self._settled = self._checkpoint
+            self._marks.clear()
+            print(f"[TALLY] Resuming from ballot {self._checkpoint} ({sum(self._counts.values())} counted)")
+        except Exception as e:
+            print(f"[TALLY] Ignoring unreadable checkpoint {self.checkpoint_path}: {e}")
+
+    def _save(self):
+        if not self.checkpoint_path:
+            return
+        tmp = f"{self.checkpoint_path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({
+                "checkpoint": self._checkpoint,
+                "counts": {str(cid): n for cid, n in self._counts.items()},
+                "saved_at": time.time(),
+                # Read by the workers that do not hold the lock
+                "leader_pid": os.getpid(),
+                "stats": self._local_stats(),
+                "mismatches": {str(cid): m for cid, m in self.mismatches.items()},
+                "last_report": self.last_report,
+            }, fh, default=str)
+        os.replace(tmp, self.checkpoint_path)
+
+    def _published(self):
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return {}
+        try:
+            with open(self.checkpoint_path, encoding="utf-8") as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return {}
+
+    def request_recount(self):
+        """Ballots were deleted: recount from the first ballot on the next run (in whichever process leads)."""
+        self._recount = True
+        if self.recount_path:
+            try:
+                with open(self.recount_path, "w", encoding="utf-8") as fh:
+                    fh.write(str(time.time()))
+            except OSError as e:
+                print(f"[TALLY] Could not request a recount: {e}")
+
+    def _take_recount(self):
+        requested, self._recount = self._recount, False
+        if self.recount_path and os.path.exists(self.recount_path):
+            try:
+                os.remove(self.recount_path)
+            except FileNotFoundError:
+                pass
+            requested = True
+        return requested
+
+    # -------------------- LEADERSHIP --------------------
+    @property
+    def is_leader(self):
+        return not self.lock_path or self._lock_fd is not None
+
+    def try_lead(self):
+        """Take the lock file if no other process holds it; True while this process leads."""
+        if self.is_leader:
+            return True
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        print(f"[TALLY] Worker {os.getpid()} leads the reconciliation")
+        # Resume from what the previous leader saved, not from this process's start
+        self._load()
+        return True
+
+    def _release(self):
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)  # closing drops the flock
+            self._lock_fd = None
+
+    # -------------------- RUN --------------------
+    def _settled_id(self, now):
+        """Largest id seen at least ``settle_seconds`` ago: every ballot up to it has committed."""
+        while self._marks and self._marks[0][0] <= now - self.settle_seconds:
+            self._settled = max(self._settled, self._marks.popleft()[1])
+        return self._settled
+
+    def _scan(self):
+        """Fold settled ballots above the checkpoint; return the unsettled ones as ``(id, candidate_id)``."""
+        settled = self._settled_id(time.monotonic())
+        unsettled, scanned, after = [], 0, self._checkpoint
+        while True:
+            rows = self.votes_after(after, self.batch_size)
+            scanned += len(rows)
+            for row in rows:
+                if row["id"] <= settled:
+                    self._counts[row["candidate_id"]] += 1
+                else:
+                    unsettled.append((row["id"], row["candidate_id"]))
+            if rows:
+                after = rows[-1]["id"]
+                # Keeps the invariant if a later batch fails
+                self._checkpoint = max(self._checkpoint, min(settled, after))
+            if len(rows) < self.batch_size:
+                break
+        self.max_seen_id = max(self.max_seen_id, after)
+
+        # Mark this run, then fold what has settled meanwhile (everything when settle_seconds is 0)
+        self._marks.append((time.monotonic(), after))
+        settled = self._settled_id(time.monotonic())
+        remaining = []
+        for vote_id, candidate_id in unsettled:
+            if vote_id <= settled:
+                self._counts[candidate_id] += 1
+            else:
+                remaining.append((vote_id, candidate_id))
+        self._checkpoint = max(self._checkpoint, settled)
+        return remaining, scanned
+
+    def _reset(self):
+        self._checkpoint = 0
+        self._counts = Counter()
+        self._suspects = {}
+        self.full_recounts += 1
+
+    def run_once(self, repair=None):
+        """Catch up with new ballots, compare with the counters; returns a report of this run."""
+        repair = self.repair if repair is None else repair
+        if not self.try_lead():
+            raise NotLeaderError(f"the audit runs in worker {self._published().get('leader_pid', '?')}")
+        with self._run_lock:
+            started = time.monotonic()
+            try:
+                if self._take_recount():
+                    self._reset()
+                # Counters first: every increment they include belongs to a ballot the scan will see
+                stored = Counter(self.load_counters())
+                if self.pending_counts:
+                    stored.update(self.pending_counts())
+                unsettled, scanned = self._scan()
+                total = self.count_votes()
+                if total < sum(self._counts.values()) + len(unsettled):
+                    print("[TALLY] Ballots were deleted since the last run; recounting from the start")
+                    self._reset()
+                    unsettled, rescanned = self._scan()
+                    scanned += rescanned
+                settled = self._counts
+                counted = Counter(settled)
+                counted.update(candidate_id for _, candidate_id in unsettled)
+            except Exception as e:
+                with self._lock:
+                    self.failures += 1
+                print(f"[TALLY] Reconciliation failed: {e}")
+                raise
+
+            # Above its ballots, or below the settled ones (increments of newer ballots may
+            # still be pending in other workers). Candidates that no longer exist are left
+            # out: their ballots went with them.
+            suspects = {}
+            for cid in stored:
+                if stored[cid] > counted[cid]:
+                    suspects[cid] = stored[cid] - counted[cid]
+                elif stored[cid] < settled[cid]:
+                    suspects[cid] = stored[cid] - settled[cid]
+            confirmed = {cid: diff for cid, diff in suspects.items() if self._suspects.get(cid) == diff}
+            self._suspects = suspects
+
+            repaired = {}
+            if repair and confirmed:
+                try:
+                    self.apply_increments({cid: -diff for cid, diff in confirmed.items()})
+                    repaired, confirmed = confirmed, {}
+                    self._suspects = {cid: d for cid, d in suspects.items() if cid not in repaired}
+                    print(f"[TALLY] Repaired {len(repaired)} candidate counters: {repaired}")
+                    if self.on_repair:
+                        self.on_repair()
+                except Exception as e:
+                    print(f"[TALLY] Repair failed: {e}")
+
+            for cid, diff in confirmed.items():
+                if self.mismatches.get(cid, {}).get("difference") != diff:
+                    print(f"[TALLY] Candidate {cid}: counter {stored[cid]} but {counted[cid]} ballots")
+            elapsed = time.monotonic() - started
+            with self._lock:
+                self.mismatches = {
+                    cid: {
+                        "counter": stored[cid],
+                        "ballots": counted[cid],
+                        "difference": diff,
+                        "since": self.mismatches.get(cid, {}).get("since", time.time()),
+                    }
+                    for cid, diff in confirmed.items()
+                }
+                self.runs += 1
+                self.repaired_votes += sum(abs(d) for d in repaired.values())
+                self.last_run_at = time.time()
+                self.last_run_seconds = elapsed
+                self.last_scanned = scanned
+                self.unsettled_votes = len(unsettled)
+                self.unseen_votes = max(0, total - sum(counted.values()))
+            self.last_report = {
+                "checkpoint": self._checkpoint,
+                "scanned": scanned,
+                "ballots": sum(counted.values()),
+                "mismatches": {cid: m["difference"] for cid, m in self.mismatches.items()},
+                "suspects": len(suspects) - len(repaired),
+                "repaired": repaired,
+                "seconds": round(elapsed, 3),
+            }
+            try:
+                self._save()
+            except OSError as e:
+                print(f"[TALLY] Could not save checkpoint: {e}")
+            return self.last_report
+
+    # -------------------- BACKGROUND --------------------
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                if self.try_lead():
+                    self.run_once()
+            except Exception:
+                pass  # logged by run_once; retried next interval
+
+    def start(self):
+        """Start the background audit thread (idempotent); it only audits while this process leads."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="tally-reconciler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        with self._run_lock:
+            self._release()
+
+    def status(self):
+        """``(stats, mismatches, last_report)`` of the leading process."""
+        if self.is_leader:
+            with self._lock:
+                return self._local_stats(), dict(self.mismatches), self.last_report
+        published = self._published()
+        stats = dict(published.get("stats") or {}, leader=False, leader_pid=published.get("leader_pid"))
+        if published.get("saved_at"):
+            stats["last_run_age_s"] = round(time.time() - published["saved_at"], 1)
+        return stats, published.get("mismatches", {}), published.get("last_report")
+
+    def stats(self):
+        return self.status()[0]
+
+    def _local_stats(self):
+        return {
+            "leader": self.is_leader,
+            "leader_pid": os.getpid(),
+            "checkpoint": self._checkpoint,
+            "max_seen_id": self.max_seen_id,
+            "unsettled_votes": self.unsettled_votes,
+            "unseen_votes": self.unseen_votes,
+            "last_run_age_s": round(time.time() - self.last_run_at, 1) if self.last_run_at else None,
+            "last_run_ms": round(self.last_run_seconds * 1000, 1),
+            "last_scanned": self.last_scanned,
+            "runs": self.runs,
+            "full_recounts": self.full_recounts,
+            "failures": self.failures,
+            "mismatches": len(self.mismatches),
+            "repaired_votes": self.repaired_votes,
+        }
+
+
+if __name__ == "__main__":
+    import sys
+
+    from config import TALLY_RECONCILE_LOCK_PATH
+    from repository import create_repository
+
+    repo = create_repository()
+    # Long enough for running workers to flush the increments of the ballots seen
+    settle = 5.0
+    reconciler = TallyReconciler(
+        repo.votes_after,
+        repo.count_votes,
+        lambda: {r["id"]: r.get("votes", 0) or 0 for r in repo.list_candidates(columns="id,votes")},
+        repo.apply_vote_increments,
+        settle_seconds=settle,
+        lock_path=TALLY_RECONCILE_LOCK_PATH or None,
+    )
+    if not reconciler.try_lead():
+        sys.exit("[TALLY] A running worker leads the reconciliation; see /admin/tally")
+    # Three passes: the first settles the ballots it saw, and a difference has to be seen twice
+    reconciler.run_once()
+    time.sleep(settle)
+    reconciler.run_once()
+    time.sleep(settle)
+    report = reconciler.run_once(repair="--repair" in sys.argv)
+    print(f"[TALLY] {report['ballots']} ballots, {len(report['mismatches'])} mismatched counters "
+          f"{report['mismatches'] or ''}{', repaired ' + str(report['repaired']) if report['repaired'] else ''}")
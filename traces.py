@@ -0,0 +1,109 @@
+"""Opt-in request trace recorder for capacity planning.
+
+With ``TRACE_RECORD_PATH`` set, every finished request appends one compact
+JSON line to that file:
+
+    {"t":1792203115.128,"e":"submit_vote","m":"POST","r":"/vote/<int:candidate_id>",
+     "a":{"candidate_id":3},"u":"5f0c2a9e1b7d4c36","role":"voter","s":302,"ms":41.2,"c":1,"bms":38.9}
+
+``t`` is when the request started (epoch seconds), ``e``/``r`` the Flask
+endpoint and URL rule, ``a`` the URL arguments (ids and file names), ``s`` the
+status, ``ms`` the response time and ``c``/``bms`` the number and total time
+of its backend calls. The user is anonymised: ``u`` is an HMAC of the email
+under ``TRACE_SALT``, stable across workers and restarts but not reversible
+without the salt. No query strings, form fields or headers are recorded.
+
+``python -m benchmarks.replay`` replays such a file against a local backend.
+"""
+import hashlib
+import hmac
+import json
+import os
+import random
+import threading
+import time
+
+
+class TraceRecorder:
+    """Appends anonymised request traces to ``path`` (JSON Lines)."""
+
+    def __init__(self, path, salt, sample_rate=1.0, flush_every=50, flush_interval=1.0):
+        self.path = path
+        self._key = salt.encode("utf-8")
+        self.sample_rate = sample_rate
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        # O_APPEND and whole lines per write: several workers can share one file
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        self.recorded = 0
+
+    def anonymise(self, email):
+        if not email:
+            return None
+        return hmac.new(self._key, email.strip().lower().encode("utf-8"), hashlib.sha256).hexdigest()[:16]
+
+    def record(self, trace, status, endpoint, view_args, user, role):
+        """Append one finished request (``trace`` from ``metrics.Metrics``)."""
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+        elapsed = trace.elapsed or 0.0
+        entry = {
+            "t": round(time.time() - elapsed, 3),
+            "e": endpoint,
+            "m": trace.method,
+            "r": trace.route,
+        }
+        if view_args:
+            entry["a"] = view_args
+        if user:
+            entry["u"] = self.anonymise(user)
+            entry["role"] = role
+        entry.update(
+            s=status,
+            ms=round(elapsed * 1000, 1),
+            c=len(trace.calls),
+            bms=round(sum(call[2] for call in trace.calls) * 1000, 1),
+        )
+        line = json.dumps(entry, separators=(",", ":"), default=str) + "\n"
+        with self._lock:
+            if self._fd is None:
+                return
+            self._buffer.append(line.encode("utf-8"))
+            self.recorded += 1
+            if len(self._buffer) >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush()
+
+    def _flush(self):
+        if self._buffer:
+            os.write(self._fd, b"".join(self._buffer))
+            self._buffer = []
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            if self._fd is not None:
+                self._flush()
+                os.close(self._fd)
+                self._fd = None
+
+    def stats(self):
+        with self._lock:
+            return {"path": self.path, "recorded": self.recorded, "sample_rate": self.sample_rate}
+
+
+def read_trace(path):
+    """Trace entries of ``path`` in start-time order (malformed lines are skipped)."""
+    entries = []
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(entry, dict) and "t" in entry and "e" in entry:
+                entries.append(entry)
+    entries.sort(key=lambda entry: entry["t"])
+    return entries
@@ -0,0 +1,152 @@
+"""Write-behind aggregator for ``candidates.votes``.
+
+In batched mode ``cast_vote`` only inserts the ballot row; the counter bump is
+collected here per candidate and applied in one batched statement every
+``flush_interval`` seconds, or as soon as ``max_pending`` votes are waiting.
+The ``votes`` table stays the durable source of truth: if the process dies
+with increments still pending, ``rebuild()`` recounts every candidate from it.
+
+The recount also counts ballots whose increments are still pending in other
+live workers, which then flush them on top. So ``rebuild()`` is only safe
+with no other worker running: ``python -m vote_counter`` before the app
+starts. While the app is up, lost increments are recovered by the tally
+reconciler's relative repair instead.
+"""
+import threading
+import time
+from collections import Counter
+
+
+class VoteCounterAggregator:
+    """Collects per-candidate vote increments and flushes them in batches."""
+
+    def __init__(self, apply_increments, rebuild_counters, flush_interval=1.0, max_pending=500):
+        self.apply_increments = apply_increments
+        self.rebuild_counters = rebuild_counters
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+
+        self._lock = threading.Lock()
+        # Only one flush at a time, so batches reach the backend in order
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self._pending = Counter()
+        self._pending_votes = 0
+        self._oldest_pending = None  # monotonic time of the oldest unflushed vote
+
+        self.flushes = 0
+        self.flushed_votes = 0
+        self.failures = 0
+        self.last_flush_at = None
+        self.last_flush_seconds = 0.0
+        self.last_flush_lag = 0.0
+        self.max_flush_lag = 0.0
+
+    def add(self, candidate_id, count=1):
+        """Queue ``count`` votes for ``candidate_id``."""
+        with self._lock:
+            self._pending[candidate_id] += count
+            self._pending_votes += count
+            if self._oldest_pending is None:
+                self._oldest_pending = time.monotonic()
+            if self._pending_votes >= self.max_pending:
+                self._wake.set()
+
+    def pending_counts(self):
+        """``{candidate_id: n}`` queued but not yet written to ``candidates.votes``."""
+        with self._lock:
+            return dict(self._pending)
+
+    def flush(self):
+        """Apply pending increments now. Returns the number of votes flushed."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                batch, oldest, votes = self._pending, self._oldest_pending, self._pending_votes
+                self._pending = Counter()
+                self._pending_votes = 0
+                self._oldest_pending = None
+
+            started = time.monotonic()
+            try:
+                self.apply_increments(dict(batch))
+            except Exception as e:
+                print(f"[VOTE_COUNTER] Flush of {votes} votes failed, will retry: {e}")
+                with self._lock:
+                    # Put the batch back in front of anything queued meanwhile
+                    self._pending.update(batch)
+                    self._pending_votes += votes
+                    if self._oldest_pending is None or oldest < self._oldest_pending:
+                        self._oldest_pending = oldest
+                    self.failures += 1
+                return 0
+
+            finished = time.monotonic()
+            with self._lock:
+                self.flushes += 1
+                self.flushed_votes += votes
+                self.last_flush_at = time.time()
+                self.last_flush_seconds = finished - started
+                self.last_flush_lag = finished - oldest
+                self.max_flush_lag = max(self.max_flush_lag, self.last_flush_lag)
+            return votes
+
+    def rebuild(self):
+        """Crash recovery: drop pending increments and recount every candidate from ``votes``."""
+        with self._flush_lock:
+            with self._lock:
+                self._pending = Counter()
+                self._pending_votes = 0
+                self._oldest_pending = None
+            self.rebuild_counters()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def start(self):
+        """Start the background flush thread (idempotent)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="vote-counter-flush", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the flush thread and write out whatever is still pending."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+    def stats(self):
+        with self._lock:
+            lag = time.monotonic() - self._oldest_pending if self._oldest_pending is not None else 0.0
+            return {
+                "pending_votes": self._pending_votes,
+                "pending_candidates": len(self._pending),
+                "current_lag_ms": round(lag * 1000, 1),
+                "flushes": self.flushes,
+                "flushed_votes": self.flushed_votes,
+                "failures": self.failures,
+                "last_flush_at": self.last_flush_at,
+                "last_flush_ms": round(self.last_flush_seconds * 1000, 2),
+                "last_flush_lag_ms": round(self.last_flush_lag * 1000, 1),
+                "max_flush_lag_ms": round(self.max_flush_lag * 1000, 1),
+            }
+
+
+if __name__ == "__main__":
+    from repository import create_repository
+
+    # Run with the app stopped: see the module docstring
+    repo = create_repository()
+    VoteCounterAggregator(repo.apply_vote_increments, repo.rebuild_vote_counters).rebuild()
+    print("[VOTE_COUNTER] Rebuilt candidates.votes from the votes table")
@@ -0,0 +1,43 @@
+-- ==============================================================================
+-- 🔢 BATCHED VOTE COUNTERS (VOTE_COUNTER_MODE=batched)
+-- The app inserts ballots with cast_vote(..., bump_counter => FALSE) and applies
+-- the per-candidate increments it collected in one statement per flush.
+-- ==============================================================================
+
+DROP FUNCTION IF EXISTS apply_vote_increments CASCADE;
+DROP FUNCTION IF EXISTS rebuild_vote_counters CASCADE;
+
+-- increments: {"<candidate_id>": <votes to add>, ...}
+CREATE OR REPLACE FUNCTION apply_vote_increments(increments JSONB)
+RETURNS VOID
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+BEGIN
+    UPDATE candidates c
+    SET votes = c.votes + inc.value::INT
+    FROM jsonb_each_text(increments) AS inc
+    WHERE c.id = inc.key::INT;
+END;
+$$;
+
+-- Crash recovery: the votes table is the source of truth
+CREATE OR REPLACE FUNCTION rebuild_vote_counters()
+RETURNS VOID
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+BEGIN
+    -- WHERE clause keeps pg_safeupdate (enabled on Supabase) happy
+    UPDATE candidates c
+    SET votes = (SELECT COUNT(*) FROM votes v WHERE v.candidate_id = c.id)
+    WHERE c.id IS NOT NULL;
+END;
+$$;
+
+-- Server-side only: the anon key the browser sees must not add counter increments or
+-- trigger a full recount.
+REVOKE EXECUTE ON FUNCTION apply_vote_increments(JSONB) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION rebuild_vote_counters() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION apply_vote_increments(JSONB) TO service_role;
+GRANT EXECUTE ON FUNCTION rebuild_vote_counters() TO service_role;